@@ -0,0 +1,305 @@
+import json
+import os
+import random
+import socket
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import paramiko
+from paramiko.sftp import SFTP_NO_SUCH_FILE, SFTP_OK
+
+BENCH_SSH_PORT = 22022
+BENCH_HTTP_PORT = 19200
+KEYSTORE = "/etc/elasticsearch/elasticsearch.keystore"
+REMOTE_DIRS = {"/etc/elasticsearch", "/etc/elasticsearch/certs", "/etc/elasticsearch/jvm.options.d"}
+
+# Canned answers for the batched scripts ClusterBlade runs
+FACTS_OUTPUT = "cpus=8\nmem_kb=33554432\n"
+PREFLIGHT_OUTPUT = (
+    "max_map_count=262144\nnofile=65535\nnproc=4096\nmemlock=infinity\n"
+    "swap_kb=0\nswappiness=1\nthp=madvise\n"
+)
+
+
+def make_nodes(count, http_port=BENCH_HTTP_PORT):
+    """`count` fake nodes on 127.1.x.y loopback addresses (3 masters, tiered data, some ingest)."""
+    nodes = []
+    for i in range(count):
+        if i < 3:
+            name = f"bench-master-{i + 1}"
+        elif i % 10 == 0:
+            name = f"bench-ingest-{i}"
+        else:
+            name = f"bench-data-{'hot' if i % 3 else 'warm'}-{i}"
+        nodes.append({
+            "name": name,
+            "ip": f"127.1.{i // 250}.{i % 250 + 1}",
+            "dns": f"{name}.bench.local",
+            "rack": f"r{i % 3 + 1}",
+            "http_port": http_port,
+            "transport_port": http_port + 100,
+        })
+    return nodes
+
+
+class FakeCluster:
+    """
+    Shared state of the simulated nodes: which nodes are "down", what each
+    node has on disk (via SFTP), and the latency every request pays.
+    """
+
+    def __init__(self, nodes, latency_ms=2.0, failure_rate=0.0, seed=42):
+        self.nodes = {n["ip"]: n for n in nodes}
+        self.latency = latency_ms / 1000
+        rng = random.Random(seed)
+        self.down = {ip for ip in self.nodes if rng.random() < failure_rate}
+        self.files = {}   # (ip, path) -> bytearray
+        self.dirs = {}    # ip -> set of paths
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def wait(self):
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+
+    def respond(self, ip, command):
+        """(exit_code, stdout) for a remote command."""
+        self.wait()
+        if "cpus=$(nproc)" in command:
+            return 0, FACTS_OUTPUT
+        if "max_map_count=" in command:
+            return 0, PREFLIGHT_OUTPUT
+        if f"rm -f {KEYSTORE}" in command:
+            with self.lock:
+                self.files.pop((ip, KEYSTORE), None)
+            return 0, ""
+        if "elasticsearch-keystore create" in command:
+            with self.lock:
+                self.files[(ip, KEYSTORE)] = bytearray()
+            return 0, ""
+        if "elasticsearch-keystore list" in command:
+            return 0, "keystore.seed\nxpack.security.transport.ssl.secure_key_passphrase\n"
+        if "grep '^cluster.name'" in command:
+            return 0, "bench"
+        return 0, ""
+
+
+# ---------- SSH / SFTP ----------
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, cluster, ip):
+        self.cluster = cluster
+        self.ip = ip
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if self.ip in self.cluster.down or self.ip not in self.cluster.nodes:
+            return paramiko.AUTH_FAILED
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        def reply():
+            code, out = self.cluster.respond(self.ip, command.decode(errors="replace"))
+            try:
+                channel.sendall(out.encode())
+                channel.send_exit_status(code)
+                channel.shutdown_write()
+                channel.close()
+            except Exception:
+                pass
+
+        threading.Thread(target=reply, daemon=True).start()
+        return True
+
+
+class _Handle(paramiko.SFTPHandle):
+    def __init__(self, cluster, key, flags=0):
+        super().__init__(flags)
+        self.cluster = cluster
+        self.key = key
+
+    def write(self, offset, data):
+        with self.cluster.lock:
+            buf = self.cluster.files.setdefault(self.key, bytearray())
+            buf[offset:offset + len(data)] = data
+        return SFTP_OK
+
+    def read(self, offset, length):
+        with self.cluster.lock:
+            return bytes(self.cluster.files.get(self.key, b"")[offset:offset + length])
+
+    def stat(self):
+        return _file_attrs(len(self.cluster.files.get(self.key, b"")))
+
+
+def _file_attrs(size):
+    attrs = paramiko.SFTPAttributes()
+    attrs.st_size = size
+    attrs.st_mode = stat.S_IFREG | 0o640
+    return attrs
+
+
+class _SFTP(paramiko.SFTPServerInterface):
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.cluster = server.cluster
+        self.ip = server.ip
+
+    def open(self, path, flags, attr):
+        self.cluster.wait()
+        key = (self.ip, path)
+        if flags & os.O_CREAT:
+            with self.cluster.lock:
+                self.cluster.files[key] = bytearray()
+        elif key not in self.cluster.files:
+            return SFTP_NO_SUCH_FILE
+        handle = _Handle(self.cluster, key, flags)
+        handle.filename = path
+        return handle
+
+    def stat(self, path):
+        with self.cluster.lock:
+            if (self.ip, path) in self.cluster.files:
+                return _file_attrs(len(self.cluster.files[(self.ip, path)]))
+            path = path.rstrip("/")
+            if path in REMOTE_DIRS or path in self.cluster.dirs.get(self.ip, ()):
+                attrs = paramiko.SFTPAttributes()
+                attrs.st_mode = stat.S_IFDIR | 0o755
+                return attrs
+        return SFTP_NO_SUCH_FILE
+
+    lstat = stat
+
+    def mkdir(self, path, attr):
+        with self.cluster.lock:
+            self.cluster.dirs.setdefault(self.ip, set()).add(path.rstrip("/"))
+        return SFTP_OK
+
+    def remove(self, path):
+        with self.cluster.lock:
+            self.cluster.files.pop((self.ip, path), None)
+        return SFTP_OK
+
+
+class FakeSSHServer:
+    """
+    One listener on 0.0.0.0:`port` answering for every 127.x.y.z fake node;
+    the node is identified by the loopback address the client connected to.
+    """
+
+    def __init__(self, cluster, port=BENCH_SSH_PORT):
+        self.cluster = cluster
+        self.port = port
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("0.0.0.0", port))
+        self.sock.listen(1024)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.sock.close()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        ip = client.getsockname()[0]
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _SFTP)
+        channels = []  # an accepted channel that is garbage-collected closes before its exec request
+        try:
+            transport.start_server(server=_Server(self.cluster, ip))
+            while transport.is_active() and not self._stop.is_set():
+                channel = transport.accept(timeout=1)
+                if channel is not None:
+                    channels.append(channel)
+        except Exception:
+            pass  # plain TCP reachability probes hang up before the SSH handshake
+        finally:
+            transport.close()
+
+
+# ---------- Elasticsearch HTTP ----------
+
+def _es_handler(cluster):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            cluster.wait()
+            ip = self.connection.getsockname()[0]
+            node = cluster.nodes.get(ip)
+            if node is None or ip in cluster.down:
+                return self._json(503, {"error": "node down"})
+            path = self.path.split("?", 1)[0]
+            if path == "/":
+                return self._json(200, {"name": node["name"], "cluster_name": "bench", "version": {"number": "8.15.0"}})
+            if path == "/_cat/nodes":
+                live = [{"ip": n["ip"], "name": n["name"]} for i, n in cluster.nodes.items() if i not in cluster.down]
+                return self._json(200, live)
+            if path == "/_cluster/health":
+                status = "green" if not cluster.down else "yellow"
+                return self._json(200, {"cluster_name": "bench", "status": status,
+                                        "number_of_nodes": len(cluster.nodes) - len(cluster.down)})
+            if path == "/_cat/thread_pool":
+                return self._json(200, [])
+            if path == "/_nodes/hot_threads":
+                body = b""
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return self.wfile.write(body)
+            return self._json(404, {"error": f"no handler for {path}"})
+
+    return Handler
+
+
+class FakeESServer:
+    """Elasticsearch stand-in on 0.0.0.0:`port`, answering `/`, `_cat/nodes` and `_cluster/health` per node."""
+
+    def __init__(self, cluster, port=BENCH_HTTP_PORT):
+        self.httpd = ThreadingHTTPServer(("0.0.0.0", port), _es_handler(cluster))
+        self.httpd.daemon_threads = True
+        self.httpd.request_queue_size = 1024
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
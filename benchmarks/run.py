@@ -0,0 +1,213 @@
+"""
+Offline scaling benchmarks against a simulated cluster.
+
+    python -m benchmarks.run --nodes 10 100 1000 --latency-ms 2 --failure-rate 0.01
+    python -m benchmarks.run --nodes 10 100 --compare runtime/benchmarks/baseline.json
+
+Every fake node gets its own 127.1.x.y loopback address (Linux routes the
+whole 127/8 block to lo); one fake SSH/SFTP server and one fake ES HTTP
+server answer for all of them. Reports are JSON under runtime/benchmarks/.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+from benchmarks.fake_cluster import BENCH_SSH_PORT, FakeCluster, FakeESServer, FakeSSHServer, make_nodes
+from clusterblade.core.health import HEALTH
+from clusterblade.core.paths import get_runtime_dir
+from clusterblade.ssh import client
+
+SSH_USER, SSH_PASS = "bench", "bench"
+ES_USER, ES_PASS = "elastic", "bench"
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_TOLERANCE = 0.25  # 25% slower than the baseline counts as a regression
+
+
+def _timed(fn):
+    """Run fn with stdout silenced; (seconds, result or exception text)."""
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        error = None
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    return time.perf_counter() - start, result, error
+
+
+def _failures(text):
+    return sum(1 for line in (text or "").splitlines() if line.startswith("❌"))
+
+
+def bench_certificates(nodes, workdir):
+    from clusterblade.certificates.generator import generate_all_from_yaml
+
+    yaml_path = workdir / "instances.yaml"
+    yaml_path.write_text(yaml.safe_dump({"cluster_name": "bench", "instances": nodes}), encoding="utf-8")
+    # deploy_ssl reads ./runtime/certificates, so generate there (cwd is the temp dir)
+    seconds, _, error = _timed(lambda: generate_all_from_yaml(yaml_path, Path("runtime") / "certificates"))
+    return {"seconds": seconds, "error": error}
+
+
+def bench_deploy(cluster_state):
+    from clusterblade.elastic.deploy import deploy_cluster
+
+    seconds, logs, error = _timed(lambda: deploy_cluster(cluster_state, SSH_USER, SSH_PASS))
+    return {"seconds": seconds, "failed_nodes": _failures(logs), "error": error}
+
+
+def bench_deploy_ssl(cluster_state):
+    from clusterblade.certificates.deploy_ssl import deploy_ssl_to_nodes
+
+    seconds, logs, error = _timed(lambda: deploy_ssl_to_nodes(cluster_state, SSH_USER, SSH_PASS, cert_password="bench"))
+    return {"seconds": seconds, "failed_nodes": _failures(logs), "error": error}
+
+
+def bench_refresh(nodes):
+    """What the monitor tab's refresh does: parallel probes, then the slow-node pull/evaluate."""
+    from clusterblade.elastic.slow_nodes import SlowNodeDetector
+    from clusterblade.elastic.status import probe_instances
+
+    detector = SlowNodeDetector()
+
+    def refresh():
+        states = probe_instances(nodes, ES_USER, ES_PASS, False)
+        live = [n for n, st in zip(nodes, states) if st["es_up"]]
+        if live:
+            detector.pull(live, ES_USER, ES_PASS, False, force=True)
+        detector.evaluate(nodes)
+        return states
+
+    seconds, states, error = _timed(refresh)
+    down = sum(1 for st in states or () if not st["es_up"])
+    return {"seconds": seconds, "failed_nodes": down, "error": error}
+
+
+def run_size(count, latency_ms, failure_rate, seed, stages):
+    nodes = make_nodes(count)
+    cluster = FakeCluster(nodes, latency_ms=latency_ms, failure_rate=failure_rate, seed=seed)
+    ssh_server = FakeSSHServer(cluster, port=client.SSH_PORT).start()
+    es_server = FakeESServer(cluster).start()
+    cluster_state = {
+        "cluster_name": "bench", "instances": nodes,
+        "enable_security": True, "enable_ssl": True, "enable_http": False,
+        "enable_tuning": True, "preflight": "check",
+    }
+    results = {"nodes": count, "down": len(cluster.down), "stages": {}}
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="clusterblade-bench-") as tmp:
+            os.chdir(tmp)
+            client.KNOWN_HOSTS_PATH = Path(tmp) / "known_hosts"  # the fake server's host key is new every run
+            for stage in stages:
+                print(f"  ⏱️ {stage} @ {count} nodes...", flush=True)
+                if stage == "certificates":
+                    result = bench_certificates(nodes, Path(tmp))
+                elif stage == "deploy":
+                    result = bench_deploy(cluster_state)
+                elif stage == "deploy_ssl":
+                    result = bench_deploy_ssl(cluster_state)
+                else:
+                    result = bench_refresh(nodes)
+                result["per_node_ms"] = result["seconds"] * 1000 / count
+                if result.get("failed_nodes", 0) > len(cluster.down):
+                    # the timings would only measure failures
+                    result["error"] = result["error"] or (
+                        f"{result['failed_nodes']} node(s) failed but only {len(cluster.down)} are down"
+                    )
+                results["stages"][stage] = result
+                print(f"     {result['seconds']:.2f}s ({result['per_node_ms']:.1f} ms/node)"
+                      + (f" ⚠️ {result['error']}" if result["error"] else ""), flush=True)
+    finally:
+        os.chdir(cwd)
+        # every size starts cold: no pooled connections, learned host keys or open circuits
+        client.POOL.close_all()
+        client.reset_host_keys()
+        HEALTH.reset()
+        ssh_server.stop()
+        es_server.stop()
+    results["requests"] = cluster.requests
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Regression lines: stages more than `tolerance` slower than the baseline at the same size."""
+    previous = {run["nodes"]: run["stages"] for run in baseline.get("runs", [])}
+    regressions = []
+    for run in report["runs"]:
+        for stage, result in run["stages"].items():
+            old = previous.get(run["nodes"], {}).get(stage)
+            if old and old["seconds"] and result["seconds"] > old["seconds"] * (1 + tolerance):
+                regressions.append(
+                    f"❌ {stage} @ {run['nodes']} nodes: {result['seconds']:.2f}s "
+                    f"vs {old['seconds']:.2f}s (+{result['seconds'] / old['seconds'] - 1:.0%})"
+                )
+    return regressions
+
+
+STAGES = ("certificates", "deploy", "deploy_ssl", "refresh")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="cluster sizes to simulate")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="mean latency per fake SSH/HTTP request")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of nodes that are down")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, help="report path (default: runtime/benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="baseline report; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    if sys.platform != "linux":
+        parser.error("the simulated cluster needs Linux loopback addressing (127.1.x.y)")
+    if max(args.nodes) > 250 * 250:
+        parser.error("at most 62500 simulated nodes")
+
+    # Point every SSH call at the fake server
+    client.SSH_PORT = int(os.environ.get("CLUSTERBLADE_SSH_PORT", BENCH_SSH_PORT))
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "latency_ms": args.latency_ms,
+        "failure_rate": args.failure_rate,
+        "runs": [],
+    }
+    for count in args.nodes:
+        print(f"🧪 Simulating {count} nodes", flush=True)
+        report["runs"].append(run_size(count, args.latency_ms, args.failure_rate, args.seed, args.stages))
+
+    out = args.out or get_runtime_dir() / "benchmarks" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"📄 Report written to {out}")
+
+    errors = [
+        f"❌ {stage} @ {run['nodes']} nodes: {result['error']}"
+        for run in report["runs"] for stage, result in run["stages"].items() if result["error"]
+    ]
+    if errors:
+        print("\n".join(errors))
+        return 1
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+        print("\n".join(regressions) or f"✅ No regressions against {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+from pathlib import Path
+import time
+from clusterblade.core.jobs import JobKind
+from clusterblade.core.tracing import span
+from clusterblade.ssh.client import session
+
+CERT_DIR = Path("runtime") / "certificates"
+HTTPS_CERT_DIR = CERT_DIR / "https"
+REMOTE_CERT_DIR = "/etc/elasticsearch/certs"
+HTTPS_FILES = ("ca.crt", "http.crt", "http.key")
+
+
+def generate_https_certs(cert_dir=CERT_DIR):
+    """
+    Generate the HTTP-layer certs from the existing CA (made by the SSL tab).
+    Raises FileNotFoundError when the CA is missing.
+    """
+    from clusterblade.certificates.generator import generate_http_certs
+
+    cert_dir = Path(cert_dir)
+    ca_cert, ca_key = cert_dir / "ca.pem", cert_dir / "ca.key"
+    if not ca_cert.exists() or not ca_key.exists():
+        raise FileNotFoundError("Missing CA files (ca.pem / ca.key). Please generate SSL certificates first.")
+    (cert_dir / "https").mkdir(parents=True, exist_ok=True)
+    generate_http_certs(cert_dir / "https", ca_cert, ca_key)
+
+
+def deploy_https_node(node, ssh_user, ssh_pass, cert_dir=CERT_DIR):
+    """Upload the HTTPS certs to one node. Returns log lines; raises on failure."""
+    name, ip = node.get("name"), node.get("ip")
+    logs = [f"🚀 Deploying HTTPS certs to {name} ({ip})..."]
+
+    with span("https.node", node=name, ip=ip):
+        with session(ip, ssh_user, ssh_pass, timeout=15) as ssh:
+            sftp = ssh.open_sftp()
+
+            ssh.exec_command(f"sudo mkdir -p {REMOTE_CERT_DIR}")
+            ssh.exec_command(f"sudo chown elasticsearch:elasticsearch {REMOTE_CERT_DIR}")
+            time.sleep(0.2)
+
+            for file_name in HTTPS_FILES:
+                local_file = Path(cert_dir) / "https" / file_name
+                if not local_file.exists():
+                    logs.append(f"⚠️ Missing file: {local_file}")
+                    continue
+
+                remote_file = f"{REMOTE_CERT_DIR}/{file_name}"
+                with span("sftp.put", path=remote_file):
+                    sftp.put(local_file.as_posix(), remote_file)
+                ssh.exec_command(f"sudo chown elasticsearch:elasticsearch {remote_file}")
+                ssh.exec_command(f"sudo chmod 640 {remote_file}")
+                time.sleep(0.1)
+
+            sftp.close()
+
+    logs.append(f"✅ HTTPS certs deployed successfully to {name} ({ip})")
+    return logs
+
+
+# ---------- Background job (core.jobs) ----------
+# params: {"nodes": [node dicts], "ssh_user", "regenerate" (default True), "cert_dir" (optional)}; secrets: {"ssh_pass"}
+# Without "regenerate" the existing local HTTP cert is only pushed (e.g. to nodes serving a different one).
+
+CERTIFICATES_STEP = "certificates"
+
+
+def _job_step(ctx, key):
+    if key == CERTIFICATES_STEP:
+        generate_https_certs(ctx["cert_dir"])
+        return ["✅ HTTPS certificates generated successfully."]
+    return deploy_https_node(ctx["nodes"][key], ctx["ssh_user"], ctx.get("ssh_pass"), ctx["cert_dir"])
+
+
+HTTPS_JOB = JobKind(
+    title="Generate & deploy HTTPS certificates",
+    steps=lambda params: (
+        [CERTIFICATES_STEP] if params.get("regenerate", True) else []
+    ) + [n["name"] for n in params["nodes"]],
+    prepare=lambda params, secrets, pending: (
+        {"nodes": {n["name"]: n for n in params["nodes"]}, "ssh_user": params["ssh_user"],
+         "cert_dir": Path(params.get("cert_dir") or CERT_DIR), **secrets}, []
+    ),
+    run_step=_job_step,
+)
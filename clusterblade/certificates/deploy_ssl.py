@@ -1,93 +1,89 @@
-import paramiko
 from pathlib import Path
 import time
+from clusterblade.core.jobs import JobKind
+from clusterblade.core.tracing import span, traced
+from clusterblade.ssh.client import session
 
+CERT_DIR = Path("runtime") / "certificates"
+REMOTE_CERT_DIR = "/etc/elasticsearch/certs"
+KEYSTORE_PATH = "/etc/elasticsearch/elasticsearch.keystore"
 
-def deploy_ssl_to_nodes(shared_state, ssh_user, ssh_pass, cert_password=None, progress_callback=None):
-    """
-    Deploy SSL certs from runtime/certificates/ to each node.
-    Fixes chown permission issues (must be done as root).
-    """
 
-    instances = shared_state.get("instances", [])
-    if not instances:
-        return "❌ No instances found in shared state."
+def run_ssh_command(ssh, command, sudo=False, progress_callback=None):
+    """Executes a remote SSH command with proper privilege handling."""
+    if sudo and not command.startswith("sudo"):
+        command = f"sudo {command}"
 
-    results = []
-
-    def run_ssh_command(ssh, command, sudo=False):
-        """Executes a remote SSH command with proper privilege handling."""
-        if sudo and not command.startswith("sudo"):
-            command = f"sudo {command}"
-
-        if progress_callback:
-            progress_callback(f"🖥️ Running: {command}")
+    if progress_callback:
+        progress_callback(f"🖥️ Running: {command}")
 
+    with span("ssh.exec", command=command.removeprefix("sudo ").split(" ", 1)[0]):
         stdin, stdout, stderr = ssh.exec_command(command)
         exit_status = stdout.channel.recv_exit_status()
-        out = stdout.read().decode().strip()
-        err = stderr.read().decode().strip()
+    out = stdout.read().decode().strip()
+    err = stderr.read().decode().strip()
 
-        if exit_status != 0:
-            raise RuntimeError(f"❌ Command failed ({exit_status}): {command}\n{err}")
+    if exit_status != 0:
+        raise RuntimeError(f"❌ Command failed ({exit_status}): {command}\n{err}")
 
-        return out or "(no output)"
+    return out or "(no output)"
 
-    # 🔍 Certificate source dir
-    base_cert_dir = Path("runtime") / "certificates"
-    if not base_cert_dir.exists():
-        return f"❌ Certificate directory not found: {base_cert_dir}"
 
-    for node in instances:
-        name, ip = node["name"], node["ip"]
-        try:
-            log_line = f"\n🚀 Deploying SSL to node: {name} ({ip})"
-            print(log_line)
-            if progress_callback:
-                progress_callback(log_line)
+def deploy_ssl_node(node, ssh_user, ssh_pass, cert_password=None, base_cert_dir=CERT_DIR, progress_callback=None):
+    """
+    Upload the CA and node certs to one node and rebuild its keystore.
+    Returns the success line; raises on failure.
+    """
+    name, ip = node["name"], node["ip"]
+
+    def run(ssh, command, sudo=False):
+        return run_ssh_command(ssh, command, sudo, progress_callback)
 
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(ip, username=ssh_user, password=ssh_pass, timeout=20)
+    with span("ssl.node", node=name, ip=ip):
+        log_line = f"\n🚀 Deploying SSL to node: {name} ({ip})"
+        print(log_line)
+        if progress_callback:
+            progress_callback(log_line)
 
-            remote_cert_dir = "/etc/elasticsearch/certs"
+        with session(ip, ssh_user, ssh_pass, timeout=20) as ssh:
             sftp = ssh.open_sftp()
 
             # Ensure certs folder exists
             try:
-                sftp.stat(remote_cert_dir)
+                sftp.stat(REMOTE_CERT_DIR)
             except FileNotFoundError:
-                run_ssh_command(ssh, f"mkdir -p {remote_cert_dir}", sudo=True)
-                run_ssh_command(ssh, f"chown elasticsearch:elasticsearch {remote_cert_dir}", sudo=True)
+                run(ssh, f"mkdir -p {REMOTE_CERT_DIR}", sudo=True)
+                run(ssh, f"chown elasticsearch:elasticsearch {REMOTE_CERT_DIR}", sudo=True)
 
             # ✅ Upload CA and node certs
             for file in ["ca.pem", f"{name}.crt", f"{name}.key"]:
                 local_file = base_cert_dir / file
                 if not local_file.exists():
                     raise FileNotFoundError(f"Missing file: {local_file}")
-                remote_file = f"{remote_cert_dir}/{file}"
-                sftp.put(local_file.as_posix(), remote_file)
-                run_ssh_command(ssh, f"chown elasticsearch:elasticsearch {remote_file}", sudo=True)
-                run_ssh_command(ssh, f"chmod 640 {remote_file}", sudo=True)
+                remote_file = f"{REMOTE_CERT_DIR}/{file}"
+                with span("sftp.put", path=remote_file):
+                    sftp.put(local_file.as_posix(), remote_file)
+                run(ssh, f"chown elasticsearch:elasticsearch {remote_file}", sudo=True)
+                run(ssh, f"chmod 640 {remote_file}", sudo=True)
 
             sftp.close()
 
             # 🧰 Rebuild keystore
-            keystore_path = "/etc/elasticsearch/elasticsearch.keystore"
-            run_ssh_command(ssh, f"rm -f {keystore_path}", sudo=True)
-            run_ssh_command(ssh, "/usr/share/elasticsearch/bin/elasticsearch-keystore create", sudo=True)
+            run(ssh, f"rm -f {KEYSTORE_PATH}", sudo=True)
+            run(ssh, "/usr/share/elasticsearch/bin/elasticsearch-keystore create", sudo=True)
 
             # Wait until keystore exists
-            for _ in range(10):
-                try:
-                    sftp = ssh.open_sftp()
-                    sftp.stat(keystore_path)
-                    sftp.close()
-                    break
-                except FileNotFoundError:
-                    time.sleep(0.5)
-            else:
-                raise RuntimeError("❌ Keystore not created after 5s wait.")
+            with span("keystore.wait"):
+                for _ in range(10):
+                    try:
+                        sftp = ssh.open_sftp()
+                        sftp.stat(KEYSTORE_PATH)
+                        sftp.close()
+                        break
+                    except FileNotFoundError:
+                        time.sleep(0.5)
+                else:
+                    raise RuntimeError("❌ Keystore not created after 5s wait.")
 
             # Add password if needed
             if cert_password:
@@ -96,31 +92,80 @@ def deploy_ssl_to_nodes(shared_state, ssh_user, ssh_pass, cert_password=None, pr
                     "/usr/share/elasticsearch/bin/elasticsearch-keystore "
                     "add -x xpack.security.transport.ssl.secure_key_passphrase\""
                 )
-                run_ssh_command(ssh, echo_cmd, sudo=True)
-                out = run_ssh_command(
-                    ssh, "/usr/share/elasticsearch/bin/elasticsearch-keystore list", sudo=True
-                )
+                run(ssh, echo_cmd, sudo=True)
+                out = run(ssh, "/usr/share/elasticsearch/bin/elasticsearch-keystore list", sudo=True)
                 if "xpack.security.transport.ssl.secure_key_passphrase" not in out:
                     raise RuntimeError("❌ Keystore entry missing after add!")
 
             # ✅ Restart service
             # if progress_callback:
             #     progress_callback(f"🔄 Restarting Elasticsearch on {name}...")
-            # run_ssh_command(ssh, f"systemctl restart elasticsearch", sudo=True)
+            # run(ssh, f"systemctl restart elasticsearch", sudo=True)
 
-            log_line = f"✅ Successfully deployed SSL to {name} ({ip})"
-            print(log_line)
-            if progress_callback:
-                progress_callback(log_line)
-            results.append(log_line)
+    log_line = f"✅ Successfully deployed SSL to {name} ({ip})"
+    print(log_line)
+    if progress_callback:
+        progress_callback(log_line)
+    return log_line
 
-            ssh.close()
 
+@traced("deploy_ssl")
+def deploy_ssl_to_nodes(cluster_state, ssh_user, ssh_pass, cert_password=None, progress_callback=None):
+    """
+    Deploy SSL certs from runtime/certificates/ to each node.
+    Fixes chown permission issues (must be done as root).
+    """
+
+    instances = cluster_state.get("instances", [])
+    if not instances:
+        return "❌ No instances found in cluster state."
+
+    # 🔍 Certificate source dir
+    if not CERT_DIR.exists():
+        return f"❌ Certificate directory not found: {CERT_DIR}"
+
+    results = []
+    for node in instances:
+        try:
+            results.append(deploy_ssl_node(node, ssh_user, ssh_pass, cert_password, CERT_DIR, progress_callback))
         except Exception as e:
-            err_msg = f"❌ Failed on {name} ({ip}): {e}"
+            err_msg = f"❌ Failed on {node['name']} ({node['ip']}): {e}"
             print(err_msg)
             if progress_callback:
                 progress_callback(err_msg)
             results.append(err_msg)
 
     return "\n".join(results)
+
+
+# ---------- Background job (core.jobs) ----------
+# Step "certificates" regenerates the CA and node certs (once: a resumed job
+# must not re-issue certs already pushed to nodes), then one step per node.
+# params: {"yaml_path", "instances", "ssh_user", "cert_validity"}; secrets: {"ssh_pass", "cert_password"}
+
+CERTIFICATES_STEP = "certificates"
+
+
+def _job_prepare(params, secrets, pending):
+    nodes = {n["name"]: n for n in params["instances"]}
+    return {**params, **secrets, "nodes": nodes}, []
+
+
+def _job_step(ctx, key):
+    password = ctx.get("cert_password") or None
+    if key == CERTIFICATES_STEP:
+        from clusterblade.certificates.generator import generate_all_from_yaml
+
+        generate_all_from_yaml(
+            Path(ctx["yaml_path"]), CERT_DIR, password.encode() if password else None, ctx["cert_validity"]
+        )
+        return ["✅ Certificates regenerated successfully."]
+    return [deploy_ssl_node(ctx["nodes"][key], ctx["ssh_user"], ctx.get("ssh_pass"), password)]
+
+
+SSL_JOB = JobKind(
+    title="Regenerate & deploy SSL certificates",
+    steps=lambda params: [CERTIFICATES_STEP] + [n["name"] for n in params["instances"]],
+    prepare=_job_prepare,
+    run_step=_job_step,
+)
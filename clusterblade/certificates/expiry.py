@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from clusterblade.core.health import HEALTH
+from clusterblade.core.jobs import JobKind
+from clusterblade.core.ports import node_ports
+from clusterblade.core.tracing import span
+
+CERT_DIR = Path("runtime") / "certificates"
+HTTPS_CERT_DIR = CERT_DIR / "https"
+WARN_DAYS = 30          # expiring soon below this
+TLS_TIMEOUT = 5.0       # connect + handshake, per endpoint
+SCAN_CONCURRENCY = 256  # handshakes in flight at once
+LAYERS = ("transport", "http")
+
+# worst first, for sorting and for the monitor's summary line
+STATUS_ORDER = ("expired", "mismatch", "expiring", "unreachable", "ok")
+
+
+def cert_info(der):
+    """{"subject", "not_after", "days_left", "fingerprint"} of a DER certificate."""
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+
+    cert = x509.load_der_x509_certificate(der)
+    not_after = getattr(cert, "not_valid_after_utc", None) or cert.not_valid_after.replace(tzinfo=timezone.utc)
+    names = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return {
+        "subject": names[0].value if names else cert.subject.rfc4514_string(),
+        "not_after": not_after.isoformat(timespec="seconds"),
+        "days_left": int((not_after - datetime.now(timezone.utc)).total_seconds() // 86400),
+        "fingerprint": hashlib.sha256(der).hexdigest(),
+    }
+
+
+def _pem_info(path):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import serialization
+
+    try:
+        cert = x509.load_pem_x509_certificate(Path(path).read_bytes())
+    except (OSError, ValueError):
+        return None
+    return cert_info(cert.public_bytes(serialization.Encoding.DER))
+
+
+def local_manifest(nodes, cert_dir=CERT_DIR):
+    """
+    What the nodes should be serving, from the local cert files:
+    {("transport", name): info, ("http", name): info, ("ca", None): info}
+    (the HTTP cert is shared by every node).
+    """
+    cert_dir = Path(cert_dir)
+    http = _pem_info(cert_dir / "https" / "http.crt")
+    manifest = {("ca", None): _pem_info(cert_dir / "ca.pem")}
+    for node in nodes:
+        name = node.get("name", "")
+        manifest[("transport", name)] = _pem_info(cert_dir / f"{name}.crt")
+        manifest[("http", name)] = http
+    return manifest
+
+
+def _client_context(cert_dir, password):
+    """
+    TLS context that accepts any server cert (we only read it). ES transport
+    requires a client cert, so with a cert_dir the first loadable local node
+    cert is offered.
+    """
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    for crt in sorted(Path(cert_dir).glob("*.crt")) if cert_dir else ():
+        try:
+            # a callable, so an encrypted key without password fails instead of prompting on the terminal
+            ctx.load_cert_chain(crt, crt.with_suffix(".key"), password=lambda: password or b"")
+            break
+        except (OSError, ssl.SSLError, ValueError):
+            continue
+    return ctx
+
+
+async def _fetch(host, port, ctx, limit):
+    """(DER leaf cert, None) or (None, error) from one TLS handshake; the outcome feeds the host's circuit."""
+    if not HEALTH.allow(host):  # may claim the half-open trial, so every path below records a result
+        return None, "host unreachable (circuit open)"
+    async with limit:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=ctx), TLS_TIMEOUT)
+        except asyncio.TimeoutError:
+            HEALTH.record_failure(host, "TLS connect timeout")
+            return None, f"timeout after {TLS_TIMEOUT:.0f}s"
+        except ssl.SSLError as e:
+            HEALTH.record_success(host)  # the host answered; only the handshake failed
+            return None, f"TLS handshake failed: {e.reason or e}"
+        except OSError as e:
+            HEALTH.record_failure(host, e)
+            return None, e.strerror or str(e)
+        HEALTH.record_success(host)
+        try:
+            return writer.get_extra_info("ssl_object").getpeercert(binary_form=True), None
+        finally:
+            writer.close()
+
+
+async def _fetch_all(endpoints, ctx_for, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(_fetch(host, port, ctx_for(layer), limit) for layer, host, port in endpoints))
+
+
+def _run(coro):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:  # inside an event loop: use a private one
+        return pool.submit(asyncio.run, coro).result()
+
+
+def classify(row, warn_days=WARN_DAYS):
+    if row.get("error"):
+        return "unreachable"
+    if row["days_left"] < 0:
+        return "expired"
+    if row.get("expected") and row["fingerprint"] != row["expected"]:
+        return "mismatch"
+    if row["days_left"] < warn_days:
+        return "expiring"
+    return "ok"
+
+
+def scan_certificates(nodes, layers=LAYERS, cert_dir=CERT_DIR, cert_password=None,
+                      warn_days=WARN_DAYS, concurrency=SCAN_CONCURRENCY):
+    """
+    Pull the leaf certificate from every node's transport and/or HTTP port
+    with raw TLS handshakes (no SSH), all at once, and compare it with the
+    local manifest. Returns one row per node and layer:
+    {"name", "ip", "layer", "port", "subject", "not_after", "days_left",
+     "fingerprint", "expected", "status", "error"}, worst status first.
+    """
+    nodes = list(nodes)
+    manifest = local_manifest(nodes, cert_dir)
+    endpoints, keys = [], []
+    for node in nodes:
+        http_port, transport_port = node_ports(node)
+        for layer in layers:
+            endpoints.append((layer, node.get("ip", ""), transport_port if layer == "transport" else http_port))
+            keys.append(node)
+
+    password = cert_password.encode() if isinstance(cert_password, str) and cert_password else cert_password
+    contexts = {"transport": _client_context(cert_dir, password), "http": _client_context(None, None)}
+    with span("cert_scan", endpoints=len(endpoints)):
+        fetched = _run(_fetch_all(endpoints, contexts.get, concurrency)) if endpoints else []
+
+    rows = []
+    for node, (layer, ip, port), (der, error) in zip(keys, endpoints, fetched):
+        name = node.get("name", "")
+        expected = manifest.get((layer, name))
+        row = {"name": name, "ip": ip, "layer": layer, "port": port, "subject": None, "not_after": None,
+               "days_left": None, "fingerprint": None, "expected": expected["fingerprint"] if expected else None,
+               "error": error}
+        if der:
+            row.update(cert_info(der))
+        row["status"] = classify(row, warn_days)
+        rows.append(row)
+    rows.sort(key=lambda r: (STATUS_ORDER.index(r["status"]), r["days_left"] if r["days_left"] is not None else 0))
+    return rows
+
+
+def needs_reissue(rows):
+    """{"transport": [names], "http": [names]} whose cert is expired, expiring or not the local one."""
+    flagged = {layer: [] for layer in LAYERS}
+    for row in rows:
+        if row["status"] in ("expired", "expiring", "mismatch") and row["name"] not in flagged[row["layer"]]:
+            flagged[row["layer"]].append(row["name"])
+    return flagged
+
+
+def ca_days_left(cert_dir=CERT_DIR):
+    info = _pem_info(Path(cert_dir) / "ca.pem")
+    return info["days_left"] if info else None
+
+
+def format_report(rows, cert_dir=CERT_DIR):
+    counts = {status: sum(r["status"] == status for r in rows) for status in STATUS_ORDER}
+    lines = ["🔏 " + " | ".join(f"{status} {n}" for status, n in counts.items() if n)]
+    ca_days = ca_days_left(cert_dir)
+    if ca_days is not None and ca_days < WARN_DAYS:
+        lines.append(f"⚠️ The CA expires in {ca_days} days: regenerate everything from the SSL tab.")
+    icons = {"expired": "⛔", "mismatch": "🔀", "expiring": "⏳", "unreachable": "❔", "ok": "✅"}
+    for r in rows:
+        if r["status"] == "ok":
+            continue
+        detail = r["error"] or f"{r['days_left']} days left (until {r['not_after']})"
+        if r["status"] == "mismatch":
+            detail += f"; serving {r['fingerprint'][:16]}…, local {r['expected'][:16]}…"
+        lines.append(f"{icons[r['status']]} {r['name']} {r['layer']} ({r['ip']}:{r['port']}): {detail}")
+    return "\n".join(lines)
+
+
+# ---------- Last scan per cluster (read by /metrics) ----------
+
+_LAST_SCAN = {}
+_LAST_SCAN_LOCK = threading.Lock()
+
+
+def record_scan(cluster, rows):
+    with _LAST_SCAN_LOCK:
+        _LAST_SCAN[cluster] = (time.time(), [dict(r) for r in rows])
+
+
+def last_scans():
+    """{cluster: (timestamp, rows)} (a copy)."""
+    with _LAST_SCAN_LOCK:
+        return {cluster: (ts, [dict(r) for r in rows]) for cluster, (ts, rows) in _LAST_SCAN.items()}
+
+
+# ---------- Incremental reissue (core.jobs) ----------
+# One step per node: issue a new transport cert from the existing CA (only
+# when the local one is missing or expiring; a mismatch just needs a push),
+# then push it and rebuild the keystore with deploy_ssl_node.
+# params: {"instances": [flagged node dicts], "ssh_user", "cert_validity", "warn_days", "cert_dir"};
+# secrets: {"ssh_pass", "cert_password"}
+
+def _reissue_step(ctx, name):
+    from clusterblade.certificates.deploy_ssl import deploy_ssl_node
+    from clusterblade.certificates.generator import generate_node_cert
+
+    node = ctx["nodes"][name]
+    cert_dir = ctx["cert_dir"]
+    password = ctx.get("cert_password") or None
+    logs = []
+    local = _pem_info(cert_dir / f"{name}.crt")
+    if local is None or local["days_left"] < ctx.get("warn_days", WARN_DAYS):
+        with span("cert.node", node=name):
+            generate_node_cert(
+                cert_dir, name, node["ip"], node.get("dns") or name, cert_dir / "ca.pem", cert_dir / "ca.key",
+                password.encode() if password else None, ctx["cert_validity"],
+            )
+        logs.append(f"🔏 Issued a new certificate for {name} ({ctx['cert_validity']} days).")
+    logs.append(deploy_ssl_node(node, ctx["ssh_user"], ctx.get("ssh_pass"), password, cert_dir))
+    return logs
+
+
+def _reissue_prepare(params, secrets, pending):
+    cert_dir = Path(params.get("cert_dir") or CERT_DIR)
+    if not (cert_dir / "ca.pem").exists() or not (cert_dir / "ca.key").exists():
+        raise FileNotFoundError("Missing CA files (ca.pem / ca.key). Please generate SSL certificates first.")
+    return {**params, **secrets, "cert_dir": cert_dir, "nodes": {n["name"]: n for n in params["instances"]}}, []
+
+
+REISSUE_JOB = JobKind(
+    title="Reissue & deploy expiring transport certificates",
+    steps=lambda params: [n["name"] for n in params["instances"]],
+    prepare=_reissue_prepare,
+    run_step=_reissue_step,
+)
+
+
+def queue_reissues(manager, cluster, nodes, rows, ssh_user, ssh_pass, cert_password=None, cert_validity=3650,
+                   warn_days=WARN_DAYS, cert_dir=CERT_DIR):
+    """
+    Submit background jobs for the flagged nodes: "reissue" for transport
+    certs and "https" for the HTTP cert. The HTTP cert is shared, so while
+    the local one is still valid it is only pushed to the flagged nodes;
+    when it must be regenerated it is pushed to every node. Returns the
+    submitted job IDs.
+    """
+    flagged = needs_reissue(rows)
+    by_name = {n.get("name", ""): dict(n) for n in nodes}
+    job_ids = []
+    if flagged["transport"]:
+        job_ids.append(manager.submit(
+            "reissue", cluster,
+            {"instances": [by_name[n] for n in flagged["transport"]], "ssh_user": ssh_user,
+             "cert_validity": cert_validity, "warn_days": warn_days, "cert_dir": str(cert_dir)},
+            {"ssh_pass": ssh_pass, "cert_password": cert_password},
+        ))
+    if flagged["http"]:
+        local = _pem_info(Path(cert_dir) / "https" / "http.crt")
+        regenerate = local is None or local["days_left"] < warn_days
+        targets = list(by_name.values()) if regenerate else [by_name[n] for n in flagged["http"]]
+        job_ids.append(manager.submit(
+            "https", cluster,
+            {"nodes": targets, "ssh_user": ssh_user, "regenerate": regenerate, "cert_dir": str(cert_dir)},
+            {"ssh_pass": ssh_pass},
+        ))
+    return job_ids
@@ -1,12 +1,13 @@
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
 from datetime import datetime, timedelta
 from pathlib import Path
 import ipaddress
-import yaml
 import shutil
+from clusterblade.certificates.key_pool import take_rsa_key
+from clusterblade.core.instances import parse_instances
+from clusterblade.core.tracing import span, traced
 
 
 def cleanup_old_certs(cert_dir: Path):
@@ -26,7 +27,7 @@ def generate_ca(cert_dir: Path,cert_validity:int=3650):
     """Generate a new CA certificate and private key."""
     print("🔧 Generating new Root CA...")
 
-    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key = take_rsa_key(2048)  # pre-generated (certificates.key_pool)
     subject = issuer = x509.Name([
         x509.NameAttribute(NameOID.COUNTRY_NAME, "OM"),
         x509.NameAttribute(NameOID.ORGANIZATION_NAME, "ClusterBlade"),
@@ -74,7 +75,7 @@ def generate_node_cert(cert_dir: Path, node_name: str, node_ip: str,dns: str, ca
     with open(ca_key_path, "rb") as f:
         ca_key = serialization.load_pem_private_key(f.read(), password=None)
 
-    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key = take_rsa_key(2048)  # pre-generated (certificates.key_pool)
     subject = x509.Name([
         x509.NameAttribute(NameOID.ORGANIZATION_NAME, "ClusterBlade Node"),
         x509.NameAttribute(NameOID.COMMON_NAME, node_name),
@@ -113,22 +114,22 @@ def generate_node_cert(cert_dir: Path, node_name: str, node_ip: str,dns: str, ca
     return cert_path, key_path
 
 
+@traced("certificates")
 def generate_all_from_yaml(yaml_path: Path, cert_dir: Path, password: bytes | None = None, cert_validity:int=3650):
-    """Regenerate all certs fresh based on instances.yaml."""
+    """
+    Regenerate all certs fresh based on instances.yaml.
+    The file is validated first (DNS required for the SAN), so a bad
+    inventory raises InstancesError before any existing cert is removed.
+    """
     print("📖 Reading instances from YAML file...")
-    with open(yaml_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
-    instances = data.get("instances") or data.get("nodes")
-    if not instances:
-        print("❌ No instances found in YAML file.")
-        return
+    instances = parse_instances(yaml_path, require_dns=True).instances
 
     # Always wipe and start fresh
     cleanup_old_certs(cert_dir)
 
     # Create new CA
-    ca_cert, ca_key = generate_ca(cert_dir,cert_validity)
+    with span("cert.ca"):
+        ca_cert, ca_key = generate_ca(cert_dir,cert_validity)
 
     # Generate new certs for all nodes
     for node in instances:
@@ -139,7 +140,8 @@ def generate_all_from_yaml(yaml_path: Path, cert_dir: Path, password: bytes | No
             print(f"⚠️ Skipping node with incomplete data: {node}")
             continue
 
-        generate_node_cert(cert_dir, name, ip,dns, ca_cert, ca_key, password,cert_validity)
+        with span("cert.node", node=name):
+            generate_node_cert(cert_dir, name, ip,dns, ca_cert, ca_key, password,cert_validity)
 
     print("\n🎉 All node certificates regenerated successfully!")
 
@@ -162,7 +164,7 @@ def generate_http_certs(cert_dir: Path, ca_cert_path: Path, ca_key_path: Path,ce
         ca_key = serialization.load_pem_private_key(f.read(), password=None)
 
     # --- Generate private key for HTTP layer ---
-    http_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    http_key = take_rsa_key(2048)  # pre-generated (certificates.key_pool)
 
     # --- Build certificate ---
     subject = issuer = x509.Name([
@@ -0,0 +1,212 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from clusterblade.core.paths import get_certificates_dir
+
+# Ready keys kept per key size (0 disables the pool) and background generators (niced processes)
+POOL_SIZE = int(os.environ.get("CLUSTERBLADE_KEY_POOL_SIZE", "8"))
+POOL_WORKERS = int(os.environ.get("CLUSTERBLADE_KEY_POOL_WORKERS", "1"))
+KEY_SIZE = 2048
+
+
+def get_key_pool_dir() -> Path:
+    path = get_certificates_dir() / "key_pool"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_secret_path() -> Path:
+    """
+    Where the pool passphrase lives: CLUSTERBLADE_KEY_POOL_SECRET_FILE, else
+    ~/.config/clusterblade/key_pool.secret, outside runtime/ so a copy or
+    backup of runtime/ alone does not hold both the keys and their passphrase.
+    """
+    if os.environ.get("CLUSTERBLADE_KEY_POOL_SECRET_FILE"):
+        return Path(os.environ["CLUSTERBLADE_KEY_POOL_SECRET_FILE"]).expanduser()
+    return Path.home() / ".config" / "clusterblade" / "key_pool.secret"
+
+
+def _pool_secret():
+    """Passphrase the pooled keys are encrypted with (random, created once, 0600)."""
+    if os.environ.get("CLUSTERBLADE_KEY_POOL_SECRET"):
+        return os.environ["CLUSTERBLADE_KEY_POOL_SECRET"].encode()
+    path = get_secret_path()
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_bytes()
+    with os.fdopen(fd, "wb") as f:
+        f.write(os.urandom(32).hex().encode())
+    return path.read_bytes()
+
+
+def _lower_priority():
+    # key generation only uses cores the UI leaves idle
+    if hasattr(os, "nice"):
+        os.nice(19)
+
+
+def _generate_into(directory, secret, key_size):
+    """Worker: generate one RSA key and publish it atomically into the pool directory."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.BestAvailableEncryption(secret)
+    )
+    directory = Path(directory)
+    tmp = directory / f".tmp-{uuid.uuid4().hex}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    final = directory / f"rsa{key_size}-{uuid.uuid4().hex}.pem"
+    os.replace(tmp, final)
+    return str(final)
+
+
+class KeyPool:
+    """
+    Pre-generated RSA private keys, encrypted in
+    runtime/certificates/key_pool/, so signing a node or HTTP cert does not
+    wait for key generation. take() claims a ready key (atomic rename, safe
+    across processes) or generates one inline when the pool is empty, then
+    refill() tops the pool up in low-priority background processes.
+    """
+
+    def __init__(self, directory=None, size=POOL_SIZE, workers=POOL_WORKERS):
+        self.directory = Path(directory) if directory else get_key_pool_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / ".secret").unlink(missing_ok=True)  # older releases kept the passphrase next to the keys
+        self.size = size
+        self.workers = max(1, workers)
+        self._secret = _pool_secret()
+        self._executor = None
+        self._inflight = {}  # key size → keys being generated
+        self._stats = {"hits": 0, "misses": 0, "generated": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def _ready(self, key_size):
+        return sorted(self.directory.glob(f"rsa{key_size}-*.pem"))
+
+    def ready(self, key_size=KEY_SIZE):
+        return len(self._ready(key_size))
+
+    def take(self, key_size=KEY_SIZE):
+        """An RSA private key of key_size bits: from the pool when one is ready, else generated now."""
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = None
+        for path in self._ready(key_size):
+            claimed = path.with_name(f".claimed-{uuid.uuid4().hex}")
+            try:
+                os.rename(path, claimed)  # another process may have taken it first
+            except FileNotFoundError:
+                continue
+            try:
+                # the pool generated this key itself: skip the RSA consistency check (~60 ms, most of a fresh key's cost)
+                key = serialization.load_pem_private_key(
+                    claimed.read_bytes(), password=self._secret, unsafe_skip_rsa_key_validation=True
+                )
+            except (OSError, ValueError, TypeError):
+                key = None  # unreadable or from another secret: drop it
+            finally:
+                claimed.unlink(missing_ok=True)
+            if key is not None:
+                break
+
+        with self._lock:
+            self._stats["hits" if key is not None else "misses"] += 1
+        if key is None:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+        self.refill(key_size)
+        return key
+
+    def _get_executor(self):
+        if self._executor is None:
+            try:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_lower_priority,
+                )
+            except (OSError, NotImplementedError, ValueError):
+                # no subprocesses here: fall back to background threads
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="clusterblade-keys")
+            atexit.register(self.shutdown)
+        return self._executor
+
+    def refill(self, key_size=KEY_SIZE):
+        """Queue background generation until size keys are ready (or being made). Returns how many were queued."""
+        if self.size <= 0:
+            return 0
+        with self._lock:
+            missing = self.size - self.ready(key_size) - self._inflight.get(key_size, 0)
+            if missing <= 0:
+                return 0
+            self._inflight[key_size] = self._inflight.get(key_size, 0) + missing
+            executor = self._get_executor()
+        for queued in range(missing):
+            try:
+                future = executor.submit(_generate_into, str(self.directory), self._secret, key_size)
+            except RuntimeError:  # broken or shut down pool: start a fresh one next time
+                with self._lock:
+                    self._inflight[key_size] -= missing - queued
+                    self._stats["errors"] += 1
+                    self._executor = None
+                return queued
+            future.add_done_callback(lambda f, bits=key_size: self._generated(bits, f))
+        return missing
+
+    def _generated(self, key_size, future):
+        with self._lock:
+            self._inflight[key_size] -= 1
+            failed = future.cancelled() or future.exception() is not None
+            self._stats["errors" if failed else "generated"] += 1
+
+    def stats(self, key_size=KEY_SIZE):
+        """{"ready", "generating", "hits", "misses", "generated", "errors"}."""
+        with self._lock:
+            stats = dict(self._stats, generating=self._inflight.get(key_size, 0))
+        stats["ready"] = self.ready(key_size)
+        return stats
+
+    def wait(self, key_size=KEY_SIZE, timeout=60.0):
+        """Block until nothing is being generated (benchmarks, tests). True if the pool settled in time."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._inflight.get(key_size):
+                    return True
+            time.sleep(0.05)
+        return False
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_key_pool():
+    """Process-wide KeyPool under runtime/certificates/key_pool."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = KeyPool()
+        return _default
+
+
+def take_rsa_key(key_size=KEY_SIZE):
+    """A ready RSA key for cert signing (see KeyPool.take)."""
+    return get_key_pool().take(key_size)
@@ -0,0 +1,520 @@
+import argparse
+import getpass
+import json
+import os
+import sys
+from pathlib import Path
+
+# Heavy libraries (gradio, paramiko, cryptography, jinja2) are imported inside
+# the subcommands that need them, so e.g. `clusterblade status` starts fast.
+
+DEFAULT_CERT_DIR = Path("runtime") / "certificates"
+
+
+def _secret(value, env_var, prompt):
+    """CLI flag, then environment variable, then an interactive prompt."""
+    if value:
+        return value
+    if os.environ.get(env_var):
+        return os.environ[env_var]
+    if sys.stdin.isatty():
+        return getpass.getpass(prompt)
+    return ""
+
+
+def _ssh_creds(args):
+    """(user, password); no prompt when a ClusterBlade key exists (see `clusterblade ssh-keys`)."""
+    from clusterblade.ssh.keys import get_key_path
+
+    if not args.ssh_pass and not os.environ.get("CLUSTERBLADE_SSH_PASS") and get_key_path().exists():
+        return args.ssh_user, ""
+    return args.ssh_user, _secret(args.ssh_pass, "CLUSTERBLADE_SSH_PASS", f"SSH password for {args.ssh_user}: ")
+
+
+def _load(args):
+    """Nodes from -f instances.yaml, or from the inventory with --cluster."""
+    if getattr(args, "cluster", None):
+        from clusterblade.core.inventory import get_inventory
+
+        cluster = get_inventory().load_cluster(args.cluster)
+        if cluster is None:
+            raise SystemExit(f"❌ Unknown cluster '{args.cluster}' (see: clusterblade clusters)")
+        return cluster["instances"]
+
+    from clusterblade.core.instances import load_instances
+    from clusterblade.core.ports import assign_ports
+
+    return assign_ports(load_instances(args.instances), _saved_ports(getattr(args, "cluster_name", None)))
+
+
+def _saved_ports(name):
+    """{node: (ip, http, transport)} of an inventory cluster called `name`, so -f keeps its allocated ports."""
+    from clusterblade.core.inventory import get_inventory, get_inventory_path
+
+    if not name or not get_inventory_path().exists():
+        return None
+    cluster = get_inventory().load_cluster(name) or {}
+    return {n["name"]: (n["ip"], n.get("http_port"), n.get("transport_port")) for n in cluster.get("instances", [])}
+
+
+def _source_file(args):
+    """The instances.yaml behind -f / --cluster."""
+    if getattr(args, "cluster", None):
+        from clusterblade.core.inventory import get_inventory
+
+        cluster = get_inventory().load_cluster(args.cluster) or {}
+        if not cluster.get("file"):
+            raise SystemExit(f"❌ No stored instances.yaml for cluster '{args.cluster}'")
+        return Path(cluster["file"])
+    return Path(args.instances)
+
+
+def _cluster_state(args, instances):
+    """Build the same settings dict the Deploy tab stores in the cluster state."""
+    return {
+        "file": str(_source_file(args)),
+        "instances": instances,
+        "cluster_name": args.cluster_name,
+        "enable_security": args.security,
+        "enable_ssl": args.ssl,
+        "enable_http": args.http,
+        "http_groups": args.http_groups,
+        "enable_logging": args.logging,
+        "memory_lock": args.memory_lock,
+        "enable_tuning": not args.no_tuning,
+        "preflight": getattr(args, "preflight", "off"),
+    }
+
+
+# ---------- Subcommands ----------
+
+def cmd_ui(args):
+    from clusterblade.gradio_ui.app import main as ui_main
+
+    ui_main(
+        port=args.port,
+        profile_startup=getattr(args, "profile_startup", False),
+        concurrency=getattr(args, "concurrency", 8),
+    )
+    return 0
+
+
+def cmd_render(args):
+    state = _cluster_state(args, _load(args))  # validate before importing jinja2
+    from clusterblade.core.models import topology_of
+    from clusterblade.elastic.config_gen import render_es_config
+
+    topology = topology_of(state)
+    rack_awareness = len({n.get("rack", "r1") for n in topology}) > 1
+    for node in topology:
+        render_es_config(
+            state["cluster_name"],
+            node,
+            topology.masters,
+            enable_security=state["enable_security"],
+            enable_ssl=state["enable_ssl"],
+            enable_http=state["enable_http"],
+            http_groups=state["http_groups"],
+            enable_logging=state["enable_logging"],
+            memory_lock=state["memory_lock"],
+            enable_tuning=state["enable_tuning"],  # role-based only: render has no SSH facts
+            rack_awareness=rack_awareness,
+        )
+    return 0
+
+
+def _print_timings(args, flow):
+    if args.timings:
+        from clusterblade.core.tracing import format_waterfall, last_trace
+
+        print(format_waterfall(last_trace(flow)))
+
+
+def cmd_deploy(args):
+    state = _cluster_state(args, _load(args))
+    ssh_user, ssh_pass = _ssh_creds(args)
+    if args.rollout:
+        from clusterblade.elastic.rollout import rollout_cluster
+
+        es_pass = _secret(args.es_pass, "CLUSTERBLADE_ES_PASS", f"ES password for {args.es_user}: ") if args.security else ""
+        result = rollout_cluster(
+            state, ssh_user, ssh_pass, args.es_user, es_pass, canary=args.canary, wave_size=args.wave_size,
+            rejoin_timeout=args.rejoin_timeout, progress_callback=print,
+        )
+        print(result)
+        _print_timings(args, "rollout")
+        return 1 if "❌" in result else 0
+
+    from clusterblade.elastic.deploy import deploy_cluster
+
+    result = deploy_cluster(state, ssh_user, ssh_pass, progress_callback=print)
+    print(result)
+    _print_timings(args, "deploy")
+    return 1 if "❌" in result else 0
+
+
+def cmd_preflight(args):
+    instances = _load(args)
+    from clusterblade.elastic.preflight import format_report, run_preflight
+
+    ssh_user, ssh_pass = _ssh_creds(args)
+    reports = run_preflight(instances, ssh_user, ssh_pass, args.memory_lock, fix=args.fix)
+    if args.json:
+        for report in reports:
+            for r in report["results"]:
+                r.pop("fix", None)
+        print(json.dumps(reports, indent=2))
+    else:
+        print(format_report(reports))
+    return 0 if all(r["ok"] for r in reports) else 1
+
+
+def cmd_certs(args):
+    from clusterblade.certificates.generator import generate_all_from_yaml
+
+    password = args.password.encode() if args.password else None
+    generate_all_from_yaml(_source_file(args), Path(args.cert_dir), password, args.validity)
+    _print_timings(args, "certificates")
+    return 0
+
+
+def cmd_push_ssl(args):
+    from clusterblade.certificates.deploy_ssl import deploy_ssl_to_nodes
+
+    ssh_user, ssh_pass = _ssh_creds(args)
+    result = deploy_ssl_to_nodes({"instances": _load(args)}, ssh_user, ssh_pass, args.cert_password)
+    print(result)
+    _print_timings(args, "deploy_ssl")
+    return 1 if "❌" in result else 0
+
+
+def cmd_status(args):
+    from clusterblade.elastic.status import poll_clusters
+
+    if args.all_clusters:
+        from clusterblade.core.inventory import get_inventory
+
+        inventory = get_inventory()
+        clusters = {name: inventory.load_cluster(name)["instances"] for name in inventory.list_clusters()}
+    else:
+        clusters = {args.cluster or str(args.instances): _load(args)}
+    es_pass = _secret(args.es_pass, "CLUSTERBLADE_ES_PASS", f"ES password for {args.es_user}: ")
+
+    results = poll_clusters(clusters, args.es_user, es_pass, args.https)
+    rows = [{"cluster": c, **row} for c, cluster_rows in results.items() for row in cluster_rows]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'CLUSTER':<16} {'NODE':<24} {'IP':<16} {'VM':<5} {'ES':<5} JOINED")
+        for r in rows:
+            print(
+                f"{r['cluster']:<16} {r['name']:<24} {r['ip']:<16} "
+                f"{'up' if r['vm_up'] else 'down':<5} {'up' if r['es_up'] else 'down':<5} "
+                f"{'yes' if r['in_cluster'] else '-'}"
+            )
+    return 0 if all(r["es_up"] and r["in_cluster"] for r in rows) else 1
+
+
+def cmd_cert_expiry(args):
+    from clusterblade.certificates.expiry import LAYERS, format_report, queue_reissues, scan_certificates
+
+    nodes = _load(args)
+    cert_password = args.cert_password or os.environ.get("CLUSTERBLADE_CERT_PASS")
+    layers = LAYERS if args.http else ("transport",)
+    rows = scan_certificates(nodes, layers, Path(args.cert_dir), cert_password, args.warn_days)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(format_report(rows, Path(args.cert_dir)))
+    flagged = [r for r in rows if r["status"] in ("expired", "expiring", "mismatch")]
+    if not (args.reissue and flagged):
+        return 1 if flagged else 0
+
+    from clusterblade.core.jobs import format_job, get_job_manager
+
+    ssh_user, ssh_pass = _ssh_creds(args)
+    manager = get_job_manager()
+    job_ids = queue_reissues(manager, args.cluster, nodes, rows, ssh_user, ssh_pass, cert_password,
+                             args.validity, args.warn_days, Path(args.cert_dir))
+    code = 0
+    for job_id in job_ids:  # jobs run in this process: follow them to the end
+        for job, text in manager.attach(job_id):
+            pass
+        print(text)
+        print(format_job(job))
+        code = code or int(job["status"] != "done")
+    return code
+
+
+def cmd_reach(args):
+    from clusterblade.elastic.reachability import scan_nodes
+
+    nodes = _load(args)
+    results = scan_nodes(nodes, read_banner=args.banner, concurrency=args.concurrency)
+    rows = [{"name": n.get("name", ""), **results.get(n.get("ip", ""), {"ip": n.get("ip", ""), "reachable": False})}
+            for n in nodes]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'NODE':<24} {'IP':<16} {'SSH':<5} {'RTT ms':>8}  DETAIL")
+        for r in rows:
+            rtt = f"{r['rtt'] * 1000:.1f}" if r.get("rtt") is not None else "-"
+            print(f"{r['name']:<24} {r['ip']:<16} {'up' if r['reachable'] else 'down':<5} {rtt:>8}  "
+                  f"{r.get('banner') or r.get('error') or ''}")
+    return 0 if all(r["reachable"] for r in rows) else 1
+
+
+def cmd_ssh_keys(args):
+    from clusterblade.ssh.keys import bootstrap_keys, ensure_keypair
+
+    path, public_line = ensure_keypair()
+    print(f"🔑 {path}\n{public_line}")
+    if not (args.instances or args.cluster):
+        return 0
+    ssh_user = args.ssh_user
+    ssh_pass = _secret(args.ssh_pass, "CLUSTERBLADE_SSH_PASS", f"SSH password for {ssh_user}: ")
+    results = bootstrap_keys(_load(args), ssh_user, ssh_pass, max_workers=args.concurrency, progress_callback=print)
+    failed = sum(1 for ok, _ in results.values() if not ok)
+    print(f"🎯 Key installed on {len(results) - failed}/{len(results)} hosts.")
+    return 1 if failed else 0
+
+
+def cmd_clusters(args):
+    from clusterblade.core.inventory import get_inventory
+
+    inventory = get_inventory()
+    for name in inventory.list_clusters():
+        cluster = inventory.load_cluster(name)
+        print(f"{name:<24} {len(cluster['instances']):>5} nodes  {cluster['file'] or ''}")
+    return 0
+
+
+def cmd_import(args):
+    from clusterblade.core.inventory import get_inventory
+    from clusterblade.core.instances import load_instances
+
+    instances = load_instances(args.instances)
+    get_inventory().save_cluster(args.name, instances, source_file=args.instances)
+    print(f"💾 Saved {len(instances)} nodes as cluster '{args.name}'")
+    return 0
+
+
+def cmd_restart(args):
+    from clusterblade.elastic.actions import run_bulk_action, select_nodes
+
+    nodes = select_nodes(_load(args), args.nodes, args.roles)
+    ssh_user, ssh_pass = _ssh_creds(args)
+    summary = run_bulk_action(
+        nodes, ssh_user, ssh_pass, "Restart Node",
+        max_workers=args.concurrency, progress_callback=print,
+    )
+    print(f"🎯 Restart finished: {summary['succeeded']} ok, {summary['failed']} failed.")
+    return summary["exit_code"]
+
+
+def cmd_jobs(args):
+    from clusterblade.core.jobs import format_job, get_job_manager
+
+    manager = get_job_manager()
+    job_id = args.resume or args.logs
+    if not job_id:
+        for job in manager.list_jobs(limit=args.limit):
+            print(format_job(job))
+        return 0
+
+    if args.resume:
+        job = manager.get(job_id)
+        if job is None:
+            raise SystemExit(f"❌ Unknown job {job_id}")
+        secrets = {}
+        if job["kind"] in ("deploy", "ssl", "https", "reissue", "rollout"):
+            secrets["ssh_pass"] = _secret(args.ssh_pass, "CLUSTERBLADE_SSH_PASS", "SSH password: ")
+        if job["kind"] == "rollout" and job["params"]["cluster_state"].get("enable_security"):
+            secrets["es_pass"] = _secret(args.es_pass, "CLUSTERBLADE_ES_PASS", "ES password: ")
+        if job["kind"] in ("ssl", "reissue"):
+            secrets["cert_password"] = args.cert_password or os.environ.get("CLUSTERBLADE_CERT_PASS", "")
+        try:
+            manager.resume(job_id, secrets)
+        except (KeyError, RuntimeError) as e:
+            raise SystemExit(f"❌ {e}")
+
+    # Jobs run in this process, so a resumed job is followed until it ends
+    job, printed = None, 0
+    for job, text in manager.attach(job_id):
+        lines = text.splitlines()
+        for line in lines[printed:]:
+            print(line)
+        printed = len(lines)
+    if job is None:
+        raise SystemExit(f"❌ Unknown job {job_id}")
+    print(format_job(job))
+    return 0 if job["status"] == "done" else 1
+
+
+# ---------- Parser ----------
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="clusterblade", description="ClusterBlade – deploy and monitor Elasticsearch clusters")
+    parser.add_argument("--port", type=int, default=7860, help="Port for the dashboard when no subcommand is given")
+    sub = parser.add_subparsers(dest="command")
+
+    def with_instances(p, required=True):
+        group = p.add_mutually_exclusive_group(required=required)
+        group.add_argument("-f", "--instances", help="Path to instances.yaml")
+        group.add_argument("-c", "--cluster", help="Cluster name from the inventory")
+
+    def with_ssh(p):
+        p.add_argument("--ssh-user", default="root")
+        p.add_argument("--ssh-pass", help="SSH password (or CLUSTERBLADE_SSH_PASS)")
+
+    def with_cluster_settings(p):
+        p.add_argument("--cluster-name", default="es-cluster")
+        p.add_argument("--security", action="store_true", help="Enable X-Pack security")
+        p.add_argument("--ssl", action="store_true", help="Enable transport SSL")
+        p.add_argument("--http", action="store_true", help="Enable HTTPS on --http-groups")
+        p.add_argument("--http-groups", nargs="*", default=[], help="Node groups that get HTTPS")
+        p.add_argument("--logging", action="store_true", help="Enable debug logging")
+        p.add_argument("--memory-lock", action="store_true")
+        p.add_argument("--no-tuning", action="store_true", help="Skip node.roles and the performance profile")
+
+    def with_timings(p):
+        p.add_argument("--timings", action="store_true", help="Print a per-node timing waterfall afterwards")
+
+    p = sub.add_parser("ui", help="Launch the Gradio dashboard")
+    p.add_argument("--port", type=int, default=7860)
+    p.add_argument("--profile-startup", action="store_true", help="Report import and UI build times")
+    p.add_argument("--concurrency", type=int, default=8, help="Events processed concurrently")
+    p.set_defaults(func=cmd_ui)
+
+    p = sub.add_parser("render", help="Render elasticsearch.yml for every node")
+    with_instances(p)
+    with_cluster_settings(p)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("deploy", help="Render, upload and restart every node")
+    with_instances(p)
+    with_cluster_settings(p)
+    with_ssh(p)
+    p.add_argument(
+        "--preflight", choices=["off", "check", "fix"], default="check",
+        help="OS prerequisite checks before deploying (nodes that fail are skipped)",
+    )
+    p.add_argument(
+        "--rollout", action="store_true",
+        help="Staged rollout: canary, then parallel waves; verify each node rejoins, roll back and halt if not",
+    )
+    p.add_argument("--canary", type=int, default=1, help="Nodes in the canary wave (--rollout)")
+    p.add_argument("--wave-size", type=int, default=8, help="Nodes restarted at once after the canary (--rollout)")
+    p.add_argument("--rejoin-timeout", type=int, default=300, help="Seconds for a node to rejoin (--rollout)")
+    p.add_argument("--es-user", default="elastic", help="ES user for the rejoin check (--rollout)")
+    p.add_argument("--es-pass", help="ES password for the rejoin check (or CLUSTERBLADE_ES_PASS)")
+    with_timings(p)
+    p.set_defaults(func=cmd_deploy)
+
+    p = sub.add_parser("preflight", help="Check (and --fix) OS prerequisites on every node")
+    with_instances(p)
+    with_ssh(p)
+    p.add_argument("--fix", action="store_true", help="Apply sysctl / limits / swap / THP fixes")
+    p.add_argument("--memory-lock", action="store_true", help="Also require an unlimited memlock limit")
+    p.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    p.set_defaults(func=cmd_preflight)
+
+    p = sub.add_parser("certs", help="Regenerate the CA and all node certificates")
+    with_instances(p)
+    p.add_argument("--cert-dir", default=str(DEFAULT_CERT_DIR))
+    p.add_argument("--password", help="Encrypt node keys with this password")
+    p.add_argument("--validity", type=int, default=3650, help="Validity in days")
+    with_timings(p)
+    p.set_defaults(func=cmd_certs)
+
+    p = sub.add_parser("push-ssl", help="Upload certificates and rebuild keystores")
+    with_instances(p)
+    with_ssh(p)
+    p.add_argument("--cert-password", help="Key passphrase to store in the keystore")
+    with_timings(p)
+    p.set_defaults(func=cmd_push_ssl)
+
+    p = sub.add_parser("status", help="Probe VM, ES and cluster membership for every node")
+    with_instances(p, required=False)
+    p.add_argument("--all-clusters", action="store_true", help="Probe every cluster in the inventory")
+    p.add_argument("--es-user", default="elastic")
+    p.add_argument("--es-pass", help="ES password (or CLUSTERBLADE_ES_PASS)")
+    p.add_argument("--https", action="store_true")
+    p.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("cert-expiry", help="Check the certificates nodes serve (TLS, no SSH) and --reissue flagged ones")
+    with_instances(p)
+    p.add_argument("--http", action="store_true", help="Also check the HTTP layer certificate")
+    p.add_argument("--warn-days", type=int, default=30, help="Flag certificates expiring sooner")
+    p.add_argument("--cert-dir", default=str(DEFAULT_CERT_DIR))
+    p.add_argument("--cert-password", help="Node key passphrase (or CLUSTERBLADE_CERT_PASS)")
+    p.add_argument("--json", action="store_true", help="Print JSON instead of a report")
+    p.add_argument("--reissue", action="store_true", help="Reissue and push certs for flagged nodes only")
+    p.add_argument("--validity", type=int, default=3650, help="Validity of reissued certs in days")
+    with_ssh(p)
+    p.set_defaults(func=cmd_cert_expiry)
+
+    p = sub.add_parser("reach", help="Check SSH reachability of every node at once (async TCP connects)")
+    with_instances(p)
+    p.add_argument("--banner", action="store_true", help="Also require an SSH banner from each host")
+    p.add_argument("--concurrency", type=int, default=512, help="Connects in flight at once")
+    p.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    p.set_defaults(func=cmd_reach)
+
+    p = sub.add_parser("restart", help="Restart Elasticsearch on selected nodes in parallel")
+    with_instances(p)
+    with_ssh(p)
+    p.add_argument("--nodes", nargs="*", default=[], help="Node names (default: all)")
+    p.add_argument("--roles", nargs="*", default=[], help="Roles (from the YAML roles: key, else the node name)")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.set_defaults(func=cmd_restart)
+
+    p = sub.add_parser("jobs", help="List background jobs, show a job's log or resume it")
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--logs", metavar="JOB_ID", help="Print the log of a job")
+    group.add_argument("--resume", metavar="JOB_ID", help="Resume a failed or interrupted job (pending nodes only)")
+    p.add_argument("--ssh-pass", help="SSH password for --resume (or CLUSTERBLADE_SSH_PASS)")
+    p.add_argument("--cert-password", help="Key passphrase for resumed SSL jobs (or CLUSTERBLADE_CERT_PASS)")
+    p.add_argument("--es-pass", help="ES password for resumed rollout jobs (or CLUSTERBLADE_ES_PASS)")
+    p.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=cmd_jobs)
+
+    p = sub.add_parser("ssh-keys", help="Create ClusterBlade's SSH key and install it on every node")
+    with_instances(p, required=False)
+    with_ssh(p)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.set_defaults(func=cmd_ssh_keys)
+
+    p = sub.add_parser("clusters", help="List clusters in the inventory")
+    p.set_defaults(func=cmd_clusters)
+
+    p = sub.add_parser("import", help="Save an instances.yaml to the inventory")
+    p.add_argument("name", help="Cluster name (inventory key)")
+    p.add_argument("-f", "--instances", required=True, help="Path to instances.yaml")
+    p.set_defaults(func=cmd_import)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "status" and not (args.instances or args.cluster or args.all_clusters):
+        parser.error("status needs -f, --cluster or --all-clusters")
+    if not args.command:
+        return cmd_ui(args)
+    from clusterblade.core.instances import InstancesError
+
+    try:
+        return args.func(args)
+    except InstancesError as e:
+        # bad inventories fail here, before any SSH work
+        print(f"❌ {e.path} is invalid:", file=sys.stderr)
+        for problem in e.problems:
+            print(f"   - {problem}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
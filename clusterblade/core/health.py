@@ -0,0 +1,132 @@
+import socket
+import threading
+import time
+
+FAILURE_THRESHOLD = 2   # consecutive connect failures before a host's circuit opens
+BASE_COOLDOWN = 5.0     # seconds before the first half-open retry
+MAX_COOLDOWN = 120.0    # cap for the exponential backoff
+TRIAL_TIMEOUT = 60.0    # a half-open trial that never reported back is abandoned after this
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of connecting to a host whose circuit is open."""
+
+    def __init__(self, host, retry_in):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"{host} is unreachable (circuit open after repeated failures; retry in {retry_in:.0f}s)")
+
+
+def is_host_failure(exc):
+    """True for errors that mean the host is down or unreachable (not e.g. a wrong password)."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (socket.timeout, TimeoutError, OSError, EOFError)):
+        return True
+    # paramiko: NoValidConnectionsError is an OSError; a missing banner or a reset
+    # handshake is an SSHException, while AuthenticationException means the host is up
+    name = type(exc).__name__
+    return name == "SSHException" and "banner" in str(exc).lower()
+
+
+class HealthRegistry:
+    """
+    Per-host circuit breaker shared by probes, deploys, SSL pushes and actions.
+
+    closed → open after FAILURE_THRESHOLD consecutive failures; while open,
+    allow() is False and callers fail fast. Once the cooldown is over one
+    caller gets a half-open trial: success closes the circuit, failure opens
+    it again with the cooldown doubled (up to MAX_COOLDOWN).
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, base_cooldown=BASE_COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        self.threshold = threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._hosts = {}  # host → {"state", "failures", "opens", "retry_at", "trial_at", "error"}
+        self._lock = threading.Lock()
+
+    def _entry(self, host):
+        return self._hosts.setdefault(
+            host, {"state": CLOSED, "failures": 0, "opens": 0, "retry_at": 0.0, "trial_at": 0.0, "error": None}
+        )
+
+    def allow(self, host):
+        """May the caller contact `host` now? Hands out at most one half-open trial at a time."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None or entry["state"] == CLOSED:
+                return True
+            if entry["state"] == OPEN and now >= entry["retry_at"]:
+                entry["state"], entry["trial_at"] = HALF_OPEN, now
+                return True
+            if entry["state"] == HALF_OPEN and now - entry["trial_at"] > TRIAL_TIMEOUT:
+                entry["trial_at"] = now
+                return True
+            return False
+
+    def retry_in(self, host):
+        with self._lock:
+            entry = self._hosts.get(host)
+            return max(0.0, entry["retry_at"] - time.monotonic()) if entry else 0.0
+
+    def check(self, host):
+        """allow() or raise CircuitOpenError."""
+        if not self.allow(host):
+            raise CircuitOpenError(host, self.retry_in(host))
+
+    def record_success(self, host):
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is not None:
+                entry.update(state=CLOSED, failures=0, opens=0, error=None)
+
+    def record_failure(self, host, error=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(host)
+            entry["failures"] += 1
+            entry["error"] = str(error) if error else entry["error"]
+            if entry["state"] == HALF_OPEN or entry["failures"] >= self.threshold:
+                cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** entry["opens"])
+                entry.update(state=OPEN, retry_at=now + cooldown)
+                entry["opens"] += 1
+
+    def record(self, host, exc=None):
+        """Record the outcome of a contact attempt; non-host errors count as success."""
+        if exc is None or not is_host_failure(exc):
+            self.record_success(host)
+        else:
+            self.record_failure(host, exc)
+
+    def state(self, host):
+        with self._lock:
+            entry = self._hosts.get(host)
+            return entry["state"] if entry else CLOSED
+
+    def snapshot(self):
+        """{host: {"state", "failures", "retry_in", "error"}} for hosts with a recorded failure."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    "state": e["state"], "failures": e["failures"],
+                    "retry_in": max(0.0, e["retry_at"] - now) if e["state"] != CLOSED else 0.0, "error": e["error"],
+                }
+                for host, e in self._hosts.items()
+            }
+
+    def reset(self, host=None):
+        """Close one host's circuit (or all of them), e.g. after fixing a VM."""
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host, None)
+
+
+# Process-wide registry, keyed by node IP
+HEALTH = HealthRegistry()
@@ -0,0 +1,163 @@
+import hashlib
+import ipaddress
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import yaml
+from clusterblade.core.models import Topology
+from clusterblade.core.ports import PortCollisionError, assign_ports
+
+# libyaml's C loader is ~10x faster on large inventories; fall back to pure Python
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+CACHE_SIZE = 16  # parsed files kept, keyed by content hash
+
+
+class InstancesError(ValueError):
+    """instances.yaml is unreadable or fails validation; `problems` lists every error."""
+
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = list(problems)
+        super().__init__(f"{path}: " + "; ".join(self.problems))
+
+
+@dataclass(frozen=True)
+class ParsedInstances:
+    """One validated instances.yaml: raw node entries, parsed topology and warnings."""
+
+    path: str
+    digest: str
+    cluster_name: str | None
+    instances: tuple
+    topology: Topology
+    warnings: tuple = ()
+
+    def node_dicts(self):
+        """Fresh copies of the node entries (callers may mutate them)."""
+        return [dict(n) for n in self.instances]
+
+
+def validate_instances(instances, require_dns=False):
+    """
+    Check node entries up front. Returns (errors, warnings).
+    Errors: missing name/IP, invalid IP, duplicate names, several nodes on
+    one IP (deploy has one elasticsearch service per host), explicit
+    http_port / transport_port clashes. Missing DNS is a warning (an error
+    with require_dns: node certificates need a DNS SAN).
+    """
+    errors, warnings = [], []
+    names = {}
+    by_ip = {}
+
+    for pos, node in enumerate(instances, start=1):
+        if not isinstance(node, dict):
+            errors.append(f"entry {pos}: expected a mapping, got {type(node).__name__}")
+            continue
+        name = str(node.get("name") or "").strip()
+        ip = str(node.get("ip") or "").strip()
+        label = name or f"entry {pos}"
+
+        if not name:
+            errors.append(f"entry {pos}: missing name")
+        elif name in names:
+            errors.append(f"{name}: duplicate name (entries {names[name]} and {pos})")
+        else:
+            names[name] = pos
+
+        if not ip:
+            errors.append(f"{label}: missing ip")
+        else:
+            try:
+                ipaddress.IPv4Address(ip)
+            except ValueError:
+                errors.append(f"{label}: invalid IPv4 address '{ip}'")
+            else:
+                by_ip.setdefault(ip, []).append(label)
+
+        if not node.get("dns"):
+            (errors if require_dns else warnings).append(f"{label}: missing dns")
+
+    # deploy writes the host's single elasticsearch.yml and restarts its single
+    # `elasticsearch` unit, so a second node on the same IP would overwrite the first
+    for ip, labels in by_ip.items():
+        for label in labels[1:]:
+            errors.append(f"{label}: same IP as {labels[0]} ({ip}) — one elasticsearch service per host")
+
+    if not errors:
+        try:
+            assign_ports(instances)
+        except PortCollisionError as e:
+            errors.append(str(e))
+    return errors, warnings
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_instances(path, require_dns=False):
+    """
+    Read, parse and validate an instances.yaml once.
+    Accepts either an `instances:` or a `nodes:` top-level key.
+    Results are cached by file content hash, so re-reading an unchanged
+    file (upload, certs, CLI) skips YAML parsing and validation.
+    Raises InstancesError listing every problem found.
+    """
+    path = Path(path)
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        raise InstancesError(path, [f"cannot read file: {e}"]) from e
+    digest = hashlib.sha256(raw).hexdigest()
+
+    with _cache_lock:
+        parsed = _cache.get(digest)
+        if parsed is not None:
+            _cache.move_to_end(digest)
+    if parsed is None:
+        parsed = _parse(path, raw, digest)
+        with _cache_lock:
+            _cache[digest] = parsed
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    if require_dns:
+        missing = [w for w in parsed.warnings if w.endswith(": missing dns")]
+        if missing:
+            raise InstancesError(path, missing)
+    return parsed
+
+
+def _parse(path, raw, digest):
+    try:
+        data = yaml.load(raw, Loader=SafeLoader) or {}
+    except yaml.YAMLError as e:
+        raise InstancesError(path, [f"invalid YAML: {e}"]) from e
+    if not isinstance(data, dict):
+        raise InstancesError(path, ["top level must be a mapping with an `instances:` list"])
+
+    instances = data.get("instances") or data.get("nodes")
+    if not instances:
+        raise InstancesError(path, ["no instances found"])
+    if not isinstance(instances, list):
+        raise InstancesError(path, ["`instances` must be a list"])
+
+    errors, warnings = validate_instances(instances)
+    if errors:
+        raise InstancesError(path, errors)
+
+    return ParsedInstances(
+        path=str(path),
+        digest=digest,
+        cluster_name=data.get("cluster_name"),
+        instances=tuple(instances),
+        topology=Topology.from_instances(instances),
+        warnings=tuple(warnings),
+    )
+
+
+def load_instances(path):
+    """Validated node list from an instances.yaml file (see parse_instances)."""
+    return parse_instances(path).node_dicts()
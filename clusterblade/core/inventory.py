@@ -0,0 +1,289 @@
+import json
+import re
+from contextlib import contextmanager
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from clusterblade.core.models import parse_roles
+from clusterblade.core.paths import get_runtime_dir
+from clusterblade.core.ports import assign_ports
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    name        TEXT PRIMARY KEY,
+    source_file TEXT,
+    settings    TEXT NOT NULL DEFAULT '{}',
+    updated     REAL NOT NULL,
+    last_used   REAL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    cluster          TEXT NOT NULL REFERENCES clusters(name) ON DELETE CASCADE,
+    name             TEXT NOT NULL,
+    position         INTEGER NOT NULL,
+    ip               TEXT NOT NULL,
+    dns              TEXT,
+    rack             TEXT,
+    http_port        INTEGER,
+    transport_port   INTEGER,
+    cert_fingerprint TEXT,
+    explicit_roles   INTEGER NOT NULL DEFAULT 0,
+    extra            TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (cluster, name)
+);
+CREATE TABLE IF NOT EXISTS node_roles (
+    cluster TEXT NOT NULL,
+    node    TEXT NOT NULL,
+    role    TEXT NOT NULL,
+    PRIMARY KEY (cluster, node, role),
+    FOREIGN KEY (cluster, node) REFERENCES nodes(cluster, name) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_ip ON nodes(ip);
+CREATE INDEX IF NOT EXISTS idx_nodes_rack ON nodes(cluster, rack);
+CREATE INDEX IF NOT EXISTS idx_roles_role ON node_roles(cluster, role);
+"""
+
+# Columns added after the first release of the schema (table, name, DDL)
+_MIGRATIONS = (
+    ("nodes", "http_port", "ALTER TABLE nodes ADD COLUMN http_port INTEGER"),
+    ("nodes", "transport_port", "ALTER TABLE nodes ADD COLUMN transport_port INTEGER"),
+    ("nodes", "explicit_roles", "ALTER TABLE nodes ADD COLUMN explicit_roles INTEGER NOT NULL DEFAULT 0"),
+    ("clusters", "last_used", "ALTER TABLE clusters ADD COLUMN last_used REAL"),
+)
+
+# Keys stored in their own columns; anything else in the YAML entry goes to `extra`
+_NODE_COLUMNS = ("name", "ip", "dns", "rack", "http_port", "transport_port", "cert_fingerprint", "roles")
+
+# Settings persisted per cluster (the Deploy tab options)
+SETTING_KEYS = (
+    "cluster_name", "enable_security", "enable_ssl", "enable_http",
+    "http_groups", "enable_logging", "memory_lock", "enable_tuning", "preflight",
+)
+
+
+def get_inventory_path() -> Path:
+    return get_runtime_dir() / "inventory.db"
+
+
+def get_clusters_dir() -> Path:
+    """Copies of uploaded instances.yaml files, one per cluster."""
+    path = get_runtime_dir() / "clusters"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def safe_cluster_key(name):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name.strip()) or "default"
+
+
+class Inventory:
+    """
+    Persistent, indexed store of clusters, nodes, roles, racks and cert
+    fingerprints (SQLite under runtime/). Each call opens its own
+    connection, so it is safe to use from Gradio worker threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else get_inventory_path()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(SCHEMA)
+            for table, column, ddl in _MIGRATIONS:
+                if column not in {r["name"] for r in db.execute(f"PRAGMA table_info({table})")}:
+                    db.execute(ddl)
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection; commits on success, rolls back on error."""
+        db = sqlite3.connect(self.path, timeout=10)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA foreign_keys = ON")
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ---------- Clusters ----------
+
+    def list_clusters(self):
+        """Cluster names, most recently updated first."""
+        with self._connect() as db:
+            return [r["name"] for r in db.execute("SELECT name FROM clusters ORDER BY updated DESC")]
+
+    def mark_used(self, name):
+        """Remember `name` as the cluster last picked in the UI."""
+        with self._connect() as db:
+            db.execute("UPDATE clusters SET last_used = ? WHERE name = ?", (time.time(), name))
+
+    def last_used(self):
+        """The cluster last picked in the UI (else the most recently updated one), or None."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT name FROM clusters ORDER BY COALESCE(last_used, updated) DESC LIMIT 1"
+            ).fetchone()
+        return row["name"] if row else None
+
+    def save_cluster(self, name, instances, source_file=None, settings=None):
+        """
+        Replace a cluster's node list (and optionally its settings).
+        Ports are (re)allocated with core.ports, keeping each node's stored
+        ports while they stay collision-free, so a re-upload never moves a node.
+        The source YAML is copied under runtime/clusters/ so it survives restarts.
+        Returns the stored YAML path (or None).
+        """
+        stored_file = None
+        if source_file and Path(source_file).exists():
+            stored_file = get_clusters_dir() / f"{safe_cluster_key(name)}.yaml"
+            if Path(source_file).resolve() != stored_file.resolve():
+                shutil.copyfile(source_file, stored_file)
+            stored_file = str(stored_file)
+
+        with self._connect() as db:
+            existing = db.execute("SELECT settings, source_file FROM clusters WHERE name = ?", (name,)).fetchone()
+            merged = json.loads(existing["settings"]) if existing else {}
+            merged.update({k: v for k, v in (settings or {}).items() if k in SETTING_KEYS})
+            stored_file = stored_file or (existing["source_file"] if existing else None)
+
+            db.execute(
+                "INSERT INTO clusters(name, source_file, settings, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET source_file = excluded.source_file, "
+                "settings = excluded.settings, updated = excluded.updated",
+                (name, stored_file, json.dumps(merged), time.time()),
+            )
+            # keep fingerprints and ports of nodes that are still present
+            previous = db.execute(
+                "SELECT name, ip, http_port, transport_port, cert_fingerprint FROM nodes WHERE cluster = ?", (name,)
+            ).fetchall()
+            fingerprints = {r["name"]: r["cert_fingerprint"] for r in previous}
+            instances = assign_ports(
+                instances, {r["name"]: (r["ip"], r["http_port"], r["transport_port"]) for r in previous}
+            )
+            db.execute("DELETE FROM nodes WHERE cluster = ?", (name,))
+            for pos, node in enumerate(instances):
+                extra = {k: v for k, v in node.items() if k not in _NODE_COLUMNS}
+                db.execute(
+                    "INSERT INTO nodes(cluster, name, position, ip, dns, rack, http_port, transport_port, "
+                    "cert_fingerprint, explicit_roles, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        name, node["name"], pos, node["ip"], node.get("dns"), node.get("rack"),
+                        node["http_port"], node["transport_port"],
+                        node.get("cert_fingerprint") or fingerprints.get(node["name"]),
+                        1 if node.get("roles") else 0,
+                        json.dumps(extra),
+                    ),
+                )
+                db.executemany(
+                    "INSERT OR IGNORE INTO node_roles(cluster, node, role) VALUES (?, ?, ?)",
+                    [(name, node["name"], role) for role in parse_roles(node.get("roles"), node["name"])],
+                )
+        return stored_file
+
+    def save_settings(self, name, **settings):
+        with self._connect() as db:
+            row = db.execute("SELECT settings FROM clusters WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return
+            merged = json.loads(row["settings"])
+            merged.update({k: v for k, v in settings.items() if k in SETTING_KEYS})
+            db.execute(
+                "UPDATE clusters SET settings = ?, updated = ? WHERE name = ?",
+                (json.dumps(merged), time.time(), name),
+            )
+
+    def delete_cluster(self, name):
+        with self._connect() as db:
+            db.execute("DELETE FROM clusters WHERE name = ?", (name,))
+
+    def load_cluster(self, name):
+        """Return {"file", "settings", "instances"} for a cluster, or None."""
+        with self._connect() as db:
+            cluster = db.execute("SELECT * FROM clusters WHERE name = ?", (name,)).fetchone()
+            if cluster is None:
+                return None
+            rows = db.execute(
+                "SELECT * FROM nodes WHERE cluster = ? ORDER BY position", (name,)
+            ).fetchall()
+            roles = {}
+            for r in db.execute("SELECT node, role FROM node_roles WHERE cluster = ? ORDER BY rowid", (name,)):
+                roles.setdefault(r["node"], []).append(r["role"])
+        return {
+            "file": cluster["source_file"],
+            "settings": json.loads(cluster["settings"]),
+            "instances": [self._row_to_node(r, roles.get(r["name"], [])) for r in rows],
+        }
+
+    def load_state(self, name):
+        """Field values for a ClusterState (StateStore loader), or None."""
+        cluster = self.load_cluster(name)
+        if cluster is None:
+            return None
+        return {"file": cluster["file"], "instances": cluster["instances"], **cluster["settings"]}
+
+    # ---------- Indexed lookups ----------
+
+    @staticmethod
+    def _row_to_node(row, roles):
+        node = {"name": row["name"], "ip": row["ip"]}
+        if row["dns"] is not None:
+            node["dns"] = row["dns"]
+        if row["rack"] is not None:
+            node["rack"] = row["rack"]
+        if row["http_port"]:
+            node["http_port"] = row["http_port"]
+            node["transport_port"] = row["transport_port"]
+        if row["cert_fingerprint"]:
+            node["cert_fingerprint"] = row["cert_fingerprint"]
+        if row["explicit_roles"]:
+            node["roles"] = roles  # name-inferred roles stay out, see tuning.es_node_roles
+        node.update(json.loads(row["extra"]))
+        return node
+
+    def _query_nodes(self, where, params):
+        with self._connect() as db:
+            rows = db.execute(f"SELECT n.* FROM nodes n {where} ORDER BY n.cluster, n.position", params).fetchall()
+            result = []
+            for r in rows:
+                roles = [x["role"] for x in db.execute(
+                    "SELECT role FROM node_roles WHERE cluster = ? AND node = ? ORDER BY rowid", (r["cluster"], r["name"])
+                )]
+                result.append({"cluster": r["cluster"], **self._row_to_node(r, roles)})
+            return result
+
+    def nodes_by_role(self, cluster, role):
+        return self._query_nodes(
+            "JOIN node_roles nr ON nr.cluster = n.cluster AND nr.node = n.name "
+            "WHERE n.cluster = ? AND nr.role = ?",
+            (cluster, role),
+        )
+
+    def nodes_by_rack(self, cluster, rack):
+        return self._query_nodes("WHERE n.cluster = ? AND n.rack = ?", (cluster, rack))
+
+    def find_by_ip(self, ip):
+        """Every node (in any cluster) with this IP."""
+        return self._query_nodes("WHERE n.ip = ?", (ip,))
+
+    def set_cert_fingerprint(self, cluster, node_name, fingerprint):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE nodes SET cert_fingerprint = ? WHERE cluster = ? AND name = ?",
+                (fingerprint, cluster, node_name),
+            )
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_inventory():
+    """Process-wide Inventory backed by runtime/inventory.db."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Inventory()
+        return _default
@@ -0,0 +1,411 @@
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+from clusterblade.core.paths import get_runtime_dir
+from clusterblade.core.tracing import format_waterfall, trace
+
+DEFAULT_WORKERS = 2      # jobs running at once
+ATTACH_POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 10.0  # how often a process marks its active jobs as still owned
+STALE_SECONDS = 60.0      # an owner silent this long is considered dead
+
+# Job kinds, resolved lazily so importing core.jobs stays cheap ("module:ATTRIBUTE")
+JOB_KINDS = {
+    "deploy": "clusterblade.elastic.deploy:DEPLOY_JOB",
+    "ssl": "clusterblade.certificates.deploy_ssl:SSL_JOB",
+    "https": "clusterblade.certificates.deploy_https:HTTPS_JOB",
+    "reissue": "clusterblade.certificates.expiry:REISSUE_JOB",
+    "rollout": "clusterblade.elastic.rollout:ROLLOUT_JOB",
+}
+
+# queued → running → done / failed / cancelled; running jobs of a dead process become interrupted
+ACTIVE = ("queued", "running")
+FINISHED = ("done", "failed", "cancelled", "interrupted")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id       TEXT PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    cluster  TEXT,
+    params   TEXT NOT NULL DEFAULT '{}',
+    status   TEXT NOT NULL,
+    error    TEXT,
+    created  REAL NOT NULL,
+    updated  REAL NOT NULL,
+    owner_pid  INTEGER,
+    owner_host TEXT,
+    heartbeat  REAL
+);
+CREATE TABLE IF NOT EXISTS job_steps (
+    job_id   TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    key      TEXT NOT NULL,
+    status   TEXT NOT NULL DEFAULT 'pending',
+    message  TEXT,
+    started  REAL,
+    finished REAL,
+    PRIMARY KEY (job_id, key)
+);
+CREATE TABLE IF NOT EXISTS job_logs (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    ts     REAL NOT NULL,
+    line   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated);
+CREATE INDEX IF NOT EXISTS idx_job_logs_job ON job_logs(job_id, id);
+"""
+
+# Columns added after the first release of the schema (name, DDL)
+_MIGRATIONS = (
+    ("owner_pid", "ALTER TABLE jobs ADD COLUMN owner_pid INTEGER"),
+    ("owner_host", "ALTER TABLE jobs ADD COLUMN owner_host TEXT"),
+    ("heartbeat", "ALTER TABLE jobs ADD COLUMN heartbeat REAL"),
+)
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """
+    A resumable operation, run one step (usually one node) at a time.
+
+    steps(params) → step keys in order
+    prepare(params, secrets, pending_keys) → (ctx, log lines), once per run
+    run_step(ctx, key) → log lines; raising marks the step failed
+        (lines in the exception's `logs` attribute are still recorded)
+    halt_on_failure: a failed step leaves the remaining steps pending
+    """
+
+    title: str
+    steps: Callable[[dict], list]
+    prepare: Callable[[dict, dict, list], tuple[Any, list]]
+    run_step: Callable[[Any, str], list]
+    halt_on_failure: bool = False
+
+
+def resolve_kind(kind):
+    module, _, attr = JOB_KINDS[kind].partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def get_jobs_path() -> Path:
+    return get_runtime_dir() / "jobs.db"
+
+
+def owner_alive(job, now=None):
+    """
+    Is the process that owns an active job still running it? Its heartbeat
+    must be fresh and, on this host, its PID must still exist.
+    """
+    if not job.get("owner_pid") or not job.get("heartbeat"):
+        return False
+    if (now or time.time()) - job["heartbeat"] > STALE_SECONDS:
+        return False
+    if job.get("owner_host") != socket.gethostname():
+        return True
+    try:
+        os.kill(job["owner_pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+class JobManager:
+    """
+    Background job queue with checkpointed steps (SQLite under runtime/).
+
+    submit() returns a job ID at once; a worker pool runs the job, recording
+    every step and log line, so any tab (or a later session) can attach to
+    its progress. Secrets (passwords) are kept in memory only: jobs left
+    running by a dead process are marked `interrupted` on startup and
+    resume() re-runs every step that is not done, given the secrets again.
+    Every job records its owner (pid, host, heartbeat), so a second process
+    (e.g. `clusterblade jobs` next to the dashboard) never takes over a job
+    that is still being run.
+    """
+
+    def __init__(self, path=None, workers=DEFAULT_WORKERS):
+        self.path = Path(path) if path else get_jobs_path()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clusterblade-job")
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._owner = (os.getpid(), socket.gethostname())
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(SCHEMA)
+            columns = {r["name"] for r in db.execute("PRAGMA table_info(jobs)")}
+            for column, ddl in _MIGRATIONS:
+                if column not in columns:
+                    db.execute(ddl)
+        self._interrupt_orphans()
+        threading.Thread(target=self._heartbeat_loop, name="clusterblade-job-heartbeat", daemon=True).start()
+
+    def _interrupt_orphans(self):
+        """Mark active jobs whose owner is dead or silent as interrupted."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT id, owner_pid, owner_host, heartbeat FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            orphans = [r["id"] for r in rows if not owner_alive(dict(r))]
+            for job_id in orphans:
+                db.execute(
+                    "UPDATE jobs SET status = 'interrupted', error = 'ClusterBlade stopped while the job was active', "
+                    "updated = ? WHERE id = ?",
+                    (time.time(), job_id),
+                )
+                db.execute("UPDATE job_steps SET status = 'pending' WHERE job_id = ? AND status = 'running'", (job_id,))
+        return orphans
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            try:
+                with self._connect() as db:
+                    db.execute(
+                        "UPDATE jobs SET heartbeat = ? WHERE owner_pid = ? AND owner_host = ? "
+                        "AND status IN ('queued', 'running')",
+                        (time.time(), *self._owner),
+                    )
+            except sqlite3.Error:
+                pass  # locked or gone; the next beat retries
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection; commits on success, rolls back on error."""
+        db = sqlite3.connect(self.path, timeout=10)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA foreign_keys = ON")
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ---------- Submitting ----------
+
+    def submit(self, kind, cluster, params, secrets=None):
+        """Queue a job and return its ID (params must be JSON-serialisable, secrets are never stored)."""
+        spec = resolve_kind(kind)
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs(id, kind, cluster, params, status, created, updated, owner_pid, owner_host, heartbeat) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, kind, cluster, json.dumps(params), now, now, *self._owner, now),
+            )
+            db.executemany(
+                "INSERT INTO job_steps(job_id, position, key) VALUES (?, ?, ?)",
+                [(job_id, pos, key) for pos, key in enumerate(spec.steps(params))],
+            )
+        self.log(job_id, f"🧾 {spec.title} queued as job {job_id}.")
+        self._pool.submit(self._run, job_id, dict(secrets or {}))
+        return job_id
+
+    def resume(self, job_id, secrets=None):
+        """Re-queue a finished job; only steps that are not done run again."""
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"unknown job {job_id}")
+        if job["status"] in ACTIVE:
+            if owner_alive(job):
+                raise RuntimeError(
+                    f"job {job_id} is already {job['status']} (pid {job['owner_pid']} on {job['owner_host']})"
+                )
+            self._interrupt_orphans()  # its owner died after we started
+        now = time.time()
+        with self._connect() as db:
+            # claim it only if nobody else re-queued it in the meantime
+            claimed = db.execute(
+                "UPDATE jobs SET status = 'queued', error = NULL, updated = ?, owner_pid = ?, owner_host = ?, "
+                "heartbeat = ? WHERE id = ? AND status NOT IN ('queued', 'running')",
+                (now, *self._owner, now, job_id),
+            ).rowcount
+        if not claimed:
+            raise RuntimeError(f"job {job_id} was resumed by another process")
+        with self._lock:
+            self._cancelled.discard(job_id)
+        done = sum(s["status"] == "done" for s in job["steps"])
+        self.log(job_id, f"🔁 Resuming job {job_id}: {done}/{len(job['steps'])} step(s) already done.")
+        self._pool.submit(self._run, job_id, dict(secrets or {}))
+        return job_id
+
+    def cancel(self, job_id):
+        """Stop a job after its current step."""
+        with self._lock:
+            self._cancelled.add(job_id)
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+        self.log(job_id, "⏹️ Cancel requested; stopping after the current step.")
+
+    # ---------- Running ----------
+
+    def _set_job(self, job_id, status, error=None):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?", (status, error, time.time(), job_id))
+
+    def _set_step(self, job_id, key, status, message=None):
+        now = time.time()
+        column = "started" if status == "running" else "finished"
+        with self._connect() as db:
+            db.execute(
+                f"UPDATE job_steps SET status = ?, message = ?, {column} = ? WHERE job_id = ? AND key = ?",
+                (status, message, now, job_id, key),
+            )
+            db.execute("UPDATE jobs SET updated = ? WHERE id = ?", (now, job_id))
+
+    def _is_cancelled(self, job_id):
+        with self._lock:
+            return job_id in self._cancelled
+
+    def _run(self, job_id, secrets):
+        job = self.get(job_id)
+        if job is None or job["status"] != "queued" or self._is_cancelled(job_id):
+            return
+        spec = resolve_kind(job["kind"])
+        pending = [s["key"] for s in job["steps"] if s["status"] != "done"]
+        self._set_job(job_id, "running")
+        try:
+            with trace(job["kind"], cluster=job["cluster"], job=job_id) as run:
+                ctx, lines = spec.prepare(job["params"], secrets, pending)
+                self.log(job_id, *lines)
+                failed = 0
+                for key in pending:
+                    if self._is_cancelled(job_id):
+                        self._set_job(job_id, "cancelled")
+                        self.log(job_id, f"⏹️ Job {job_id} cancelled before {key}.")
+                        return
+                    self._set_step(job_id, key, "running")
+                    try:
+                        self.log(job_id, *spec.run_step(ctx, key))
+                        self._set_step(job_id, key, "done")
+                    except Exception as e:
+                        failed += 1
+                        self._set_step(job_id, key, "failed", str(e))
+                        self.log(job_id, *getattr(e, "logs", ()))
+                        self.log(job_id, f"❌ Failed on {key}: {e}")
+                        if spec.halt_on_failure:
+                            left = len(pending) - pending.index(key) - 1
+                            self.log(job_id, f"⏹️ Halting: {left} remaining step(s) left pending.")
+                            break
+            self.log(job_id, format_waterfall(run))
+            if failed:
+                self._set_job(job_id, "failed", f"{failed} step(s) failed; resume to retry them")
+                self.log(job_id, f"⚠️ Job {job_id} finished with {failed} failed step(s). Resume it to retry those only.")
+            else:
+                self._set_job(job_id, "done")
+                self.log(job_id, f"🎉 Job {job_id} completed ({len(pending)} step(s)).")
+        except Exception as e:
+            self._set_job(job_id, "failed", str(e))
+            self.log(job_id, f"❌ Job {job_id} failed: {e}")
+
+    # ---------- Reading ----------
+
+    def log(self, job_id, *lines):
+        lines = [line for line in lines if line]
+        if not lines:
+            return
+        now = time.time()
+        with self._connect() as db:
+            db.executemany(
+                "INSERT INTO job_logs(job_id, ts, line) VALUES (?, ?, ?)",
+                [(job_id, now, line) for line in lines],
+            )
+
+    def get(self, job_id):
+        """{"id", "kind", "cluster", "params", "status", "error", "created", "updated", "steps"} or None."""
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            steps = db.execute(
+                "SELECT key, status, message, started, finished FROM job_steps WHERE job_id = ? ORDER BY position",
+                (job_id,),
+            ).fetchall()
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["steps"] = [dict(s) for s in steps]
+        return job
+
+    def list_jobs(self, limit=50):
+        """Most recently updated jobs with step counts (without params)."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT j.id, j.kind, j.cluster, j.status, j.error, j.created, j.updated, "
+                "COUNT(s.key) AS total, SUM(s.status = 'done') AS done, SUM(s.status = 'failed') AS failed "
+                "FROM jobs j LEFT JOIN job_steps s ON s.job_id = j.id "
+                "GROUP BY j.id ORDER BY j.updated DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(r, done=r["done"] or 0, failed=r["failed"] or 0) for r in rows]
+
+    def logs(self, job_id, after=0):
+        """[(log id, line)] newer than `after`."""
+        with self._connect() as db:
+            return [
+                (r["id"], r["line"]) for r in db.execute(
+                    "SELECT id, line FROM job_logs WHERE job_id = ? AND id > ? ORDER BY id", (job_id, after)
+                )
+            ]
+
+    def attach(self, job_id, poll=ATTACH_POLL_SECONDS):
+        """
+        Follow a job: yields (job, full log text) whenever something changes,
+        until the job is no longer active. Detaching never stops the job.
+        """
+        lines, last_id, last_updated = [], 0, None
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return
+            new = self.logs(job_id, last_id)
+            if new:
+                last_id = new[-1][0]
+                lines.extend(line for _, line in new)
+            if new or job["updated"] != last_updated:
+                last_updated = job["updated"]
+                yield job, "\n".join(lines)
+            if job["status"] not in ACTIVE:
+                return
+            time.sleep(poll)
+
+
+def format_job(job):
+    """One-line summary: status, kind, cluster and step progress."""
+    icons = {"queued": "⏳", "running": "🔄", "done": "✅", "failed": "❌", "cancelled": "⏹️", "interrupted": "⚠️"}
+    steps = job.get("steps")
+    done = sum(s["status"] == "done" for s in steps) if steps is not None else job.get("done", 0)
+    total = len(steps) if steps is not None else job.get("total", 0)
+    line = f"{icons.get(job['status'], '•')} {job['id']} {job['kind']} [{job['cluster'] or '-'}] {job['status']} {done}/{total}"
+    return f"{line} — {job['error']}" if job.get("error") else line
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Process-wide JobManager backed by runtime/jobs.db."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobManager()
+        return _default
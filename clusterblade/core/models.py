@@ -0,0 +1,164 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+
+# Node groups shown in the UI (deploy HTTPS groups, bulk-action roles)
+ROLES = ("master", "data", "ingest", "coordinator", "request")
+
+# Name fragments → roles, checked in order (first match wins)
+_NAME_HINTS = (
+    ("master", ("master",)),
+    ("data", ("data",)),
+    ("hot", ("data",)),
+    ("warm", ("data",)),
+    ("cold", ("data",)),
+    ("ingest", ("ingest",)),
+    ("request", ("coordinator", "request")),  # request nodes are coordinating-only nodes
+)
+
+
+def infer_roles(name):
+    """Guess roles from a node name (used when the YAML has no `roles:` key)."""
+    lower = (name or "").lower()
+    for hint, roles in _NAME_HINTS:
+        if hint in lower:
+            return roles
+    return ("coordinator",)
+
+
+def parse_roles(value, name=""):
+    """
+    Roles from the YAML `roles:` key (a string or a list), else from the name.
+    ES tier roles such as `data_hot` also count as `data`.
+    """
+    if not value:
+        return infer_roles(name)
+    raw = [value] if isinstance(value, str) else list(value)
+    roles = []
+    for role in (str(r).strip().lower() for r in raw):
+        if role and role not in roles:
+            roles.append(role)
+        if role.startswith("data_") and "data" not in roles:
+            roles.append("data")
+    return tuple(roles) or infer_roles(name)
+
+
+@dataclass(frozen=True, slots=True)
+class Node:
+    """
+    One parsed instances.yaml entry.
+
+    `get()` / `[]` mirror dict access (falling back to the raw YAML entry),
+    so a Node can be passed anywhere a node dict was used before.
+    """
+
+    name: str
+    ip: str
+    dns: str | None = None
+    rack: str | None = None
+    roles: tuple = ()
+    http_port: int | None = None       # allocated by core.ports (None → legacy 92XX)
+    transport_port: int | None = None
+    explicit_roles: bool = False       # roles came from the YAML, not from the name
+    raw: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_dict(cls, entry):
+        name = entry.get("name", "")
+        return cls(
+            name=name,
+            ip=entry.get("ip", ""),
+            dns=entry.get("dns"),
+            rack=entry.get("rack"),
+            roles=parse_roles(entry.get("roles"), name),
+            http_port=int(entry["http_port"]) if entry.get("http_port") else None,
+            transport_port=int(entry["transport_port"]) if entry.get("transport_port") else None,
+            explicit_roles=bool(entry.get("roles")),
+            raw=MappingProxyType(dict(entry)),
+        )
+
+    @property
+    def primary_role(self):
+        return self.roles[0] if self.roles else "coordinator"
+
+    def has_role(self, *roles):
+        return any(role in self.roles for role in roles)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else self.raw.get(key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return self.raw[key]
+
+    def to_dict(self):
+        ports = {k: getattr(self, k) for k in ("http_port", "transport_port") if getattr(self, k)}
+        roles = {"roles": list(self.roles)} if self.explicit_roles else {}
+        return {**self.raw, **ports, **roles}
+
+
+class Topology:
+    """
+    A cluster's parsed nodes plus role and name indexes, built once per
+    node list so role-filtered fan-outs are lookups instead of name scans.
+    """
+
+    __slots__ = ("nodes", "_by_name", "_by_role")
+
+    def __init__(self, nodes=()):
+        self.nodes = tuple(nodes)
+        self._by_name = {n.name: n for n in self.nodes}
+        by_role = {}
+        for node in self.nodes:
+            for role in node.roles:
+                by_role.setdefault(role, []).append(node)
+        self._by_role = {role: tuple(members) for role, members in by_role.items()}
+
+    @classmethod
+    def from_instances(cls, instances):
+        """Accepts raw YAML entries or Node objects."""
+        return cls(n if isinstance(n, Node) else Node.from_dict(n) for n in instances or ())
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def node(self, name):
+        return self._by_name.get(name)
+
+    def with_role(self, *roles):
+        """Nodes having any of `roles`, in instances.yaml order."""
+        if len(roles) == 1:
+            return self._by_role.get(roles[0], ())
+        wanted = set(roles)
+        return tuple(n for n in self.nodes if wanted.intersection(n.roles))
+
+    @property
+    def masters(self):
+        return self.with_role("master")
+
+    def roles(self):
+        """{role: node count} for the roles present in this cluster."""
+        return {role: len(members) for role, members in self._by_role.items()}
+
+    def select(self, names=None, roles=None):
+        """Nodes matching any of `names` or `roles`; every node when neither is given."""
+        names = set(names or ())
+        roles = tuple(roles or ())
+        if not names and not roles:
+            return self.nodes
+        picked = {n.name for n in self.with_role(*roles)} if roles else set()
+        picked.update(name for name in names if name in self._by_name)
+        return tuple(n for n in self.nodes if n.name in picked)
+
+
+def topology_of(cluster_state):
+    """The Topology of a ClusterState snapshot, or built from a plain dict's instances."""
+    topology = cluster_state.get("topology")
+    if topology is None:
+        topology = Topology.from_instances(cluster_state.get("instances", []))
+    return topology
@@ -0,0 +1,84 @@
+HTTP_BASE = 9200
+TRANSPORT_BASE = 9300
+PORT_RANGE = 100  # 9200-9299 / 9300-9399
+
+
+class PortCollisionError(ValueError):
+    """Two nodes on one host ask for the same port, or a host has no free port left."""
+
+
+def legacy_offset(ip):
+    """The old rule: last two digits of the IP's final octet (.5 → 05, .105 → 05)."""
+    return int(ip.split(".")[-1][-2:] or 0) % PORT_RANGE
+
+
+def default_ports(ip):
+    """(http, transport) the template used before ports were allocated."""
+    offset = legacy_offset(ip)
+    return HTTP_BASE + offset, TRANSPORT_BASE + offset
+
+
+def node_ports(node):
+    """(http, transport) of a node: allocated / explicit ports, else the legacy default."""
+    http, transport = default_ports(node.get("ip", ""))
+    return int(node.get("http_port") or http), int(node.get("transport_port") or transport)
+
+
+def assign_ports(instances, existing=None):
+    """
+    Deterministically allocate http/transport ports so no two nodes on the
+    same host share one. Returns copies of `instances` with `http_port` and
+    `transport_port` set.
+
+    Priority: ports given in the YAML, then `existing` ({name: (ip, http,
+    transport)}, e.g. from the inventory, kept while still free on the same
+    host), then the first free offset at or after the legacy IP-suffix rule,
+    so single-node-per-host clusters keep their old 92XX/93XX ports.
+    """
+    existing = existing or {}
+    nodes = [dict(n) for n in instances]
+    used = {}  # ip -> ports taken on that host
+
+    def take(node, port):
+        host = used.setdefault(node["ip"], {})
+        if port in host and host[port] != node["name"]:
+            raise PortCollisionError(f"{node['name']}: port {port} on {node['ip']} is already used by {host[port]}")
+        host[port] = node["name"]
+
+    # 1. explicit ports
+    for node in nodes:
+        for key in ("http_port", "transport_port"):
+            if node.get(key):
+                node[key] = int(node[key])
+                take(node, node[key])
+
+    # 2. previously allocated ports, if the node is still on the same host and they are free
+    for node in nodes:
+        prev = existing.get(node["name"])
+        if not prev or prev[0] != node["ip"]:
+            continue
+        host = used.setdefault(node["ip"], {})
+        for key, port in (("http_port", prev[1]), ("transport_port", prev[2])):
+            if port and not node.get(key) and port not in host:
+                node[key] = int(port)
+                take(node, node[key])
+
+    # 3. everything else: first free offset from the legacy suffix, keeping the pair aligned
+    for node in nodes:
+        if node.get("http_port") and node.get("transport_port"):
+            continue
+        host = used.setdefault(node["ip"], {})
+        start = legacy_offset(node["ip"])
+        for step in range(PORT_RANGE):
+            offset = (start + step) % PORT_RANGE
+            http = node.get("http_port") or HTTP_BASE + offset
+            transport = node.get("transport_port") or TRANSPORT_BASE + offset
+            if (http == node.get("http_port") or http not in host) and \
+               (transport == node.get("transport_port") or transport not in host):
+                break
+        else:
+            raise PortCollisionError(f"{node['name']}: no free port pair left on {node['ip']}")
+        node["http_port"], node["transport_port"] = http, transport
+        take(node, http)
+        take(node, transport)
+    return nodes
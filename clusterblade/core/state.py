@@ -0,0 +1,125 @@
+import threading
+from dataclasses import dataclass, field, fields, replace
+from types import MappingProxyType
+from typing import Any, Callable
+from clusterblade.core.models import Topology
+
+DEFAULT_NAMESPACE = "default"
+
+
+@dataclass(frozen=True)
+class ClusterState:
+    """
+    Immutable snapshot of one cluster's settings and inventory.
+
+    `get()` mirrors dict access so the orchestration functions accept
+    either a snapshot or the plain dict the CLI builds.
+    """
+
+    file: str | None = None                    # uploaded YAML path
+    instances: tuple = ()                      # parsed node data
+    topology: Topology = field(default_factory=Topology)  # nodes + role indexes, rebuilt with instances
+    cluster_name: str | None = None            # cluster name from Deploy tab
+    enable_security: bool = True
+    enable_ssl: bool = True
+    enable_http: bool = False
+    http_groups: tuple = ()
+    enable_logging: bool = False
+    memory_lock: bool = False
+    enable_tuning: bool = True                 # role/hardware performance profile
+    preflight: str = "check"                   # OS prerequisites before deploy: off / check / fix
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return getattr(self, key, None) is not None
+
+    def to_dict(self) -> dict:
+        """Plain, JSON-serialisable copy (no topology), e.g. for background job parameters."""
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "topology"}
+        data["instances"] = [dict(n) for n in self.instances]
+        data["http_groups"] = list(self.http_groups)
+        return data
+
+
+_FIELD_NAMES = {f.name for f in fields(ClusterState)}
+
+
+def _freeze(key, value):
+    """Copy incoming values so later mutation by the caller can't leak into a snapshot."""
+    if key == "instances":
+        return tuple(dict(n) for n in (value or ()))
+    if key == "http_groups":
+        return tuple(value or ())
+    return value
+
+
+def _with_topology(frozen):
+    """Index roles once whenever the node list changes."""
+    if "instances" in frozen and "topology" not in frozen:
+        frozen["topology"] = Topology.from_instances(frozen["instances"])
+    return frozen
+
+
+class StateStore:
+    """
+    Thread-safe store of ClusterState snapshots, one per namespace (cluster).
+
+    Reads are lock-free: they return the current immutable snapshot.
+    Writers serialize on a lock, build a new snapshot with the changes
+    applied and swap it in, so a reader never sees a half-applied update.
+    An optional `loader(namespace)` returning a dict of field values fills
+    namespaces on first access (e.g. from the persistent inventory).
+    """
+
+    def __init__(self, loader: Callable[[str], dict | None] | None = None):
+        self._lock = threading.Lock()
+        self._loader = loader
+        self._states = MappingProxyType({DEFAULT_NAMESPACE: ClusterState()})
+
+    def get(self, namespace: str = DEFAULT_NAMESPACE) -> ClusterState:
+        state = self._states.get(namespace)
+        if state is not None:
+            return state
+        loaded = self._loader(namespace) if self._loader else None
+        if not loaded:
+            return ClusterState()
+        with self._lock:
+            if namespace not in self._states:
+                frozen = _with_topology({k: _freeze(k, v) for k, v in loaded.items() if k in _FIELD_NAMES})
+                states = dict(self._states)
+                states[namespace] = ClusterState(**frozen)
+                self._states = MappingProxyType(states)
+            return self._states[namespace]
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop a cached namespace so the next get() reloads it."""
+        with self._lock:
+            states = dict(self._states)
+            states.pop(namespace, None)
+            self._states = MappingProxyType(states)
+
+    def update(self, namespace: str = DEFAULT_NAMESPACE, **changes) -> ClusterState:
+        unknown = set(changes) - _FIELD_NAMES
+        if unknown:
+            raise KeyError(f"Unknown cluster state field(s): {', '.join(sorted(unknown))}")
+        frozen = _with_topology({k: _freeze(k, v) for k, v in changes.items()})
+        if namespace not in self._states:
+            self.get(namespace)  # hydrate from the loader first so persisted fields aren't dropped
+        with self._lock:
+            new = replace(self._states.get(namespace) or ClusterState(), **frozen)
+            states = dict(self._states)
+            states[namespace] = new
+            self._states = MappingProxyType(states)
+        return new
+
+    def namespaces(self) -> list[str]:
+        return list(self._states)
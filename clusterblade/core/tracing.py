@@ -0,0 +1,251 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from clusterblade.core.paths import get_logs_dir
+
+TRACE_FILE = "traces.jsonl"
+WATERFALL_WIDTH = 40
+
+# (Trace, parent span id, node) of the code currently running; None outside a trace
+_CURRENT = contextvars.ContextVar("clusterblade_trace", default=None)
+_LAST = {}  # flow name → last finished Trace (read by the UI / metrics)
+_LAST_LOCK = threading.Lock()
+_LISTENERS = []  # called with every finished Trace (e.g. the /metrics aggregates)
+
+
+class Trace:
+    """
+    Spans of one orchestration run (deploy, SSL push, refresh, ...).
+    A span is a dict: {trace_id, span_id, parent_id, name, node, start, seconds, error, attrs}.
+    """
+
+    def __init__(self, flow, attrs=None):
+        self.flow = flow
+        self.trace_id = uuid.uuid4().hex
+        self.attrs = attrs or {}
+        self.start = time.time()
+        self.seconds = 0.0
+        self.error = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def nodes(self):
+        """{node: [span, ...]} in start order (spans without a node are left out)."""
+        by_node = {}
+        for span in sorted(self.spans, key=lambda s: s["start"]):
+            if span["node"]:
+                by_node.setdefault(span["node"], []).append(span)
+        return by_node
+
+    def stage_totals(self, node=None):
+        """{stage name: seconds} summed over the trace (or one node)."""
+        totals = {}
+        for span in self.spans:
+            if node is None or span["node"] == node:
+                totals[span["name"]] = totals.get(span["name"], 0.0) + span["seconds"]
+        return totals
+
+
+@contextmanager
+def span(name, node=None, **attrs):
+    """
+    Time a stage of the current trace. Nested spans are children and inherit
+    `node`. Outside a trace this only costs a context-variable lookup.
+    """
+    current = _CURRENT.get()
+    if current is None:
+        yield None
+        return
+    trace, parent_id, parent_node = current
+    record = {
+        "trace_id": trace.trace_id,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent_id,
+        "name": name,
+        "node": node or parent_node,
+        "start": time.time(),
+        "seconds": 0.0,
+        "error": None,
+        "attrs": attrs,
+    }
+    token = _CURRENT.set((trace, record["span_id"], record["node"]))
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["seconds"] = time.perf_counter() - started
+        _CURRENT.reset(token)
+        trace.add(record)
+
+
+@contextmanager
+def trace(flow, persist=True, **attrs):
+    """
+    Start a trace for one run of `flow`; spans opened inside are recorded in it.
+    Inside an existing trace this is just a span, so a flow can trace itself
+    and still nest under a caller's trace. On exit the spans are appended to
+    logs/traces.jsonl (unless persist=False) and exported to OpenTelemetry
+    when configured.
+    """
+    if _CURRENT.get() is not None:
+        with span(flow, **attrs):
+            yield _CURRENT.get()[0]
+        return
+    run = Trace(flow, attrs)
+    token = _CURRENT.set((run, None, None))
+    started = time.perf_counter()
+    try:
+        yield run
+    except BaseException as e:
+        run.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        run.seconds = time.perf_counter() - started
+        _CURRENT.reset(token)
+        with _LAST_LOCK:
+            _LAST[flow] = run
+        if persist:
+            write_trace(run)
+        export_otel(run)
+        for listener in _LISTENERS:
+            try:
+                listener(run)
+            except Exception as e:
+                print(f"⚠️ Trace listener failed: {e}")
+
+
+def on_trace(listener):
+    """Register listener(trace), called after every finished trace."""
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+    return listener
+
+
+def traced(flow, persist=True):
+    """Decorator: run the function inside trace(flow)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(flow, persist=persist):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def propagate(fn):
+    """Wrap `fn` so worker threads (ThreadPoolExecutor) record into the caller's trace."""
+    current = _CURRENT.get()
+    if current is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _CURRENT.set(current)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _CURRENT.reset(token)
+
+    return run
+
+
+def current_node():
+    """Node of the innermost open span (None outside a trace or a node span)."""
+    current = _CURRENT.get()
+    return current[2] if current else None
+
+
+def last_trace(flow):
+    with _LAST_LOCK:
+        return _LAST.get(flow)
+
+
+def write_trace(run):
+    """Append one JSON line per span to logs/traces.jsonl."""
+    try:
+        with open(get_logs_dir() / TRACE_FILE, "a", encoding="utf-8") as f:
+            for record in sorted(run.spans, key=lambda s: s["start"]):
+                f.write(json.dumps({"flow": run.flow, **record, "seconds": round(record["seconds"], 4)},
+                                   default=str) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write trace: {e}")
+
+
+def export_otel(run):
+    """
+    Replay the spans through OpenTelemetry when the SDK is installed and
+    OTEL_EXPORTER_OTLP_ENDPOINT (or CLUSTERBLADE_OTEL=1) is set; no-op otherwise.
+    """
+    if not (os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT") or os.environ.get("CLUSTERBLADE_OTEL")):
+        return
+    try:
+        from opentelemetry import trace as otel
+    except ImportError:
+        return
+    tracer = otel.get_tracer("clusterblade")
+    ns = lambda seconds: int(seconds * 1e9)  # noqa: E731
+    root = tracer.start_span(run.flow, start_time=ns(run.start), attributes=_otel_attrs(run.attrs))
+    started = {None: root}
+    for record in sorted(run.spans, key=lambda s: s["start"]):
+        parent = started.get(record["parent_id"], root)
+        attrs = _otel_attrs({**record["attrs"], "node": record["node"]})
+        otel_span = tracer.start_span(
+            record["name"], context=otel.set_span_in_context(parent),
+            start_time=ns(record["start"]), attributes=attrs,
+        )
+        if record["error"]:
+            otel_span.set_status(otel.Status(otel.StatusCode.ERROR, record["error"]))
+        started[record["span_id"]] = otel_span
+    for record in run.spans:
+        started[record["span_id"]].end(end_time=ns(record["start"] + record["seconds"]))
+    root.end(end_time=ns(run.start + run.seconds))
+
+
+def _otel_attrs(attrs):
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attrs.items() if v is not None}
+
+
+def format_waterfall(run, width=WATERFALL_WIDTH, max_nodes=50):
+    """
+    Per-node waterfall (monospace text): one bar per top-level stage of
+    each node, positioned on the run's timeline, plus stage totals.
+    """
+    if run is None or not run.spans:
+        return "⏱️ No timings recorded."
+    total = max(run.seconds, 1e-6)
+    lines = [f"⏱️ {run.flow}: {run.seconds:.2f}s, {len(run.spans)} span(s)"]
+    by_node = run.nodes()
+    names = list(by_node)[:max_nodes]
+    label = max((len(n) for n in names), default=4)
+    for node in names:
+        spans = by_node[node]
+        ids = {s["span_id"] for s in spans}
+        top = [s for s in spans if s["parent_id"] not in ids]  # the node's outermost stages
+        bar = [" "] * width
+        for s in top:
+            first = int((s["start"] - run.start) / total * width)
+            last = int((s["start"] + s["seconds"] - run.start) / total * width)
+            for i in range(max(0, first), min(width, max(last, first + 1))):
+                bar[i] = "#" if s["error"] is None else "!"
+        node_seconds = sum(s["seconds"] for s in top)
+        # a node wrapped in one span (e.g. deploy.node) is broken down by its direct children
+        top_ids = {s["span_id"] for s in top}
+        stages = [s for s in spans if s["parent_id"] in top_ids] or top
+        stages = ", ".join(f"{s['name']} {s['seconds'] * 1000:.0f}ms" for s in stages)
+        lines.append(f"{node:<{label}} |{''.join(bar)}| {node_seconds:6.2f}s  {stages}")
+    if len(by_node) > max_nodes:
+        lines.append(f"... {len(by_node) - max_nodes} more node(s)")
+    totals = sorted(run.stage_totals().items(), key=lambda kv: -kv[1])
+    lines.append("Σ " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in totals[:8]))
+    return "\n".join(lines)
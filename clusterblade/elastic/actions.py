@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from clusterblade.core.models import ROLES, Topology
+from clusterblade.ssh.client import run_command
+
+DEFAULT_CONCURRENCY = 16
+LOG_TAIL_LINES = 100
+
+# Reads cluster.name from the node's own config (empty if unset)
+CLUSTER_NAME_CMD = "grep '^cluster.name' /etc/elasticsearch/elasticsearch.yml | cut -d ':' -f2 | tr -d ' '"
+
+# Actions that make sense across many nodes at once
+BULK_ACTIONS = ["Start Node", "Stop Node", "Restart Node", "Node logs", "Reboot VM"]
+
+NODE_ROLES = list(ROLES)
+
+
+def build_cmd_map(cluster_name=None):
+    """
+    Shell commands for each node action.
+    When cluster_name is None the log path is resolved on the node itself,
+    so one command string can be fanned out to every node.
+    """
+    if cluster_name:
+        log_cmd = f"sudo tail -n {LOG_TAIL_LINES} /var/log/elasticsearch/{cluster_name}.log"
+    else:
+        log_cmd = (
+            f"CN=$({CLUSTER_NAME_CMD}); "
+            f"sudo tail -n {LOG_TAIL_LINES} /var/log/elasticsearch/${{CN:-elasticsearch}}.log"
+        )
+    return {
+        "Start Node": "sudo systemctl start elasticsearch",
+        "Stop Node": "sudo systemctl stop elasticsearch",
+        "Restart Node": "sudo systemctl restart elasticsearch",
+        "Reboot VM": "sudo reboot",
+        "Node logs": log_cmd,
+    }
+
+
+def select_nodes(topology, names=None, roles=None):
+    """
+    Pick nodes by name and/or role (from the role index of a Topology;
+    a plain instances list is indexed first).
+    With neither filter given, every node is selected.
+    """
+    if not isinstance(topology, Topology):
+        topology = Topology.from_instances(topology)
+    return list(topology.select(names, roles))
+
+
+def iter_bulk_action(nodes, ssh_user, ssh_pass, action, max_workers=DEFAULT_CONCURRENCY):
+    """
+    Run one action on many nodes with bounded concurrency.
+    Yields a result dict per node as soon as that node finishes:
+      {"name", "ip", "exit_code", "output"}
+    """
+    cmd = build_cmd_map().get(action)
+    if not cmd:
+        raise ValueError(f"Unknown bulk action: {action}")
+    if not nodes:
+        return
+
+    def run_one(node):
+        name, ip = node.get("name", ""), node.get("ip", "")
+        try:
+            exit_code, out, err = run_command(ip, ssh_user, ssh_pass, cmd)
+            output = "\n".join(part for part in (out, err) if part) or "OK"
+        except Exception as e:
+            exit_code, output = -1, str(e)
+        return {"name": name, "ip": ip, "exit_code": exit_code, "output": output}
+
+    workers = max(1, min(int(max_workers), len(nodes)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_one, node) for node in nodes]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def format_result(action, result):
+    """One log block for a single node's bulk-action outcome."""
+    ok = result["exit_code"] == 0
+    head = f"{'✅' if ok else '❌'} {action} on {result['name']} ({result['ip']}) → exit {result['exit_code']}"
+    if action == "Node logs" or not ok:
+        return f"{head}\n{'-'*60}\n{result['output']}"
+    return f"{head}: {result['output']}"
+
+
+def run_bulk_action(nodes, ssh_user, ssh_pass, action, max_workers=DEFAULT_CONCURRENCY, progress_callback=None):
+    """
+    Fan an action out across nodes and aggregate the outcome.
+    Returns {"results": [...], "succeeded": n, "failed": n, "exit_code": worst}
+    where exit_code is 0 only if every node returned 0.
+    """
+    results = []
+    for result in iter_bulk_action(nodes, ssh_user, ssh_pass, action, max_workers):
+        results.append(result)
+        if progress_callback:
+            progress_callback(format_result(action, result))
+
+    failed = [r for r in results if r["exit_code"] != 0]
+    worst = 0
+    if failed:
+        worst = max((abs(r["exit_code"]) for r in failed), default=1) or 1
+    return {
+        "results": results,
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "exit_code": worst,
+    }
@@ -1,6 +1,9 @@
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pathlib import Path
+from clusterblade.core.models import Node
 from clusterblade.core.paths import get_runtime_dir
+from clusterblade.core.ports import node_ports
+from clusterblade.elastic.tuning import es_node_roles, tuning_profile
 
 
 def render_es_config(
@@ -12,12 +15,17 @@ def render_es_config(
     enable_http=False,
     http_groups=None,
     enable_logging=False,
-    memory_lock=False
+    memory_lock=False,
+    enable_tuning=True,
+    facts=None,
+    rack_awareness=False,
 ):
     """
     Render elasticsearch.yml for a given node.
     Uses Jinja2 template (clusterblade/templates/elasticsearch.yml.j2)
     and writes to runtime/generated_configs/{node_name}/elasticsearch.yml
+    With enable_tuning, node.roles and a role/tier performance profile
+    (sized from the node's SSH-collected `facts` when given) are added.
     """
 
     template_dir = Path(__file__).resolve().parent.parent / "templates"
@@ -31,36 +39,36 @@ def render_es_config(
     # Identify master group
     master_ips = [m["ip"] for m in master_nodes]
     master_names = [m["name"] for m in master_nodes]
+    seed_hosts = [f"{m['ip']}:{node_ports(m)[1]}" for m in master_nodes]
 
+    if not isinstance(node, Node):
+        node = Node.from_dict(node)
     node_name = node.get("name", "unknown")
     node_ip = node.get("ip", "127.0.0.1")
     node_rack = node.get("rack", "r1")
-
-    # Infer group
-    lower = node_name.lower()
-    if "master" in lower:
-        node_group = "master"
-    elif "data" in lower:
-        node_group = "data"
-    elif "ingest" in lower:
-        node_group = "ingest"
-    else:
-        node_group = "coordinator"
+    node_group = node.primary_role
+    http_port, transport_port = node_ports(node)
 
     # HTTP enable flag
-    http_enabled = enable_http and node_group in (http_groups or [])
+    http_enabled = enable_http and node.has_role(*(http_groups or []))
 
     # Template context
     context = {
         "cluster_name": cluster_name,
-        "node": {"name": node_name, "ip": node_ip, "rack": node_rack},
+        "node": {
+            "name": node_name, "ip": node_ip, "rack": node_rack,
+            "http_port": http_port, "transport_port": transport_port,
+        },
         "master_ips": master_ips,
+        "seed_hosts": seed_hosts,
         "master_names": master_names,
         "enable_security": enable_security,
         "enable_ssl": enable_ssl,
         "enable_http": http_enabled,
         "enable_logging": enable_logging,
         "memory_lock": memory_lock,
+        "es_roles": es_node_roles(node) if enable_tuning else None,
+        "tuning": tuning_profile(node, facts, rack_awareness) if enable_tuning else {},
     }
 
     # Render YAML
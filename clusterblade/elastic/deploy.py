@@ -1,67 +1,145 @@
-import paramiko
 from pathlib import Path
+from clusterblade.core.jobs import JobKind
+from clusterblade.core.models import topology_of
+from clusterblade.core.tracing import span, traced
 from clusterblade.elastic.config_gen import render_es_config
+from clusterblade.elastic.facts import collect_facts
+from clusterblade.elastic.preflight import failing_nodes, format_report, run_preflight
+from clusterblade.ssh.client import session
+from clusterblade.elastic.jvm import (
+    MEMLOCK_OVERRIDE,
+    REMOTE_JVM_OPTIONS,
+    REMOTE_MEMLOCK_OVERRIDE,
+    render_jvm_options,
+)
 
 
-def deploy_cluster(shared_state, ssh_user, ssh_pass, progress_callback=None):
-    """
-    Deploy Elasticsearch YAML configs to all nodes in the cluster.
-    - Renders elasticsearch.yml via Jinja2 template
-    - Uploads to node via SSH
-    - Restarts Elasticsearch (non-blocking)
-    """
+def _run(ssh, cmd):
+    """Run a command and wait for it (unlike the fire-and-forget restart commands)."""
+    _, stdout, _ = ssh.exec_command(cmd)
+    return stdout.channel.recv_exit_status()
 
-    cluster_name = shared_state.get("cluster_name", "es-cluster")
-    instances = shared_state.get("instances", [])
-    enable_security = shared_state.get("enable_security", True)
-    enable_ssl = shared_state.get("enable_ssl", True)
-    enable_http = shared_state.get("enable_http", False)
-    http_groups = shared_state.get("http_groups", [])
-    enable_logging = shared_state.get("enable_logging", False)
-    memory_lock = shared_state.get("memory_lock", False)
 
-    masters = [n for n in instances if "master" in n["name"].lower()]
+def prepare_deploy(cluster_state, ssh_user, ssh_pass, only=None):
+    """
+    Cluster-wide part of a deploy: settings, hardware facts and preflight.
+    Facts and preflight cover only the node names in `only` when given
+    (e.g. the nodes a resumed job still has to do).
+    Returns (ctx for deploy_node, log lines).
+    cluster_state is a ClusterState snapshot (or a dict with the same keys).
+    """
+    topology = topology_of(cluster_state)
+    targets = [n for n in topology.nodes if only is None or n.name in only]
+    ctx = {
+        "cluster_name": cluster_state.get("cluster_name", "es-cluster"),
+        "topology": topology,
+        "masters": topology.masters,
+        "rack_awareness": len({n.get("rack", "r1") for n in topology}) > 1,
+        "enable_security": cluster_state.get("enable_security", True),
+        "enable_ssl": cluster_state.get("enable_ssl", True),
+        "enable_http": cluster_state.get("enable_http", False),
+        "http_groups": cluster_state.get("http_groups", []),
+        "enable_logging": cluster_state.get("enable_logging", False),
+        "memory_lock": cluster_state.get("memory_lock", False),
+        "enable_tuning": cluster_state.get("enable_tuning", True),
+        "ssh_user": ssh_user,
+        "ssh_pass": ssh_pass,
+        "facts": {},
+        "blocked": set(),
+    }
+    logs = []
 
+    # 0️⃣ Hardware facts for the tuning profiles and heap sizing (one SSH call per host, in parallel)
+    if ctx["enable_tuning"] and targets:
+        with span("facts"):
+            ctx["facts"], fact_errors = collect_facts(targets, ssh_user, ssh_pass)
+        logs.append(f"🔎 Collected CPU/RAM facts from {sum(1 for f in ctx['facts'].values() if f)}/{len(targets)} nodes.")
+        logs.extend(fact_errors)
+
+    # 0️⃣b OS prerequisites (bootstrap checks): skip nodes that would fail after restart
+    preflight = cluster_state.get("preflight", "check")
+    if preflight != "off" and targets:
+        with span("preflight"):
+            reports = run_preflight(targets, ssh_user, ssh_pass, ctx["memory_lock"], fix=(preflight == "fix"))
+        logs.append(format_report(reports))
+        ctx["blocked"] = failing_nodes(reports)
+    return ctx, logs
+
+
+def render_node(ctx, node):
+    """Render a node's elasticsearch.yml and (with tuning) JVM options locally → (cfg_path, jvm_path or None)."""
+    facts = ctx["facts"].get(node["name"])
+    with span("render"):
+        cfg_path = render_es_config(
+            ctx["cluster_name"],
+            node,
+            ctx["masters"],
+            enable_ssl=ctx["enable_ssl"],
+            enable_http=ctx["enable_http"],
+            http_groups=ctx["http_groups"],
+            enable_security=ctx["enable_security"],
+            enable_logging=ctx["enable_logging"],
+            memory_lock=ctx["memory_lock"],
+            enable_tuning=ctx["enable_tuning"],
+            facts=facts,
+            rack_awareness=ctx["rack_awareness"],
+        )
+        jvm_path = render_jvm_options(node, facts) if ctx["enable_tuning"] else None
+    return cfg_path, jvm_path
+
+
+def deploy_node(ctx, node):
+    """
+    Render, upload and restart one node (see prepare_deploy for ctx).
+    Returns log lines; raises on failure, including a failed preflight.
+    """
+    ip = node["ip"]
+    node_name = node["name"]
+    if node_name in ctx["blocked"]:
+        raise RuntimeError("preflight failed, a restart would not pass the bootstrap checks")
 
     logs = []
-    for node in instances:
-        ip = node["ip"]
-        node_name = node["name"]
+    with span("deploy.node", node=node_name, ip=ip):
+        logs.append(f"⚙️ Deploying config to {node_name} ({ip})...")
 
-        try:
-            logs.append(f"⚙️ Deploying config to {node_name} ({ip})...")
-
-            # 1️⃣ Render elasticsearch.yml locally
-            cfg_path = render_es_config(
-                cluster_name,
-                node,
-                masters,
-                enable_ssl=enable_ssl,
-                enable_http=enable_http,
-                http_groups=http_groups,
-                enable_security=enable_security,
-                enable_logging=enable_logging,
-                memory_lock=memory_lock
-            )
-            logs.append(f"📝 Generated config for {node_name} at {cfg_path}")
-
-            # 2️⃣ Connect via SSH
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(ip, username=ssh_user, password=ssh_pass, timeout=10)
+        # 1️⃣ Render elasticsearch.yml locally
+        cfg_path, jvm_path = render_node(ctx, node)
+        logs.append(f"📝 Generated config for {node_name} at {cfg_path}")
+
+        # 2️⃣ Connect via SSH
+        with session(ip, ctx["ssh_user"], ctx["ssh_pass"], timeout=10) as ssh:
             sftp = ssh.open_sftp()
 
             # 3️⃣ Upload config
             remote_dir = "/etc/elasticsearch/"
             remote_path = f"{remote_dir}elasticsearch.yml"
-            try:
-                sftp.mkdir(remote_dir)
-            except IOError:
-                pass  # already exists
-
-            sftp.put(cfg_path, remote_path)
+            with span("sftp.put", path=remote_path):
+                try:
+                    sftp.mkdir(remote_dir)
+                except IOError:
+                    pass  # already exists
+                sftp.put(cfg_path, remote_path)
             logs.append(f"📤 Uploaded config → {ip}:{remote_path}")
 
+            # 3b JVM heap / GC options (half RAM, below the compressed-oops cutoff)
+            if jvm_path:
+                with span("sftp.put", path=REMOTE_JVM_OPTIONS):
+                    _run(ssh, f"mkdir -p $(dirname {REMOTE_JVM_OPTIONS})")
+                    sftp.put(jvm_path, REMOTE_JVM_OPTIONS)
+                logs.append(f"🧠 Uploaded JVM options → {ip}:{REMOTE_JVM_OPTIONS}")
+            elif ctx["enable_tuning"]:
+                logs.append(f"⚠️ RAM unknown for {node_name}; heap left at the package default.")
+
+            # 3c systemd LimitMEMLOCK override, required for bootstrap.memory_lock
+            with span("memlock"):
+                if ctx["memory_lock"]:
+                    _run(ssh, f"mkdir -p $(dirname {REMOTE_MEMLOCK_OVERRIDE})")
+                    with sftp.open(REMOTE_MEMLOCK_OVERRIDE, "w") as f:
+                        f.write(MEMLOCK_OVERRIDE)
+                    logs.append(f"🔒 Applied LimitMEMLOCK=infinity override on {ip}")
+                else:
+                    _run(ssh, f"rm -f {REMOTE_MEMLOCK_OVERRIDE}")
+
             # 4️⃣ Restart Elasticsearch (non-blocking)
             restart_cmds = [
                 "sudo systemctl daemon-reload",
@@ -70,21 +148,65 @@ def deploy_cluster(shared_state, ssh_user, ssh_pass, progress_callback=None):
                 "sudo systemctl enable elasticsearch",
             ]
 
-            for cmd in restart_cmds:
-                ssh.exec_command(cmd)
+            with span("restart"):
+                for cmd in restart_cmds:
+                    ssh.exec_command(cmd)
 
-            logs.append(f"🚀 Restart triggered for {node_name} — moving to next node.")
-            logs.append(f"✅ Node {node_name} ({ip}) processed.\n")
-            logs.append("#----------------------------------------------------#\n")
+            sftp.close()
 
-            if progress_callback:
-                progress_callback(f"✅ {node_name} done")
+    logs.append(f"🚀 Restart triggered for {node_name} — moving to next node.")
+    logs.append(f"✅ Node {node_name} ({ip}) processed.\n")
+    return logs
 
-            sftp.close()
-            ssh.close()
 
+@traced("deploy")
+def deploy_cluster(cluster_state, ssh_user, ssh_pass, progress_callback=None):
+    """
+    Deploy Elasticsearch YAML configs to all nodes in the cluster.
+    - Renders elasticsearch.yml via Jinja2 template
+    - Uploads to node via SSH
+    - Restarts Elasticsearch (non-blocking)
+    cluster_state is a ClusterState snapshot (or a dict with the same keys).
+    For long runs prefer the "deploy" background job (core.jobs), which
+    checkpoints every node and can resume, or the "rollout" job
+    (elastic.rollout), which restarts in verified waves and rolls back.
+    """
+    ctx, logs = prepare_deploy(cluster_state, ssh_user, ssh_pass)
+
+    for node in ctx["topology"]:
+        ip = node["ip"]
+        node_name = node["name"]
+
+        if node_name in ctx["blocked"]:
+            logs.append(f"⛔ Skipping {node_name} ({ip}): preflight failed, a restart would not pass the bootstrap checks.")
+            continue
+
+        try:
+            logs.extend(deploy_node(ctx, node))
+            logs.append("#----------------------------------------------------#\n")
+            if progress_callback:
+                progress_callback(f"✅ {node_name} done")
         except Exception as e:
             logs.append(f"❌ Failed on {node_name} ({ip}): {e}")
 
     logs.append("🎯 Deployment completed for all nodes (without waiting for restart).")
     return "\n".join(logs)
+
+
+# ---------- Background job (core.jobs) ----------
+# params: {"cluster_state": ClusterState.to_dict(), "ssh_user"}; secrets: {"ssh_pass"}
+
+def _job_prepare(params, secrets, pending):
+    return prepare_deploy(params["cluster_state"], params["ssh_user"], secrets.get("ssh_pass"), only=set(pending))
+
+
+def _job_step(ctx, name):
+    return deploy_node(ctx, ctx["topology"].node(name))
+
+
+DEPLOY_JOB = JobKind(
+    title="Deploy cluster",
+    steps=lambda params: [n["name"] for n in params["cluster_state"]["instances"]],
+    prepare=_job_prepare,
+    run_step=_job_step,
+)
@@ -0,0 +1,22 @@
+from clusterblade.core.ports import node_ports
+
+
+def node_http_port(node) -> int:
+    """A node's allocated HTTP port (see core.ports), else the legacy 92XX port."""
+    return node_ports(node)[0]
+
+
+def node_endpoint(node) -> str:
+    """`ip:port` of a node's HTTP endpoint; unique even with several nodes per host."""
+    return f"{node.get('ip', '')}:{node_http_port(node)}"
+
+
+def es_url(ip: str, port: int, use_https: bool = False, path: str = "") -> str:
+    """Base URL (plus optional path) of an Elasticsearch HTTP endpoint; `port` from node_http_port()."""
+    scheme = "https" if use_https else "http"
+    return f"{scheme}://{ip}:{port}{path}"
+
+
+def node_url(node, use_https: bool = False, path: str = "") -> str:
+    """es_url() for a node dict / Node, using its allocated HTTP port."""
+    return es_url(node.get("ip", ""), node_http_port(node), use_https, path)
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from clusterblade.core.tracing import propagate, span
+from clusterblade.ssh.client import run_command
+
+DEFAULT_CONCURRENCY = 16
+
+# One round trip per host: "key=value" lines, parsed by parse_facts()
+FACTS_CMD = (
+    "echo cpus=$(nproc); "
+    "awk '/^MemTotal:/ {print \"mem_kb=\"$2}' /proc/meminfo"
+)
+
+
+def parse_facts(text):
+    """{"cpus", "mem_mb"} from FACTS_CMD output (missing values are None)."""
+    raw = dict(line.split("=", 1) for line in text.splitlines() if "=" in line)
+
+    def num(key):
+        value = raw.get(key, "").strip()
+        return int(value) if value.isdigit() else None
+
+    mem_kb = num("mem_kb")
+    return {"cpus": num("cpus"), "mem_mb": mem_kb // 1024 if mem_kb else None}
+
+
+def per_node_share(facts, nodes_on_host):
+    """Split one host's CPUs / RAM between the ES nodes co-located on it."""
+    if not facts or nodes_on_host <= 1:
+        return facts
+    share = dict(facts)
+    if facts.get("cpus"):
+        share["cpus"] = max(1, facts["cpus"] // nodes_on_host)
+    if facts.get("mem_mb"):
+        share["mem_mb"] = facts["mem_mb"] // nodes_on_host
+    return share
+
+
+def collect_facts(nodes, ssh_user, ssh_pass, max_workers=DEFAULT_CONCURRENCY):
+    """
+    CPU / RAM facts for every node, one SSH call per host
+    (co-located nodes share the call and split the host's resources).
+    Returns {node_name: facts or None}, plus a list of error lines.
+    """
+    hosts = {}
+    for node in nodes:
+        hosts.setdefault(node.get("ip", ""), []).append(node.get("name", ""))
+    if not hosts:
+        return {}, []
+
+    def fetch(ip):
+        try:
+            with span("facts.host", node=ip):
+                code, out, err = run_command(ip, ssh_user, ssh_pass, FACTS_CMD)
+            if code != 0 and not out:
+                return ip, None, err or f"exit {code}"
+            return ip, parse_facts(out), None
+        except Exception as e:
+            return ip, None, str(e)
+
+    facts, errors = {}, []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as pool:
+        for ip, host_facts, error in pool.map(propagate(fetch), hosts):
+            if error:
+                errors.append(f"⚠️ Facts unavailable for {ip}: {error}")
+            for name in hosts[ip]:
+                facts[name] = per_node_share(host_facts, len(hosts[ip]))
+    return facts, errors
@@ -0,0 +1,61 @@
+from clusterblade.core.models import Node
+from clusterblade.core.paths import get_runtime_dir
+from clusterblade.elastic.tuning import node_tier
+
+REMOTE_JVM_OPTIONS = "/etc/elasticsearch/jvm.options.d/clusterblade.options"
+REMOTE_MEMLOCK_OVERRIDE = "/etc/systemd/system/elasticsearch.service.d/clusterblade-memlock.conf"
+
+MEMLOCK_OVERRIDE = "[Service]\nLimitMEMLOCK=infinity\n"
+
+# Stay below the compressed-oops cutoff (~32 GB) so object pointers stay 32-bit
+COMPRESSED_OOPS_MAX_MB = 31 * 1024
+MIN_HEAP_MB = 512
+
+
+def heap_size_mb(mem_mb):
+    """Half the node's RAM (the rest is filesystem cache), capped for compressed oops."""
+    if not mem_mb:
+        return None
+    heap = min(mem_mb // 2, COMPRESSED_OOPS_MAX_MB)
+    heap = max(heap, MIN_HEAP_MB)
+    return heap - heap % 256  # round down to 256 MB steps
+
+
+def gc_options(node):
+    """G1 settings by role: throughput headroom for data/ingest, short pauses for master/coordinating."""
+    options = ["-XX:+UseG1GC"]
+    if node_tier(node) or node.has_role("ingest"):
+        options += ["-XX:G1ReservePercent=25", "-XX:InitiatingHeapOccupancyPercent=30"]
+    else:
+        options += ["-XX:MaxGCPauseMillis=100"]
+    return options
+
+
+def jvm_options(node, facts):
+    """Lines of the jvm.options.d file, or None when RAM is unknown (keep the package default)."""
+    if not isinstance(node, Node):
+        node = Node.from_dict(node)
+    heap = heap_size_mb((facts or {}).get("mem_mb"))
+    if heap is None:
+        return None
+    return [
+        f"# Managed by ClusterBlade for {node.name} ({facts['mem_mb']} MB RAM, {facts.get('cpus') or '?'} CPUs)",
+        f"-Xms{heap}m",
+        f"-Xmx{heap}m",
+        *gc_options(node),
+    ]
+
+
+def render_jvm_options(node, facts):
+    """
+    Write runtime/generated_configs/{node_name}/clusterblade.options.
+    Returns the path, or None when the node's RAM is unknown.
+    """
+    lines = jvm_options(node, facts)
+    if lines is None:
+        return None
+    output_dir = get_runtime_dir() / "generated_configs" / node.get("name", "unknown")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    out_file = output_dir / "clusterblade.options"
+    out_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(out_file)
@@ -0,0 +1,190 @@
+import json
+import re
+import shutil
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from clusterblade.core.paths import get_logs_dir
+from clusterblade.elastic.actions import CLUSTER_NAME_CMD, DEFAULT_CONCURRENCY
+from clusterblade.ssh.client import session
+
+CHUNK_SIZE = 256 * 1024
+ES_LOG_DIR = "/var/log/elasticsearch"
+
+
+def get_bundles_dir():
+    path = get_logs_dir() / "bundles"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _remote_archive_cmd(archive, cluster_name=None):
+    """
+    Create a gzip'd tar of the cluster log and GC logs on the node (once),
+    make it readable over SFTP and print its size and mtime.
+    Re-running against an existing archive keeps it, so downloads can resume.
+    """
+    cn = f"CN={cluster_name}" if cluster_name else f"CN=$({CLUSTER_NAME_CMD}); CN=${{CN:-elasticsearch}}"
+    return (
+        f"{cn}; "
+        f"[ -s {archive} ] || sudo sh -c \"cd {ES_LOG_DIR} && "
+        f"tar czf {archive} --ignore-failed-read $CN.log gc.log* 2>/dev/null\"; "
+        f"sudo chown $(id -u) {archive} && stat -c '%s %Y' {archive}"
+    )
+
+
+def _load_manifest(staging):
+    manifest = staging / "manifest.json"
+    if manifest.exists():
+        return json.loads(manifest.read_text(encoding="utf-8"))
+    return None
+
+
+def _save_manifest(staging, data):
+    (staging / "manifest.json").write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def _find_resumable(label):
+    """Most recent unfinished staging dir for exactly this cluster label, if any."""
+    # ".staging-<label>-YYYYmmdd-HHMMSS": a prefix glob would let node-1 pick up node-10's bundle
+    pattern = re.compile(rf"\.staging-{re.escape(label)}-\d{{8}}-\d{{6}}")
+    candidates = sorted(
+        (p for p in get_bundles_dir().iterdir() if p.is_dir() and pattern.fullmatch(p.name)), reverse=True
+    )
+    for staging in candidates:
+        manifest = _load_manifest(staging)
+        if manifest and manifest.get("cluster") == label:
+            return staging
+    return None
+
+
+def _fetch_node(node, ssh_user, ssh_pass, staging, bundle_id, cluster_name, known=None, remember=None):
+    """
+    Archive logs on one node and download the archive, resuming a partial
+    file. `known` is the {"size", "mtime"} of the remote archive the partial
+    file came from; if the archive changed since, the download starts over.
+    `remember(ident)` records the archive being downloaded.
+    """
+    name, ip = node.get("name", ""), node.get("ip", "")
+    archive = f"/tmp/clusterblade-logs-{bundle_id}.tar.gz"
+    part = staging / f"{name}.tar.gz.part"
+    done = staging / f"{name}.tar.gz"
+    if done.exists():
+        return name, "skipped", done.stat().st_size, 0
+
+    with session(ip, ssh_user, ssh_pass, timeout=20) as ssh:
+        _, stdout, stderr = ssh.exec_command(_remote_archive_cmd(archive, cluster_name))
+        out = stdout.read().decode().strip()
+        if stdout.channel.recv_exit_status() != 0 or not out.splitlines():
+            raise RuntimeError(stderr.read().decode().strip() or "failed to create remote archive")
+        size, _, mtime = out.splitlines()[-1].partition(" ")
+        remote_size = int(size)
+        ident = {"size": remote_size, "mtime": int(mtime or 0)}
+
+        offset = part.stat().st_size if part.exists() else 0
+        if offset > remote_size or (offset and known != ident):
+            offset = 0  # remote archive was rebuilt; appending would corrupt the file
+        if remember:
+            remember(ident)
+
+        sftp = ssh.open_sftp()
+        try:
+            with sftp.open(archive, "rb") as src, open(part, "ab" if offset else "wb") as dst:
+                src.seek(offset)
+                src.prefetch(remote_size - offset)
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            if part.stat().st_size != remote_size:
+                raise RuntimeError(f"incomplete download ({part.stat().st_size}/{remote_size} bytes)")
+            part.rename(done)
+            sftp.remove(archive)
+        finally:
+            sftp.close()
+    return name, "resumed" if offset else "downloaded", remote_size, offset
+
+
+def collect_logs(nodes, ssh_user, ssh_pass, cluster_name=None, max_workers=DEFAULT_CONCURRENCY,
+                 resume=True, progress_callback=None):
+    """
+    Pull the cluster log and GC logs from every node in parallel.
+
+    Each node compresses its logs before transfer; partial downloads are
+    kept in a staging dir and resumed on the next call. When every node
+    has finished, the per-node archives are packed into
+    runtime/logs/bundles/<cluster>-<timestamp>.tar.
+    Returns (bundle_path or None, log_lines).
+    """
+    label = cluster_name or "cluster"
+    logs = []
+
+    def report(line):
+        logs.append(line)
+        if progress_callback:
+            progress_callback(line)
+
+    staging = _find_resumable(label) if resume else None
+    if staging:
+        manifest = _load_manifest(staging)
+        report(f"♻️ Resuming log bundle {manifest['bundle_id']}")
+    else:
+        bundle_id = f"{label}-{time.strftime('%Y%m%d-%H%M%S')}"
+        staging = get_bundles_dir() / f".staging-{bundle_id}"
+        staging.mkdir(parents=True, exist_ok=True)
+        manifest = {"bundle_id": bundle_id, "cluster": label, "created": time.time(), "nodes": {}}
+        _save_manifest(staging, manifest)
+
+    bundle_id = manifest["bundle_id"]
+    failed = 0
+    lock = threading.Lock()
+
+    def remember(name):
+        def save(ident):
+            # persisted before the download starts, so a crash mid-transfer still knows what .part holds
+            with lock:
+                manifest["nodes"].setdefault(name, {})["remote"] = ident
+                _save_manifest(staging, manifest)
+        return save
+
+    workers = max(1, min(int(max_workers), len(nodes) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _fetch_node, node, ssh_user, ssh_pass, staging, bundle_id, cluster_name,
+                manifest["nodes"].get(node.get("name", ""), {}).get("remote"), remember(node.get("name", "")),
+            ): node
+            for node in nodes
+        }
+        for fut in as_completed(futures):
+            node = futures[fut]
+            name = node.get("name", "")
+            try:
+                _, status, size, offset = fut.result()
+                with lock:
+                    entry = manifest["nodes"].setdefault(name, {})
+                    entry.pop("error", None)
+                    entry.update(ip=node.get("ip", ""), status="done", bytes=size)
+                extra = f" from byte {offset}" if offset else ""
+                report(f"✅ {name}: {status} {size / 1024:.1f} KB{extra}")
+            except Exception as e:
+                failed += 1
+                with lock:  # keep "remote", so the next run can still resume the partial file
+                    manifest["nodes"].setdefault(name, {}).update(ip=node.get("ip", ""), status="failed", error=str(e))
+                report(f"❌ {name} ({node.get('ip', '')}): {e}")
+
+    _save_manifest(staging, manifest)
+    if failed:
+        report(f"⚠️ {failed} node(s) failed — run again to resume bundle {bundle_id}.")
+        return None, logs
+
+    bundle_path = get_bundles_dir() / f"{bundle_id}.tar"
+    with tarfile.open(bundle_path, "w") as tar:
+        for item in sorted(staging.iterdir()):
+            tar.add(item, arcname=f"{bundle_id}/{item.name}")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    report(f"📦 Log bundle written → {bundle_path}")
+    return bundle_path, logs
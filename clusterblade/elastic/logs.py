@@ -0,0 +1,155 @@
+import heapq
+import queue
+import re
+import shlex
+import threading
+import time
+from clusterblade.elastic.actions import CLUSTER_NAME_CMD
+from clusterblade.ssh.client import connect
+
+DEFAULT_TAIL_LINES = 100
+DEFAULT_BYTE_BUDGET = 256 * 1024  # per node
+DEFAULT_FOLLOW_SECONDS = 60
+
+LOG_LEVELS = ["TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL"]
+
+# Elasticsearch log lines start with "[2024-05-01T10:00:00,123][WARN ][...]"
+_TIMESTAMP_RE = re.compile(r"^\[(\d{4}-\d{2}-\d{2}T[0-9:.,]+)")
+
+
+def build_tail_cmd(lines=DEFAULT_TAIL_LINES, follow=False, pattern=None, level=None,
+                   max_bytes=DEFAULT_BYTE_BUDGET):
+    """
+    Build the remote pipeline: tail → optional grep filters → byte cap.
+    All filtering happens on the node so only matching bytes cross the wire.
+    A one-shot tail keeps the newest `max_bytes`; a followed stream stops after them.
+    """
+    log_file = "/var/log/elasticsearch/${CN:-elasticsearch}.log"
+    tail = f"sudo tail -n {int(lines)}{' -F' if follow else ''} {log_file}"
+
+    stages = [tail]
+    if level and level.upper() in LOG_LEVELS:
+        wanted = "|".join(LOG_LEVELS[LOG_LEVELS.index(level.upper()):])
+        level_re = r"\]\[(" + wanted + r") *\]"
+        stages.append(f"grep --line-buffered -E {shlex.quote(level_re)}")
+    if pattern:
+        stages.append(f"grep --line-buffered -E -- {shlex.quote(pattern)}")
+    if max_bytes:
+        stages.append(f"{'head' if follow else 'tail'} -c {int(max_bytes)}")
+
+    return f"CN=$({CLUSTER_NAME_CMD}); " + " | ".join(stages)
+
+
+def _read_node(node, ssh_user, ssh_pass, cmd, max_bytes, out_queue, stop_event, clients, clients_lock):
+    """Reader thread: push (timestamp, node_name, line) tuples into out_queue."""
+    name, ip = node.get("name", ""), node.get("ip", "")
+    last_ts = ""
+    try:
+        ssh = connect(ip, ssh_user, ssh_pass)
+        with clients_lock:
+            if stop_event.is_set():
+                # stream_logs already closed its clients; don't leave a tail -F behind
+                ssh.close()
+                return
+            clients.append(ssh)
+        _, stdout, _ = ssh.exec_command(cmd)
+        used = 0
+        for raw in stdout:
+            if stop_event.is_set():
+                break
+            used += len(raw.encode(errors="replace"))
+            line = raw.rstrip("\n")
+            match = _TIMESTAMP_RE.match(line)
+            if match:
+                last_ts = match.group(1)
+            # continuation lines (stack traces) keep the previous timestamp
+            out_queue.put((last_ts, name, line))
+            if max_bytes and used >= max_bytes:
+                out_queue.put((last_ts, name, f"… byte budget of {max_bytes} reached"))
+                break
+    except Exception as e:
+        out_queue.put((last_ts, name, f"❌ {ip}: {e}"))
+    finally:
+        out_queue.put((None, name, None))  # end-of-stream marker
+
+
+def format_log_line(entry):
+    _, name, line = entry
+    return f"{name:<16} | {line}"
+
+
+def stream_logs(nodes, ssh_user, ssh_pass, lines=DEFAULT_TAIL_LINES, follow=False, pattern=None,
+                level=None, max_bytes=DEFAULT_BYTE_BUDGET, duration=DEFAULT_FOLLOW_SECONDS,
+                poll_interval=1.0, stop_event=None):
+    """
+    Tail the Elasticsearch log on several nodes at once and merge them.
+
+    Without follow, yields a single batch with the last `lines` lines of
+    every node merged into timestamp order. With follow, keeps `tail -F`
+    channels open for up to `duration` seconds and yields a time-ordered
+    batch every `poll_interval` seconds.
+    Each entry is a (timestamp, node_name, line) tuple.
+    """
+    cmd = build_tail_cmd(lines, follow, pattern, level, max_bytes)
+    stop_event = stop_event or threading.Event()
+    out_queue = queue.Queue()
+    clients, clients_lock = [], threading.Lock()
+
+    threads = [
+        threading.Thread(
+            target=_read_node,
+            # a one-shot tail is capped remotely by `tail -c`; only a followed stream needs counting
+            args=(node, ssh_user, ssh_pass, cmd, max_bytes if follow else None, out_queue, stop_event,
+                  clients, clients_lock),
+            daemon=True,
+        )
+        for node in nodes
+    ]
+    for t in threads:
+        t.start()
+
+    open_streams = len(threads)
+    try:
+        if not follow:
+            per_node = {}
+            while open_streams:
+                ts, name, line = out_queue.get()
+                if line is None:
+                    open_streams -= 1
+                    continue
+                per_node.setdefault(name, []).append((ts, name, line))
+            # each node's tail is already ordered; a k-way merge keeps it cheap
+            yield list(heapq.merge(*per_node.values(), key=lambda e: e[0]))
+            return
+
+        deadline = time.monotonic() + duration if duration else None
+        while open_streams and not stop_event.is_set():
+            if deadline and time.monotonic() >= deadline:
+                break
+            batch = []
+            wait_until = time.monotonic() + poll_interval
+            while True:
+                remaining = wait_until - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    ts, name, line = out_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if line is None:
+                    open_streams -= 1
+                    if not open_streams:
+                        break
+                    continue
+                batch.append((ts, name, line))
+            if batch:
+                batch.sort(key=lambda e: e[0])
+                yield batch
+    finally:
+        stop_event.set()
+        with clients_lock:
+            for ssh in clients:
+                try:
+                    ssh.close()
+                except Exception:
+                    pass
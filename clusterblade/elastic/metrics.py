@@ -0,0 +1,169 @@
+import threading
+from clusterblade.certificates.expiry import last_scans
+from clusterblade.core.health import CLOSED, HALF_OPEN, HEALTH, OPEN
+from clusterblade.core.tracing import on_trace
+from clusterblade.elastic.reachability import RTT_HISTORY
+from clusterblade.elastic.status import NODE_STATES, PROBE_TIMINGS
+from clusterblade.ssh.client import ssh_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+QUANTILES = (50, 90, 99)
+CIRCUIT_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class OperationStats:
+    """
+    Counters and durations per traced flow (deploy, deploy_ssl, certificates,
+    refresh, ...) and per stage (ssh.connect, sftp.put, ...), fed by finished traces.
+    """
+
+    def __init__(self):
+        self._flows = {}   # (flow, outcome) → [count, seconds]
+        self._stages = {}  # stage → [count, seconds, errors]
+        self._lock = threading.Lock()
+
+    def observe(self, run):
+        if run.error:
+            outcome = "failed"
+        elif any(s["error"] for s in run.spans):
+            outcome = "partial"  # some node/stage failed, the run itself finished
+        else:
+            outcome = "ok"
+        with self._lock:
+            flow = self._flows.setdefault((run.flow, outcome), [0, 0.0])
+            flow[0] += 1
+            flow[1] += run.seconds
+            for s in run.spans:
+                stage = self._stages.setdefault(s["name"], [0, 0.0, 0])
+                stage[0] += 1
+                stage[1] += s["seconds"]
+                stage[2] += bool(s["error"])
+
+    def snapshot(self):
+        with self._lock:
+            return (
+                {key: list(v) for key, v in self._flows.items()},
+                {key: list(v) for key, v in self._stages.items()},
+            )
+
+
+OPERATIONS = OperationStats()
+on_trace(OPERATIONS.observe)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name, labels, value):
+    if labels:
+        inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f"{name}{{{inner}}} {value}"
+    return f"{name} {value}"
+
+
+def _family(lines, name, kind, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    lines.extend(_sample(name, labels, value) for labels, value in samples)
+
+
+def render_metrics():
+    """
+    Prometheus text exposition of ClusterBlade's in-memory state: the last
+    probed node states, probe latencies, traced operation counters/durations
+    and SSH connection stats. Reads snapshots only, never touches the network.
+    """
+    lines = []
+    states = NODE_STATES.snapshot()
+    for metric, key, help_text in (
+        ("clusterblade_node_vm_up", "vm_up", "SSH port reachable at the last probe (1/0)."),
+        ("clusterblade_node_es_up", "es_up", "Elasticsearch HTTP answering at the last probe (1/0)."),
+        ("clusterblade_node_in_cluster", "in_cluster", "Node listed in _cat/nodes at the last probe (1/0)."),
+        ("clusterblade_node_last_probe_timestamp_seconds", "ts", "Unix time of the node's last probe."),
+    ):
+        _family(lines, metric, "gauge", help_text, [
+            ({"cluster": cluster, "node": name, "ip": s["ip"]},
+             round(s[key], 3) if key == "ts" else int(bool(s[key])))
+            for cluster, nodes in sorted(states.items()) for name, s in sorted(nodes.items())
+        ])
+
+    latency = []
+    for endpoint in PROBE_TIMINGS.endpoints():
+        samples = PROBE_TIMINGS.samples(endpoint)
+        pct = PROBE_TIMINGS.percentiles(endpoint, QUANTILES)
+        if not pct:
+            continue
+        latency += [({"endpoint": endpoint, "quantile": p / 100}, round(pct[p], 6)) for p in QUANTILES]
+        latency.append(({"endpoint": endpoint, "__suffix": "_sum"}, round(sum(samples), 6)))
+        latency.append(({"endpoint": endpoint, "__suffix": "_count"}, len(samples)))
+    lines.append("# HELP clusterblade_probe_latency_seconds ES probe latency over the recent window.")
+    lines.append("# TYPE clusterblade_probe_latency_seconds summary")
+    for labels, value in latency:
+        suffix = labels.pop("__suffix", "")
+        lines.append(_sample(f"clusterblade_probe_latency_seconds{suffix}", labels, value))
+
+    flows, stages = OPERATIONS.snapshot()
+    _family(lines, "clusterblade_operations_total", "counter",
+            "Finished operations by flow and outcome (ok / partial / failed).",
+            [({"flow": flow, "outcome": outcome}, v[0]) for (flow, outcome), v in sorted(flows.items())])
+    _family(lines, "clusterblade_operation_duration_seconds_total", "counter",
+            "Total wall time of finished operations.",
+            [({"flow": flow, "outcome": outcome}, round(v[1], 6)) for (flow, outcome), v in sorted(flows.items())])
+    _family(lines, "clusterblade_stage_total", "counter", "Traced stages run (ssh.connect, sftp.put, ...).",
+            [({"stage": stage}, v[0]) for stage, v in sorted(stages.items())])
+    _family(lines, "clusterblade_stage_duration_seconds_total", "counter", "Total time spent per stage.",
+            [({"stage": stage}, round(v[1], 6)) for stage, v in sorted(stages.items())])
+    _family(lines, "clusterblade_stage_errors_total", "counter", "Stages that raised.",
+            [({"stage": stage}, v[2]) for stage, v in sorted(stages.items())])
+
+    ssh = ssh_stats()
+    _family(lines, "clusterblade_ssh_connects_total", "counter", "SSH connections opened.",
+            [({}, ssh["connects"])])
+    _family(lines, "clusterblade_ssh_connect_failures_total", "counter", "SSH connection attempts that failed.",
+            [({}, ssh["failures"])])
+    _family(lines, "clusterblade_ssh_connect_seconds_total", "counter", "Time spent opening SSH connections.",
+            [({}, round(ssh["connect_seconds"], 6))])
+    _family(lines, "clusterblade_ssh_pool_hits_total", "counter", "SSH sessions served by a pooled connection.",
+            [({}, ssh["pool_hits"])])
+    _family(lines, "clusterblade_ssh_pool_misses_total", "counter", "SSH sessions that had to open a connection.",
+            [({}, ssh["pool_misses"])])
+    _family(lines, "clusterblade_ssh_pool_idle_connections", "gauge", "Authenticated SSH connections kept for reuse.",
+            [({}, ssh["pool_idle"])])
+
+    rtt = sorted(RTT_HISTORY.snapshot().items())
+    _family(lines, "clusterblade_host_connect_rtt_seconds", "gauge", "Smoothed TCP connect RTT to the SSH port.",
+            [({"ip": host}, round(h["srtt"], 6)) for host, h in rtt])
+    _family(lines, "clusterblade_host_connect_timeout_seconds", "gauge", "Adaptive connect timeout in use per host.",
+            [({"ip": host}, round(h["timeout"], 6)) for host, h in rtt])
+
+    certs = [(cluster, r) for cluster, (_, rows) in sorted(last_scans().items()) for r in rows if r["fingerprint"]]
+    _family(lines, "clusterblade_cert_days_left", "gauge", "Days until the certificate a node serves expires (last scan).",
+            [({"cluster": c, "node": r["name"], "layer": r["layer"]}, r["days_left"]) for c, r in certs])
+    _family(lines, "clusterblade_cert_mismatch", "gauge", "Served certificate differs from the local one (1/0).",
+            [({"cluster": c, "node": r["name"], "layer": r["layer"]}, int(r["status"] == "mismatch")) for c, r in certs])
+
+    from clusterblade.certificates.key_pool import get_key_pool
+
+    keys = get_key_pool().stats()
+    _family(lines, "clusterblade_key_pool_ready", "gauge", "Pre-generated RSA keys ready for cert issuance.",
+            [({}, keys["ready"])])
+    _family(lines, "clusterblade_key_pool_takes_total", "counter", "Keys taken from the pool (hit) or generated inline (miss).",
+            [({"result": "hit"}, keys["hits"]), ({"result": "miss"}, keys["misses"])])
+
+    circuits = sorted(HEALTH.snapshot().items())
+    _family(lines, "clusterblade_host_circuit_state", "gauge", "Host circuit breaker: 0 closed, 1 half-open, 2 open.",
+            [({"ip": host}, CIRCUIT_STATES[c["state"]]) for host, c in circuits])
+    _family(lines, "clusterblade_host_consecutive_failures", "gauge", "Consecutive connect failures per host.",
+            [({"ip": host}, c["failures"]) for host, c in circuits])
+    return "\n".join(lines) + "\n"
+
+
+def mount_metrics(fastapi_app, path="/metrics"):
+    """Add the /metrics route to the FastAPI app Gradio serves."""
+    from fastapi.responses import PlainTextResponse
+
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+    fastapi_app.add_api_route(path, metrics, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,294 @@
+import mmap
+import re
+import threading
+import time
+from array import array
+from pathlib import Path
+from clusterblade.core.paths import get_runtime_dir
+from clusterblade.elastic.endpoints import node_endpoint, node_url
+
+DEFAULT_CAPACITY = 720   # samples kept per node (1h at 5s)
+DEFAULT_INTERVAL = 5     # seconds between _nodes/stats calls
+REQUEST_TIMEOUT = 3
+SESSION_TTL = 120        # a viewer counts as gone after this long without a chart refresh
+
+METRIC_FIELDS = (
+    "heap_used_pct",   # JVM heap used, %
+    "gc_young_ms",     # young GC time spent during the interval
+    "gc_old_ms",       # old GC time spent during the interval
+    "rejected",        # thread-pool rejections during the interval
+    "index_rate",      # docs indexed per second
+    "search_rate",     # queries per second
+)
+
+STATS_PATH = (
+    "/_nodes/stats/jvm,indices,thread_pool"
+    "?filter_path=nodes.*.name,nodes.*.host,nodes.*.ip,"
+    "nodes.*.jvm.mem.heap_used_percent,"
+    "nodes.*.jvm.gc.collectors.*.collection_time_in_millis,"
+    "nodes.*.thread_pool.*.rejected,"
+    "nodes.*.indices.indexing.index_total,"
+    "nodes.*.indices.search.query_total"
+)
+
+
+def get_metrics_dir(cluster=None) -> Path:
+    path = get_runtime_dir() / "metrics"
+    if cluster:
+        path = path / _safe_name(cluster)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class RingBuffer:
+    """
+    Fixed-size time series of float rows: (timestamp, *METRIC_FIELDS).
+
+    Backed by a flat array('d') in memory, or by an mmap'd file when a
+    path is given, so memory per node never grows. The first two slots
+    hold the write position and the sample count, which lets a spilled
+    buffer be reopened after a restart.
+    """
+
+    __slots__ = ("capacity", "width", "_mm", "_data")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None):
+        self.capacity = capacity
+        self.width = 1 + len(METRIC_FIELDS)
+        slots = 2 + capacity * self.width
+        self._mm = None
+        if path is None:
+            self._data = array("d", bytes(8 * slots))
+            return
+
+        path = Path(path)
+        size = 8 * slots
+        if not path.exists() or path.stat().st_size != size:
+            path.write_bytes(bytes(size))
+        with open(path, "r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), size)
+        self._data = memoryview(self._mm).cast("d")
+
+    def __len__(self):
+        return int(self._data[1])
+
+    def append(self, timestamp, values):
+        head = int(self._data[0])
+        base = 2 + head * self.width
+        self._data[base] = timestamp
+        for i, field in enumerate(METRIC_FIELDS, start=1):
+            self._data[base + i] = float(values.get(field, 0.0))
+        self._data[0] = (head + 1) % self.capacity
+        self._data[1] = min(len(self) + 1, self.capacity)
+
+    def series(self, field):
+        """Return (timestamps, values) oldest-first for one metric."""
+        col = 1 + METRIC_FIELDS.index(field)
+        count, head = len(self), int(self._data[0])
+        start = (head - count) % self.capacity
+        ts, vals = [], []
+        for i in range(count):
+            base = 2 + ((start + i) % self.capacity) * self.width
+            ts.append(self._data[base])
+            vals.append(self._data[base + col])
+        return ts, vals
+
+    def close(self):
+        if self._mm is not None:
+            self._data.release()
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+
+
+def _safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _totals(stats):
+    """Pull the cumulative counters we derive per-interval values from."""
+    collectors = stats.get("jvm", {}).get("gc", {}).get("collectors", {})
+    pools = stats.get("thread_pool", {})
+    indices = stats.get("indices", {})
+    return {
+        "gc_young_ms": collectors.get("young", {}).get("collection_time_in_millis", 0),
+        "gc_old_ms": collectors.get("old", {}).get("collection_time_in_millis", 0),
+        "rejected": sum(p.get("rejected", 0) for p in pools.values()),
+        "index_total": indices.get("indexing", {}).get("index_total", 0),
+        "query_total": indices.get("search", {}).get("query_total", 0),
+    }
+
+
+class NodeStatsCollector:
+    """
+    Samples _nodes/stats for the whole cluster on an interval.
+    One HTTP call per cycle (to the first node that answers) covers every node.
+
+    Several UI sessions can watch one collector: each `attach`es and keeps
+    `touch`ing it, and sampling stops once the last one detaches or goes quiet.
+    """
+
+    def __init__(self, get_instances, capacity=DEFAULT_CAPACITY, interval=DEFAULT_INTERVAL, spill=False,
+                 cluster=None):
+        self.get_instances = get_instances
+        self.capacity = capacity
+        self.interval = interval
+        self.spill = spill
+        self.cluster = cluster
+        self.auth = None
+        self.use_https = False
+        self.buffers = {}
+        self.last_error = None
+        self._prev = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._sessions = {}  # session id -> last seen (monotonic)
+
+    def configure(self, es_user, es_pass, use_https, interval=None, spill=None):
+        self.auth = (es_user, es_pass) if es_user else None
+        self.use_https = use_https
+        if interval:
+            self.interval = max(1, int(interval))
+        if spill is not None and bool(spill) != self.spill:
+            with self._lock:
+                self.spill = bool(spill)
+                self._respill()
+
+    def _respill(self):
+        """Move existing buffers to the current spill mode, keeping their samples."""
+        for name, old in list(self.buffers.items()):
+            if self.spill:
+                self._spill_path(name).unlink(missing_ok=True)  # don't resurrect an older run
+            new = self._new_buffer(name)
+            ts, _ = old.series(METRIC_FIELDS[0])
+            columns = {field: old.series(field)[1] for field in METRIC_FIELDS}
+            for i, t in enumerate(ts):
+                new.append(t, {field: columns[field][i] for field in METRIC_FIELDS})
+            old.close()
+            self.buffers[name] = new
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _spill_path(self, name):
+        return get_metrics_dir(self.cluster) / f"{_safe_name(name)}.ring"
+
+    def _new_buffer(self, name):
+        return RingBuffer(self.capacity, self._spill_path(name) if self.spill else None)
+
+    def _buffer(self, name):
+        buf = self.buffers.get(name)
+        if buf is None:
+            buf = self.buffers[name] = self._new_buffer(name)
+        return buf
+
+    def _fetch(self):
+        import requests
+
+        last_error = None
+        for node in self.get_instances() or []:
+            ip = node_endpoint(node)
+            try:
+                r = requests.get(
+                    node_url(node, self.use_https, STATS_PATH),
+                    auth=self.auth, timeout=REQUEST_TIMEOUT, verify=False,
+                )
+                if r.status_code == 200:
+                    return r.json().get("nodes", {})
+                last_error = f"{ip}: HTTP {r.status_code}"
+            except Exception as e:
+                last_error = f"{ip}: {e}"
+        raise RuntimeError(last_error or "no nodes configured")
+
+    def sample_once(self):
+        """Take one sample for every node. Returns the number of nodes sampled."""
+        nodes = self._fetch()
+        now = time.time()
+        with self._lock:
+            for stats in nodes.values():
+                name = stats.get("name", "")
+                totals = _totals(stats)
+                prev_ts, prev = self._prev.get(name, (None, None))
+                self._prev[name] = (now, totals)
+                if prev is None:
+                    continue  # need two samples for deltas / rates
+                elapsed = max(now - prev_ts, 1e-6)
+                self._buffer(name).append(now, {
+                    "heap_used_pct": stats.get("jvm", {}).get("mem", {}).get("heap_used_percent", 0),
+                    "gc_young_ms": max(0, totals["gc_young_ms"] - prev["gc_young_ms"]),
+                    "gc_old_ms": max(0, totals["gc_old_ms"] - prev["gc_old_ms"]),
+                    "rejected": max(0, totals["rejected"] - prev["rejected"]),
+                    "index_rate": max(0, totals["index_total"] - prev["index_total"]) / elapsed,
+                    "search_rate": max(0, totals["query_total"] - prev["query_total"]) / elapsed,
+                })
+        return len(nodes)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            with self._lock:
+                if self._sessions:
+                    self._sessions = {s: seen for s, seen in self._sessions.items() if started - seen < SESSION_TTL}
+                    if not self._sessions:
+                        self._thread = None  # every viewer left without pressing stop
+                        break
+            try:
+                self.sample_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="node-stats-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + REQUEST_TIMEOUT)
+        self._thread = None
+
+    def attach(self, session):
+        """Count `session` as a viewer and make sure sampling runs."""
+        with self._lock:
+            self._sessions[session] = time.monotonic()
+        self.start()
+
+    def touch(self, session):
+        """Keep an attached viewer alive (called on every chart refresh)."""
+        with self._lock:
+            if session in self._sessions:
+                self._sessions[session] = time.monotonic()
+
+    def detach(self, session):
+        """Drop a viewer; stops sampling when none is left. Returns the viewers still attached."""
+        with self._lock:
+            self._sessions.pop(session, None)
+            remaining = len(self._sessions)
+        if not remaining:
+            self.stop()
+        return remaining
+
+    def series(self, field):
+        """{node_name: (timestamps, values)} for one metric across all nodes."""
+        with self._lock:
+            return {name: buf.series(field) for name, buf in self.buffers.items()}
+
+
+_collectors = {}
+_collectors_lock = threading.Lock()
+
+
+def get_stats_collector(cluster):
+    """The process-wide NodeStatsCollector of one cluster (namespace); the monitor tab sets its nodes on start."""
+    with _collectors_lock:
+        collector = _collectors.get(cluster)
+        if collector is None:
+            collector = _collectors[cluster] = NodeStatsCollector(lambda: [], cluster=cluster)
+        return collector
@@ -0,0 +1,198 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from clusterblade.core.tracing import propagate, span
+from clusterblade.elastic.jvm import REMOTE_MEMLOCK_OVERRIDE
+from clusterblade.ssh.client import run_command
+
+DEFAULT_CONCURRENCY = 16
+PREFLIGHT_MODES = ("off", "check", "fix")
+
+MIN_MAP_COUNT = 262144
+MIN_NOFILE = 65535
+MIN_NPROC = 4096
+
+LIMITS_OVERRIDE = "/etc/systemd/system/elasticsearch.service.d/clusterblade-limits.conf"
+
+# Everything the bootstrap checks look at, in one round trip ("key=value" lines)
+CHECK_SCRIPT = (
+    "echo max_map_count=$(sysctl -n vm.max_map_count 2>/dev/null); "
+    "echo nofile=$(systemctl show elasticsearch -p LimitNOFILE --value 2>/dev/null); "
+    "echo nproc=$(systemctl show elasticsearch -p LimitNPROC --value 2>/dev/null); "
+    "echo memlock=$(systemctl show elasticsearch -p LimitMEMLOCK --value 2>/dev/null); "
+    "echo swap_kb=$(awk '/^SwapTotal:/ {print $2}' /proc/meminfo); "
+    "echo swappiness=$(sysctl -n vm.swappiness 2>/dev/null); "
+    "echo thp=$(sed -n 's/.*\\[\\(.*\\)\\].*/\\1/p' /sys/kernel/mm/transparent_hugepage/enabled 2>/dev/null)"
+)
+
+
+def _limit(value):
+    """systemd limit → int (`infinity` is unlimited), None if unknown."""
+    if value == "infinity":
+        return float("inf")
+    return int(value) if value.isdigit() else None
+
+
+def _at_least(minimum):
+    def ok(value, _facts):
+        number = _limit(value)
+        return number is not None and number >= minimum
+    return ok
+
+
+def _swap_ok(value, facts):
+    return value == "0" or facts.get("swappiness") in ("0", "1")
+
+
+# Recommended, but not ES bootstrap checks: a failure is a warning and never blocks a deploy
+ADVISORY = ("swap_kb", "thp")
+
+# key, description, expected, ok(value, facts), fix (shell, run as root)
+CHECKS = (
+    (
+        "max_map_count", "vm.max_map_count", f">= {MIN_MAP_COUNT}",
+        _at_least(MIN_MAP_COUNT),
+        f"sysctl -w vm.max_map_count={MIN_MAP_COUNT}\n"
+        f"echo 'vm.max_map_count={MIN_MAP_COUNT}' > /etc/sysctl.d/99-clusterblade.conf",
+    ),
+    (
+        "nofile", "file descriptors", f">= {MIN_NOFILE}",
+        _at_least(MIN_NOFILE),
+        f"echo 'elasticsearch - nofile {MIN_NOFILE}' > /etc/security/limits.d/99-clusterblade-nofile.conf",
+    ),
+    (
+        "nproc", "max threads", f">= {MIN_NPROC}",
+        _at_least(MIN_NPROC),
+        f"echo 'elasticsearch - nproc {MIN_NPROC}' > /etc/security/limits.d/99-clusterblade-nproc.conf",
+    ),
+    (
+        "swap_kb", "swap", "off (or swappiness <= 1)",
+        _swap_ok,
+        "swapoff -a\nsed -i.clusterblade '/\\sswap\\s/ s/^[^#]/#&/' /etc/fstab",
+    ),
+    (
+        "thp", "transparent huge pages", "madvise or never",
+        lambda v, _: v in ("madvise", "never"),
+        "echo madvise > /sys/kernel/mm/transparent_hugepage/enabled",
+    ),
+)
+
+MEMLOCK_CHECK = (
+    "memlock", "memlock limit", "unlimited (memory_lock)",
+    lambda v, _: _limit(v) == float("inf"),
+    f"mkdir -p $(dirname {REMOTE_MEMLOCK_OVERRIDE})\n"
+    f"printf '[Service]\\nLimitMEMLOCK=infinity\\n' > {REMOTE_MEMLOCK_OVERRIDE}",
+)
+
+# nofile / nproc also need the systemd unit limits (limits.d does not apply to services)
+_LIMITS_UNIT_FIX = (
+    f"mkdir -p $(dirname {LIMITS_OVERRIDE})\n"
+    f"printf '[Service]\\nLimitNOFILE={MIN_NOFILE}\\nLimitNPROC={MIN_NPROC}\\n' > {LIMITS_OVERRIDE}"
+)
+
+
+def parse_check_output(text):
+    return {k: v.strip() for k, v in (line.split("=", 1) for line in text.splitlines() if "=" in line)}
+
+
+def evaluate(facts, memory_lock=False):
+    """[{check, value, expected, ok, blocking, fix}] for one host's CHECK_SCRIPT output."""
+    checks = CHECKS + ((MEMLOCK_CHECK,) if memory_lock else ())
+    results = []
+    for key, description, expected, ok, fix in checks:
+        value = facts.get(key, "")
+        if key == "swap_kb" and value not in ("", "0"):
+            value = f"{int(value) // 1024} MB, swappiness {facts.get('swappiness', '?')}"
+        results.append({
+            "check": description,
+            "value": value or "?",
+            "expected": expected,
+            "ok": ok(facts.get(key, ""), facts),
+            "blocking": key not in ADVISORY,
+            "fix": fix,
+        })
+    return results
+
+
+def fix_script(results):
+    """One root shell script fixing every failed check, then reloading systemd."""
+    failed = [r for r in results if not r["ok"]]
+    if not failed:
+        return None
+    lines = ["set -e"] + [r["fix"] for r in failed]
+    if any(r["check"] in ("file descriptors", "max threads") for r in failed):
+        lines.append(_LIMITS_UNIT_FIX)
+    lines.append("systemctl daemon-reload")
+    return "\n".join(lines)
+
+
+def _sudo(script):
+    """Ship a multi-line script through one SSH command without quoting issues."""
+    encoded = base64.b64encode(script.encode()).decode()
+    return f"echo {encoded} | base64 -d | sudo sh"
+
+
+def run_preflight(nodes, ssh_user, ssh_pass, memory_lock=False, fix=False, max_workers=DEFAULT_CONCURRENCY):
+    """
+    Check (and optionally fix) the ES bootstrap prerequisites on every host
+    in parallel. Returns one report per host:
+      {"ip", "nodes", "results", "ok", "warnings", "fixed", "error"}
+    "ok" only covers the bootstrap checks; failed ADVISORY checks are listed in "warnings".
+    """
+    hosts = {}
+    for node in nodes:
+        hosts.setdefault(node.get("ip", ""), []).append(node.get("name", ""))
+    if not hosts:
+        return []
+
+    def check(ip):
+        report = {"ip": ip, "nodes": hosts[ip], "results": [], "ok": False, "warnings": [], "fixed": [], "error": None}
+        try:
+            with span("preflight.host", node=ip):
+                _, out, _ = run_command(ip, ssh_user, ssh_pass, CHECK_SCRIPT)
+                results = evaluate(parse_check_output(out), memory_lock)
+                script = fix_script(results) if fix else None
+                if script:
+                    code, _, err = run_command(ip, ssh_user, ssh_pass, _sudo(script), timeout=30)
+                    if code != 0:
+                        report["error"] = f"fix failed (exit {code}): {err}"
+                    report["fixed"] = [r["check"] for r in results if not r["ok"]]
+                    _, out, _ = run_command(ip, ssh_user, ssh_pass, CHECK_SCRIPT)
+                    results = evaluate(parse_check_output(out), memory_lock)
+                report["results"] = results
+                report["ok"] = all(r["ok"] for r in results if r["blocking"])
+                report["warnings"] = [r["check"] for r in results if not r["ok"] and not r["blocking"]]
+        except Exception as e:
+            report["error"] = str(e)
+        return report
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as pool:
+        return list(pool.map(propagate(check), hosts))
+
+
+def failing_nodes(reports):
+    """Names of nodes whose host failed a bootstrap check (warnings do not count)."""
+    return {name for report in reports if not report["ok"] for name in report["nodes"]}
+
+
+def format_report(reports):
+    """Per-host compliance table (monospace text)."""
+    if not reports:
+        return "⚠️ No nodes to check."
+    checks = [r["check"] for r in reports[0]["results"]] or [c[1] for c in CHECKS]
+    width = max(len(c) for c in checks)
+    lines = []
+    for report in reports:
+        icon = ("⚠️" if report["warnings"] else "✅") if report["ok"] else "❌"
+        lines.append(f"{icon} {report['ip']} ({', '.join(report['nodes'])})")
+        if report["warnings"]:
+            lines.append(f"   ⚠️ recommended, not blocking: {', '.join(report['warnings'])}")
+        if report["fixed"]:
+            lines.append(f"   🔧 fixed: {', '.join(report['fixed'])}")
+        if report["error"]:
+            lines.append(f"   ⚠️ {report['error']}")
+        for r in report["results"]:
+            mark = "ok  " if r["ok"] else ("FAIL" if r["blocking"] else "WARN")
+            lines.append(f"   {mark} {r['check']:<{width}}  {r['value']:<24} expected {r['expected']}")
+    passed = sum(r["ok"] for r in reports)
+    lines.append(f"\n🩺 Preflight: {passed}/{len(reports)} host(s) compliant.")
+    return "\n".join(lines)
@@ -0,0 +1,163 @@
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from clusterblade.core.health import HEALTH
+from clusterblade.ssh import client as ssh_client
+
+DEFAULT_TIMEOUT = 3.0   # seconds, for hosts without RTT history
+MIN_TIMEOUT = 1.0       # floor for learned timeouts (scheduler / GC jitter)
+MAX_TIMEOUT = 10.0      # ceiling after repeated timeouts
+SCAN_CONCURRENCY = 512  # connects in flight at once (file descriptors)
+BANNER_TIMEOUT = 2.0
+
+
+class RttHistory:
+    """
+    Smoothed TCP connect RTT per host (Jacobson/Karels, as in TCP's RTO).
+
+    timeout(host) is srtt + 4·rttvar, clamped to [MIN_TIMEOUT, MAX_TIMEOUT];
+    every timeout doubles it until the host answers again, so a slow host is
+    not reported down for good because of one tight estimate.
+    """
+
+    def __init__(self, default=DEFAULT_TIMEOUT, minimum=MIN_TIMEOUT, maximum=MAX_TIMEOUT):
+        self.default, self.minimum, self.maximum = default, minimum, maximum
+        self._hosts = {}  # host → [srtt, rttvar, backoff]
+        self._lock = threading.Lock()
+
+    def record(self, host, rtt):
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                self._hosts[host] = [rtt, rtt / 2, 1]
+            else:
+                srtt, rttvar, _ = entry
+                entry[1] = 0.75 * rttvar + 0.25 * abs(srtt - rtt)
+                entry[0] = 0.875 * srtt + 0.125 * rtt
+                entry[2] = 1
+
+    def record_timeout(self, host):
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is not None:
+                entry[2] = min(entry[2] * 2, 64)
+
+    def _timeout(self, entry):
+        if entry is None:
+            return self.default
+        srtt, rttvar, backoff = entry
+        return min(self.maximum, max(self.minimum, (srtt + 4 * rttvar) * backoff))
+
+    def timeout(self, host):
+        with self._lock:
+            return self._timeout(self._hosts.get(host))
+
+    def snapshot(self):
+        """{host: {"srtt", "rttvar", "timeout"}} (seconds)."""
+        with self._lock:
+            return {
+                host: {"srtt": entry[0], "rttvar": entry[1], "timeout": self._timeout(entry)}
+                for host, entry in self._hosts.items()
+            }
+
+
+# Shared by the scanner and status.check_ssh_port
+RTT_HISTORY = RttHistory()
+
+
+def check_port(host, port=None, timeout=None):
+    """
+    Blocking TCP connect with a per-socket timeout (never the process-wide
+    default). Learns from and feeds RTT_HISTORY and the host's circuit breaker;
+    returns True when it connects, False at once while the circuit is open.
+    """
+    if not HEALTH.allow(host):
+        return False
+    port = port or ssh_client.SSH_PORT
+    timeout = timeout or RTT_HISTORY.timeout(host)
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            RTT_HISTORY.record(host, time.perf_counter() - started)
+    except socket.timeout as e:
+        RTT_HISTORY.record_timeout(host)
+        HEALTH.record_failure(host, e)
+        return False
+    except OSError as e:
+        HEALTH.record_failure(host, e)
+        return False
+    HEALTH.record_success(host)
+    return True
+
+
+async def _probe(host, port, timeout, read_banner, limit):
+    result = {"ip": host, "reachable": False, "rtt": None, "banner": None, "error": None}
+    if not HEALTH.allow(host):
+        result["error"] = f"circuit open, retry in {HEALTH.retry_in(host):.0f}s"
+        return result
+    async with limit:
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except asyncio.TimeoutError:
+            RTT_HISTORY.record_timeout(host)
+            result["error"] = f"timeout after {timeout:.2f}s"
+            HEALTH.record_failure(host, result["error"])
+            return result
+        except OSError as e:
+            result["error"] = e.strerror or str(e)
+            HEALTH.record_failure(host, result["error"])
+            return result
+
+        rtt = time.perf_counter() - started
+        RTT_HISTORY.record(host, rtt)
+        HEALTH.record_success(host)
+        result.update(reachable=True, rtt=rtt)
+        try:
+            if read_banner:
+                # sshd speaks first: "SSH-2.0-OpenSSH_9.6\r\n"
+                line = await asyncio.wait_for(reader.readline(), BANNER_TIMEOUT)
+                result["banner"] = line.decode(errors="replace").strip() or None
+                if not (result["banner"] or "").startswith("SSH-"):
+                    result.update(reachable=False, error="no SSH banner")
+        except (asyncio.TimeoutError, OSError):
+            result.update(reachable=False, error="no SSH banner")
+        finally:
+            writer.close()
+    return result
+
+
+async def _scan(hosts, port, read_banner, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(_probe(h, port, RTT_HISTORY.timeout(h), read_banner, limit) for h in hosts))
+
+
+def scan_hosts(hosts, port=None, read_banner=False, concurrency=SCAN_CONCURRENCY):
+    """
+    Connect to every host at once (non-blocking sockets on one event loop)
+    with a per-host timeout learned from its RTT history, so a sweep takes
+    about one RTT plus the slowest timeout instead of one timeout per host.
+    Hosts whose circuit is open (core.health) are reported down without a
+    connect. Returns {host: {"ip", "reachable", "rtt", "banner", "error"}};
+    with read_banner, a host only counts as SSH when it sends an "SSH-" banner.
+    """
+    hosts = list(dict.fromkeys(h for h in hosts if h))  # several nodes may share one host
+    if not hosts:
+        return {}
+    port = port or ssh_client.SSH_PORT
+    scan = _scan(hosts, port, read_banner, concurrency)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        results = asyncio.run(scan)
+    else:  # called from inside an event loop (e.g. an async handler): use a private one
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            results = pool.submit(asyncio.run, scan).result()
+    return {r["ip"]: r for r in results}
+
+
+def scan_nodes(nodes, read_banner=False, concurrency=SCAN_CONCURRENCY):
+    """scan_hosts() over node dicts / Nodes; returns {ip: result}."""
+    return scan_hosts([n.get("ip", "") for n in nodes], read_banner=read_banner, concurrency=concurrency)
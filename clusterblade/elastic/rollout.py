@@ -0,0 +1,381 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from clusterblade.core.jobs import JobKind
+from clusterblade.core.models import topology_of
+from clusterblade.core.tracing import propagate, span, traced
+from clusterblade.elastic.deploy import prepare_deploy, render_node
+from clusterblade.elastic.endpoints import node_http_port, node_url
+from clusterblade.elastic.jvm import MEMLOCK_OVERRIDE, REMOTE_JVM_OPTIONS, REMOTE_MEMLOCK_OVERRIDE
+from clusterblade.elastic.status import REQUEST_TIMEOUT, is_node_in_cluster
+from clusterblade.elastic.tuning import es_node_roles
+from clusterblade.ssh.client import session
+
+REMOTE_CONFIG = "/etc/elasticsearch/elasticsearch.yml"
+PREV_SUFFIX = ".clusterblade-prev"  # the file a staged upload replaced
+NEW_SUFFIX = ".clusterblade-new"    # upload target, renamed into place
+
+CANARY_SIZE = 1        # nodes in the first wave
+WAVE_SIZE = 8          # nodes restarted at once in later waves
+REJOIN_TIMEOUT = 300   # seconds for a node to be active and back in the cluster
+POLL_INTERVAL = 5.0
+
+
+class WaveFailed(RuntimeError):
+    """
+    A wave could not be rolled out: the cluster was not healthy before it, a
+    node was blocked by preflight, or nodes did not come back (and were rolled
+    back). `failed` has the affected node names, `logs` the wave's log lines.
+    """
+
+    def __init__(self, key, failed, reason, logs):
+        self.key = key
+        self.failed = failed
+        self.logs = logs
+        super().__init__(f"{key}: {reason}; later waves halted")
+
+
+# ---------- Planning ----------
+
+def master_eligible(node, enable_tuning=True):
+    """Matches the rendered node.roles: no roles line (ES's all-roles default) is master-eligible too."""
+    roles = es_node_roles(node) if enable_tuning else None
+    return roles is None or "master" in roles
+
+
+def plan_waves(topology, canary=CANARY_SIZE, wave_size=WAVE_SIZE, enable_tuning=True):
+    """
+    Split the nodes into waves of node names: a canary wave (non-master
+    nodes preferred), then waves of up to wave_size. A wave never has two
+    nodes on one host (they share the service and config path) nor two
+    master-eligible nodes, so restarting it cannot cost the cluster its quorum.
+    """
+    nodes = list(topology)
+    ordered = [n for n in nodes if not master_eligible(n, enable_tuning)]
+    ordered += [n for n in nodes if master_eligible(n, enable_tuning)]
+
+    waves, size = [], max(1, canary)
+    while ordered:
+        wave, hosts, has_master = [], set(), False
+        for node in ordered:
+            if len(wave) >= size:
+                break
+            is_master = master_eligible(node, enable_tuning)
+            if node["ip"] in hosts or (is_master and has_master):
+                continue
+            wave.append(node)
+            hosts.add(node["ip"])
+            has_master = has_master or is_master
+        picked = {n["name"] for n in wave}
+        ordered = [n for n in ordered if n["name"] not in picked]
+        waves.append([n["name"] for n in wave])
+        size = max(1, wave_size)
+    # canary order was only for picking the canary; later waves follow instances.yaml
+    position = {n["name"]: i for i, n in enumerate(nodes)}
+    return [waves[0]] + [sorted(w, key=position.get) for w in waves[1:]] if waves else []
+
+
+def wave_keys(waves):
+    """Step keys: "canary", "wave-1", "wave-2", ..."""
+    return ["canary" if i == 0 else f"wave-{i}" for i in range(len(waves))]
+
+
+def format_plan(waves):
+    return "🗺️ Rollout plan: " + " → ".join(
+        f"{key} [{', '.join(names)}]" for key, names in zip(wave_keys(waves), waves)
+    )
+
+
+# ---------- Staging and rollback on one node ----------
+
+def _out(ssh, cmd):
+    """(exit code, stdout) of a command, waiting for it."""
+    _, stdout, _ = ssh.exec_command(cmd)
+    out = stdout.read().decode(errors="replace")
+    return stdout.channel.recv_exit_status(), out.strip()
+
+
+def _check(ssh, cmd):
+    code, out = _out(ssh, cmd)
+    if code != 0:
+        raise RuntimeError(f"`{cmd}` failed (exit {code}) {out}".strip())
+
+
+def stage_file(ssh, sftp, remote, local=None, content=None):
+    """
+    Replace `remote` atomically: upload next to it, keep the current file as
+    remote + PREV_SUFFIX, then rename over it. With neither local nor content
+    the file is removed (after the same backup). Returns (remote, existed) for
+    restore_files().
+    """
+    existed = _out(ssh, f"test -e {remote}")[0] == 0
+    if existed:
+        _check(ssh, f"cp -p {remote} {remote}{PREV_SUFFIX}")
+    if local is None and content is None:
+        if existed:
+            _check(ssh, f"rm -f {remote}")
+        return remote, existed
+
+    tmp = f"{remote}{NEW_SUFFIX}"
+    _check(ssh, f"mkdir -p $(dirname {remote})")
+    with span("sftp.put", path=remote):
+        if local is not None:
+            sftp.put(str(local), tmp)
+        else:
+            with sftp.open(tmp, "w") as f:
+                f.write(content)
+    sftp.posix_rename(tmp, remote)  # rename(2): readers see the old or the new file, never half of one
+    return remote, existed
+
+
+def restore_files(ssh, staged):
+    """Undo stage_file(): put every PREV_SUFFIX copy back (atomically) or remove files that were new."""
+    for remote, existed in reversed(staged):
+        if existed:
+            _check(ssh, f"cp -p {remote}{PREV_SUFFIX} {remote}{NEW_SUFFIX} && mv -f {remote}{NEW_SUFFIX} {remote}")
+        else:
+            _check(ssh, f"rm -f {remote}")
+
+
+def _main_pid(ssh):
+    return _out(ssh, "systemctl show -p MainPID --value elasticsearch")[1] or "0"
+
+
+def restart_service(ssh):
+    """Queue a restart without blocking on it (ES can take minutes to start); returns the PID it replaces."""
+    pid = _main_pid(ssh)
+    _check(ssh, "sudo systemctl daemon-reload && sudo systemctl restart --no-block elasticsearch")
+    _out(ssh, "sudo systemctl enable elasticsearch")
+    return pid
+
+
+def wait_for_rejoin(ssh, ctx, node, old_pid, timeout):
+    """
+    Poll until the service is active under a new PID (not the process the
+    restart replaces) and the node is listed in _cat/nodes, or until timeout.
+    Returns (True, detail) or (False, reason); a failed unit fails at once.
+    """
+    use_https = _use_https(ctx, node)
+    started = time.monotonic()
+    last = "no answer"
+    while True:
+        _, state = _out(ssh, "systemctl is-active elasticsearch")
+        if state == "failed":
+            return False, "the elasticsearch service failed to start"
+        if state == "active" and _main_pid(ssh) not in ("0", old_pid):
+            if is_node_in_cluster(node["ip"], ctx["es_user"], ctx["es_pass"], use_https,
+                                  node_http_port(node), node["name"]):
+                return True, f"rejoined after {time.monotonic() - started:.0f}s"
+            last = "service active, node not in _cat/nodes"
+        else:
+            last = f"service {state or 'unknown'}"
+        if time.monotonic() - started >= timeout:
+            return False, f"not back within {timeout:.0f}s ({last})"
+        time.sleep(POLL_INTERVAL)
+
+
+def _use_https(ctx, node):
+    return bool(ctx["enable_http"] and node.has_role(*(ctx["http_groups"] or [])))
+
+
+def cluster_health(ctx):
+    """_cluster/health from the first node that answers, else None."""
+    import requests
+
+    for node in ctx["topology"]:
+        try:
+            r = requests.get(
+                node_url(node, _use_https(ctx, node), "/_cluster/health"),
+                auth=(ctx["es_user"], ctx["es_pass"]), timeout=REQUEST_TIMEOUT, verify=False,
+            )
+            if r.status_code == 200:
+                return r.json()
+        except Exception:
+            continue
+    return None
+
+
+def wait_for_green(ctx, timeout):
+    """
+    Poll _cluster/health until it is green, or yellow with no initializing or
+    relocating shards (replicas that are merely unassigned are tolerated), or
+    until timeout. Returns (True, detail) or (False, reason).
+    """
+    started = time.monotonic()
+    while True:
+        health = cluster_health(ctx)
+        if health is None:
+            last = "no node answered _cluster/health"
+        else:
+            status = health.get("status")
+            moving = health.get("initializing_shards", 0) + health.get("relocating_shards", 0)
+            if status == "green" or (status == "yellow" and not moving):
+                return True, f"cluster {status}"
+            last = (f"cluster {status}, {health.get('initializing_shards', 0)} initializing / "
+                    f"{health.get('relocating_shards', 0)} relocating shards")
+        if time.monotonic() - started >= timeout:
+            return False, f"not healthy within {timeout:.0f}s ({last})"
+        time.sleep(POLL_INTERVAL)
+
+
+def rollout_node(ctx, node):
+    """
+    Stage, restart and verify one node; roll it back on failure.
+    Returns (ok, log lines).
+    """
+    ip, name = node["ip"], node["name"]
+    logs = [f"⚙️ Rolling out config to {name} ({ip})..."]
+    with span("rollout.node", node=name, ip=ip):
+        cfg_path, jvm_path = render_node(ctx, node)
+        logs.append(f"📝 Generated config for {name} at {cfg_path}")
+
+        with session(ip, ctx["ssh_user"], ctx["ssh_pass"], timeout=10) as ssh:
+            sftp = ssh.open_sftp()
+            staged = []
+            try:
+                with span("stage"):
+                    try:
+                        staged.append(stage_file(ssh, sftp, REMOTE_CONFIG, local=cfg_path))
+                        if jvm_path:
+                            staged.append(stage_file(ssh, sftp, REMOTE_JVM_OPTIONS, local=jvm_path))
+                        staged.append(stage_file(
+                            ssh, sftp, REMOTE_MEMLOCK_OVERRIDE,
+                            content=MEMLOCK_OVERRIDE if ctx["memory_lock"] else None,
+                        ))
+                    except Exception:
+                        restore_files(ssh, staged)  # nothing was restarted yet
+                        raise
+                logs.append(f"📤 Staged config → {ip}:{REMOTE_CONFIG} (previous kept as {PREV_SUFFIX})")
+
+                with span("restart"):
+                    old_pid = restart_service(ssh)
+                with span("verify"):
+                    ok, detail = wait_for_rejoin(ssh, ctx, node, old_pid, ctx["rejoin_timeout"])
+                if ok:
+                    logs.append(f"✅ {name} is back: {detail}.")
+                    return True, logs
+
+                logs.append(f"⚠️ {name}: {detail}. Rolling back to the previous config...")
+                with span("rollback"):
+                    restore_files(ssh, staged)
+                    old_pid = restart_service(ssh)
+                    back, back_detail = wait_for_rejoin(ssh, ctx, node, old_pid, ctx["rejoin_timeout"])
+                logs.append(
+                    f"↩️ {name} rolled back and is back: {back_detail}." if back
+                    else f"🆘 {name} rolled back but still down: {back_detail}. Check it by hand."
+                )
+                return False, logs
+            finally:
+                sftp.close()
+
+
+def rollout_wave(ctx, key, names):
+    """
+    Roll out one wave, its nodes in parallel, once the cluster has recovered
+    from the previous one. Returns log lines; raises WaveFailed if the
+    cluster stays unhealthy, a node is blocked by preflight, or a node did
+    not come back (after rolling it back).
+    """
+    logs = [f"🌊 {key}: {', '.join(names)}"]
+    blocked = [name for name in names if name in ctx["blocked"]]
+    if blocked:
+        logs.append(f"⛔ {', '.join(blocked)}: preflight failed, a restart would not pass the bootstrap checks.")
+        raise WaveFailed(key, blocked, f"{', '.join(blocked)} blocked by preflight (nothing restarted)", logs)
+
+    # never restart while shards are still recovering: a primary and its replica could go down together
+    with span("rollout.health", wave=key):
+        healthy, detail = wait_for_green(ctx, ctx["rejoin_timeout"])
+    if not healthy:
+        logs.append(f"⚠️ Not starting {key}: {detail}.")
+        raise WaveFailed(key, [], f"cluster not healthy before the wave ({detail})", logs)
+    logs.append(f"💚 {detail}, starting {key}.")
+    nodes = [ctx["topology"].node(name) for name in names]
+
+    def run(node):
+        try:
+            return node["name"], *rollout_node(ctx, node)
+        except Exception as e:
+            return node["name"], False, [f"❌ {node['name']} ({node['ip']}): {e}"]
+
+    failed = []
+    with span("rollout.wave", wave=key), ThreadPoolExecutor(max_workers=len(nodes)) as pool:
+        for name, ok, lines in pool.map(propagate(run), nodes):
+            logs.extend(lines)
+            if not ok:
+                failed.append(name)
+    if failed:
+        raise WaveFailed(key, failed, f"{', '.join(failed)} did not come back (rolled back)", logs)
+    logs.append(f"✅ {key} done ({len(nodes)} node(s) back in the cluster).\n")
+    return logs
+
+
+def _with_rollout_settings(ctx, es_user, es_pass, rejoin_timeout):
+    ctx.update(es_user=es_user or "", es_pass=es_pass or "", rejoin_timeout=rejoin_timeout or REJOIN_TIMEOUT)
+    return ctx
+
+
+@traced("rollout")
+def rollout_cluster(cluster_state, ssh_user, ssh_pass, es_user="elastic", es_pass="", canary=CANARY_SIZE,
+                    wave_size=WAVE_SIZE, rejoin_timeout=REJOIN_TIMEOUT, progress_callback=None):
+    """
+    Staged deploy: a canary wave, then parallel waves. Each node's config is
+    swapped in atomically, the node restarted and checked (service active,
+    node rejoined) within rejoin_timeout; a node that does not come back is
+    rolled back and the remaining waves are not started.
+    For long runs prefer the "rollout" background job.
+    """
+    ctx, logs = prepare_deploy(cluster_state, ssh_user, ssh_pass)
+    _with_rollout_settings(ctx, es_user, es_pass, rejoin_timeout)
+    waves = plan_waves(ctx["topology"], canary, wave_size, ctx["enable_tuning"])
+    logs.append(format_plan(waves))
+
+    for i, (key, names) in enumerate(zip(wave_keys(waves), waves)):
+        try:
+            logs.extend(rollout_wave(ctx, key, names))
+        except WaveFailed as e:
+            logs.extend(e.logs)
+            logs.append(f"❌ {e}")
+            logs.append(f"⏹️ Rollout halted: {len(waves) - i - 1} wave(s) not started.")
+            return "\n".join(logs)
+        if progress_callback:
+            progress_callback(f"✅ {key} done")
+
+    logs.append("🎯 Rollout completed: every node came back and rejoined the cluster.")
+    return "\n".join(logs)
+
+
+# ---------- Background job (core.jobs) ----------
+# One step per wave; a failed wave halts the job and resuming retries it.
+# params: {"cluster_state", "ssh_user", "es_user", "waves": [[names]], "rejoin_timeout"}; secrets: {"ssh_pass", "es_pass"}
+
+def _job_prepare(params, secrets, pending):
+    waves = dict(zip(wave_keys(params["waves"]), params["waves"]))
+    only = {name for key in pending for name in waves[key]}
+    ctx, logs = prepare_deploy(params["cluster_state"], params["ssh_user"], secrets.get("ssh_pass"), only=only)
+    ctx["waves"] = waves
+    logs.insert(0, format_plan(params["waves"]))
+    return _with_rollout_settings(ctx, params["es_user"], secrets.get("es_pass"), params["rejoin_timeout"]), logs
+
+
+def _job_step(ctx, key):
+    return rollout_wave(ctx, key, ctx["waves"][key])
+
+
+ROLLOUT_JOB = JobKind(
+    title="Staged config rollout",
+    steps=lambda params: wave_keys(params["waves"]),
+    prepare=_job_prepare,
+    run_step=_job_step,
+    halt_on_failure=True,
+)
+
+
+def submit_rollout(manager, cluster, cluster_state, ssh_user, ssh_pass, es_user="elastic", es_pass="",
+                   canary=CANARY_SIZE, wave_size=WAVE_SIZE, rejoin_timeout=REJOIN_TIMEOUT):
+    """Plan the waves and submit a "rollout" job; returns the job ID."""
+    waves = plan_waves(topology_of(cluster_state), canary, wave_size, cluster_state.get("enable_tuning", True))
+    return manager.submit(
+        "rollout", cluster,
+        {"cluster_state": cluster_state, "ssh_user": ssh_user, "es_user": es_user, "waves": waves,
+         "rejoin_timeout": rejoin_timeout},
+        {"ssh_pass": ssh_pass, "es_pass": es_pass},
+    )
@@ -0,0 +1,135 @@
+import re
+import statistics
+import threading
+import time
+from clusterblade.elastic.endpoints import node_endpoint, node_url
+from clusterblade.elastic.status import PROBE_TIMINGS, REQUEST_TIMEOUT
+
+DEFAULT_INTERVAL = 60        # seconds between hot_threads / thread_pool pulls
+LATENCY_FACTOR = 3.0         # p90 latency this many times the cluster median
+LATENCY_FLOOR = 0.05         # ...and at least this slow (seconds)
+REJECTION_FACTOR = 3.0       # rejection rate this many times the cluster median
+REJECTION_FLOOR = 0.01       # ...and at least 1% of completed tasks
+HOT_THREAD_CPU = 90.0        # a single thread burning this much CPU
+
+# "::: {node-1}{id}{...}" section headers of _nodes/hot_threads
+_HOT_NODE_RE = re.compile(r"^:::\s*\{([^}]*)\}", re.MULTILINE)
+# "   87.3% [cpu=87.3%, other=0.0%] (436.5ms out of 500ms) cpu usage by thread '...'"
+_HOT_CPU_RE = re.compile(r"^\s*([\d.]+)% \[cpu=")
+
+
+def parse_hot_threads(text):
+    """Return {node_name: hottest thread CPU %} from a hot_threads response."""
+    hottest = {}
+    sections = _HOT_NODE_RE.split(text)
+    # split() gives [preamble, name1, body1, name2, body2, ...]
+    for name, body in zip(sections[1::2], sections[2::2]):
+        cpus = [float(m.group(1)) for m in map(_HOT_CPU_RE.match, body.splitlines()) if m]
+        hottest[name] = max(cpus, default=0.0)
+    return hottest
+
+
+def rejection_rates(rows):
+    """Per-node rejected / (completed + rejected) from _cat/thread_pool JSON rows."""
+    totals = {}
+    for row in rows:
+        rejected, completed = totals.get(row.get("node_name", ""), (0, 0))
+        totals[row.get("node_name", "")] = (
+            rejected + int(row.get("rejected") or 0),
+            completed + int(row.get("completed") or 0),
+        )
+    return {
+        name: (rejected / (rejected + completed)) if (rejected + completed) else 0.0
+        for name, (rejected, completed) in totals.items()
+    }
+
+
+def find_outliers(values, factor, floor):
+    """Keys whose value is both above `floor` and `factor` × the median of all values."""
+    if len(values) < 2:
+        return {}
+    median = statistics.median(values.values())
+    return {
+        key: value for key, value in values.items()
+        if value >= floor and value > factor * median
+    }
+
+
+class SlowNodeDetector:
+    """
+    Flags degraded nodes before they drop out of the cluster.
+
+    Latency comes from the probe timings the status poller already records;
+    hot threads and thread-pool rejections are pulled from the cluster at
+    most once per `interval` seconds (one request each, answered for all nodes).
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.hot_threads = {}
+        self.rejections = {}
+        self.last_pull = 0.0
+        self.last_error = None
+
+    def pull(self, instances, es_user, es_pass, use_https, force=False):
+        if not force and time.monotonic() - self.last_pull < self.interval:
+            return
+        import requests
+
+        self.last_pull = time.monotonic()
+        auth = (es_user, es_pass) if es_user else None
+        for node in instances:
+            ip = node_endpoint(node)
+            try:
+                hot = requests.get(
+                    node_url(node, use_https, "/_nodes/hot_threads?threads=3&ignore_idle_threads=true"),
+                    auth=auth, timeout=REQUEST_TIMEOUT * 3, verify=False,
+                )
+                pools = requests.get(
+                    node_url(node, use_https, "/_cat/thread_pool?format=json&h=node_name,name,rejected,completed"),
+                    auth=auth, timeout=REQUEST_TIMEOUT, verify=False,
+                )
+                if hot.status_code == 200 and pools.status_code == 200:
+                    self.hot_threads = parse_hot_threads(hot.text)
+                    self.rejections = rejection_rates(pools.json())
+                    self.last_error = None
+                    return
+            except Exception as e:
+                self.last_error = f"{ip}: {e}"
+        self.last_error = self.last_error or "no node answered hot_threads / thread_pool"
+
+    def evaluate(self, instances):
+        """Return {node_name: [reason, ...]} for every flagged node."""
+        p90 = {}
+        for node in instances:
+            pct = PROBE_TIMINGS.percentiles(node_endpoint(node))
+            if pct:
+                p90[node.get("name", "")] = pct[90]
+
+        flagged = {}
+        if p90:
+            median = statistics.median(p90.values())
+            for name, value in find_outliers(p90, LATENCY_FACTOR, LATENCY_FLOOR).items():
+                flagged.setdefault(name, []).append(
+                    f"probe p90 {value * 1000:.0f}ms ({value / median:.1f}× median)" if median
+                    else f"probe p90 {value * 1000:.0f}ms"
+                )
+        for name, rate in find_outliers(self.rejections, REJECTION_FACTOR, REJECTION_FLOOR).items():
+            flagged.setdefault(name, []).append(f"{rate:.1%} thread-pool rejections")
+        for name, cpu in self.hot_threads.items():
+            if cpu >= HOT_THREAD_CPU:
+                flagged.setdefault(name, []).append(f"hot thread at {cpu:.0f}% CPU")
+        return flagged
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_slow_node_detector(cluster):
+    """The process-wide SlowNodeDetector of one cluster (namespace), shared by every monitor session."""
+    with _detectors_lock:
+        detector = _detectors.get(cluster)
+        if detector is None:
+            detector = _detectors[cluster] = SlowNodeDetector()
+        return detector
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from clusterblade.core.tracing import propagate, span
+from clusterblade.elastic.endpoints import es_url, node_http_port
+from clusterblade.elastic.reachability import check_port, scan_nodes
+
+REQUEST_TIMEOUT = 3  # seconds
+TIMING_WINDOW = 50   # probe timings kept per node
+POLL_WORKERS = 64    # concurrent node probes
+
+
+class ProbeTimings:
+    """Rolling window of ES probe latencies (seconds) per node endpoint (`ip:port`)."""
+
+    def __init__(self, window=TIMING_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def endpoints(self):
+        with self._lock:
+            return sorted(self._samples)
+
+    def samples(self, endpoint):
+        with self._lock:
+            return list(self._samples.get(endpoint, ()))
+
+    def percentiles(self, endpoint, points=(50, 90, 99)):
+        """Nearest-rank percentiles for one node, or None if it has no samples."""
+        values = sorted(self.samples(endpoint))
+        if not values:
+            return None
+        return {p: values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] for p in points}
+
+
+# Filled by every probe the monitor makes
+PROBE_TIMINGS = ProbeTimings()
+
+
+class NodeStates:
+    """Last probe result per cluster and node, so readers like /metrics never probe again."""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def record(self, cluster, node, state):
+        entry = {"ip": node.get("ip", ""), **state, "ts": time.time()}
+        with self._lock:
+            self._states.setdefault(cluster, {})[node.get("name", "")] = entry
+
+    def snapshot(self):
+        """{cluster: {node name: {ip, vm_up, es_up, in_cluster, ts}}} (a copy)."""
+        with self._lock:
+            return {cluster: {name: dict(s) for name, s in nodes.items()} for cluster, nodes in self._states.items()}
+
+
+NODE_STATES = NodeStates()
+
+
+def check_ssh_port(ip: str) -> bool:
+    """TCP connect to the node's SSH port, with a per-socket timeout learned from its RTT history."""
+    return check_port(ip)
+
+
+def check_es_http(ip: str, user: str, pwd: str, use_https: bool, port: int) -> bool:
+    import requests
+
+    url = es_url(ip, port, use_https)
+    endpoint = url.split("://", 1)[1]
+    started = time.perf_counter()
+    try:
+        r = requests.get(url, auth=(user, pwd), timeout=REQUEST_TIMEOUT, verify=False)
+        PROBE_TIMINGS.record(endpoint, time.perf_counter() - started)
+        return r.status_code == 200 or r.status_code == 401
+    except requests.Timeout:
+        # a stalled node must still show up in its percentiles
+        PROBE_TIMINGS.record(endpoint, max(time.perf_counter() - started, REQUEST_TIMEOUT))
+        return False
+    except Exception:
+        PROBE_TIMINGS.record(endpoint, time.perf_counter() - started)
+        return False
+
+
+def is_node_in_cluster(ip: str, es_user: str, es_pass: str, use_https: bool,
+                       port: int, name: str | None = None) -> bool:
+    """
+    Return True if this node is listed in _cat/nodes output.
+    Matched by node name when given (several nodes may share one host), else by IP.
+    """
+    import requests
+
+    url = es_url(ip, port, use_https, "/_cat/nodes?h=ip,name&format=json")
+    try:
+        r = requests.get(url, auth=(es_user, es_pass), timeout=REQUEST_TIMEOUT, verify=False)
+        if r.status_code == 200:
+            if name:
+                return name in {n.get("name") for n in r.json()}
+            return ip in {n.get("ip") for n in r.json()}
+        return False
+    except Exception:
+        return False
+
+
+def probe_node(ip: str, es_user: str, es_pass: str, use_https: bool,
+               port: int, name: str | None = None, vm_up: bool | None = None) -> dict:
+    """
+    VM reachability, ES liveness and cluster membership for one node.
+    Pass vm_up when reachability is already known (e.g. from a scan_nodes sweep).
+    """
+    with span("probe", node=name or ip):
+        if vm_up is None:
+            with span("probe.ssh"):
+                vm_up = check_ssh_port(ip)
+        with span("probe.http"):
+            es_up = check_es_http(ip, es_user, es_pass, use_https, port) if vm_up else False
+        with span("probe.cluster"):
+            in_cluster = is_node_in_cluster(ip, es_user, es_pass, use_https, port, name) if es_up else False
+    return {"vm_up": vm_up, "es_up": es_up, "in_cluster": in_cluster}
+
+
+def probe_instance(node, es_user, es_pass, use_https, vm_up=None) -> dict:
+    """probe_node() for a node dict / Node, on its allocated HTTP port."""
+    return probe_node(
+        node.get("ip", ""), es_user, es_pass, use_https,
+        port=node_http_port(node), name=node.get("name") or None, vm_up=vm_up,
+    )
+
+
+def _reachable(nodes):
+    """One async connect sweep over every distinct host → {ip: vm_up}."""
+    with span("reachability", hosts=len({n.get("ip", "") for n in nodes})):
+        return {ip: r["reachable"] for ip, r in scan_nodes(nodes).items()}
+
+
+def probe_instances(instances, es_user, es_pass, use_https, max_workers=POLL_WORKERS, cluster=None):
+    """
+    probe_instance() for every node concurrently; results in node order.
+    With `cluster`, the results are also cached in NODE_STATES.
+    """
+    if not instances:
+        return []
+    reachable = _reachable(instances)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(instances))) as pool:
+        probe = propagate(
+            lambda node: probe_instance(node, es_user, es_pass, use_https, reachable.get(node.get("ip", ""), False))
+        )
+        states = list(pool.map(probe, instances))
+    if cluster is not None:
+        for node, state in zip(instances, states):
+            NODE_STATES.record(cluster, node, state)
+    return states
+
+
+def poll_clusters(clusters, es_user, es_pass, use_https, max_workers=POLL_WORKERS):
+    """
+    Probe every node of several clusters concurrently.
+    `clusters` maps cluster name → instances; returns cluster name → list of
+    {"name", "ip", "vm_up", "es_up", "in_cluster"} in node order.
+    """
+    jobs = [(cluster, node) for cluster, instances in clusters.items() for node in instances]
+    if not jobs:
+        return {}
+
+    reachable = _reachable([node for _, node in jobs])
+
+    def probe(job):
+        _, node = job
+        ip = node.get("ip", "")
+        return {
+            "name": node.get("name", ""), "ip": ip,
+            **probe_instance(node, es_user, es_pass, use_https, reachable.get(ip, False)),
+        }
+
+    results = {cluster: [] for cluster in clusters}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        for (cluster, node), row in zip(jobs, pool.map(propagate(probe), jobs)):
+            results[cluster].append(row)
+            NODE_STATES.record(cluster, node, {k: row[k] for k in ("vm_up", "es_up", "in_cluster")})
+    return results
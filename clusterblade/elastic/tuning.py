@@ -0,0 +1,101 @@
+from clusterblade.core.models import Node
+
+# Data tiers, hottest first; a node's tier comes from roles like `data_warm`, else its name
+TIERS = ("hot", "warm", "cold", "frozen")
+
+# Elasticsearch node.roles values a YAML `roles:` list may use directly
+ES_ROLES = {
+    "master", "data", "data_content", "data_hot", "data_warm", "data_cold", "data_frozen",
+    "ingest", "ml", "remote_cluster_client", "transform", "voting_only",
+}
+
+# Per-tier defaults (ES defaults: index buffer 10%, query cache 10%)
+TIER_PROFILES = {
+    "hot": {
+        "indices.memory.index_buffer_size": "20%",   # heavy indexing
+        "indices.queries.cache.size": "10%",
+    },
+    "warm": {
+        "indices.memory.index_buffer_size": "10%",
+        "indices.queries.cache.size": "15%",
+    },
+    "cold": {
+        "indices.memory.index_buffer_size": "5%",    # little or no indexing
+        "indices.queries.cache.size": "20%",
+    },
+    "frozen": {
+        "indices.memory.index_buffer_size": "5%",
+        "indices.queries.cache.size": "20%",
+    },
+}
+
+DEFAULT_MAX_BUCKETS = 65536
+LARGE_NODE_MB = 32 * 1024  # coordinating / data nodes with this much RAM get more buckets
+
+
+def _named_tier(node):
+    """Tier from a `data_<tier>` role or the node name, else None."""
+    for tier in TIERS:
+        if f"data_{tier}" in node.roles:
+            return tier
+    lower = node.name.lower()
+    return next((tier for tier in TIERS if tier in lower), None)
+
+
+def node_tier(node):
+    """hot / warm / cold / frozen for data nodes (untiered data nodes tune as hot), else None."""
+    if not node.has_role("data"):
+        return None
+    return _named_tier(node) or "hot"
+
+
+def es_node_roles(node):
+    """
+    node.roles for elasticsearch.yml from the role model.
+    Coordinator / request nodes get an empty list (coordinating-only).
+    None unless instances.yaml gives `roles:` explicitly: roles guessed from
+    the name only size the profile, because narrowing a running node's roles
+    (e.g. a `master-1` that holds shard data) stops it from starting.
+    The template then leaves ES's all-roles default.
+    """
+    if not node.explicit_roles:
+        return None
+    roles = [r for r in node.roles if r in ES_ROLES and r != "data"]
+    if node.has_role("data") and not any(r.startswith("data_") for r in roles):
+        tier = _named_tier(node)
+        if tier is None:
+            roles.append("data")  # generic data node: every tier
+        else:
+            roles += ["data_hot", "data_content"] if tier == "hot" else [f"data_{tier}"]
+    return sorted(set(roles), key=roles.index)
+
+
+def tuning_profile(node, facts=None, rack_awareness=False):
+    """
+    Performance settings for one node: role/tier defaults, sized from the
+    node's CPU and RAM facts when known (see elastic.facts).
+    Returns an ordered {setting: value} dict for the template.
+    """
+    if not isinstance(node, Node):
+        node = Node.from_dict(node)
+    facts = facts or {}
+    cpus, mem_mb = facts.get("cpus"), facts.get("mem_mb")
+    tier = node_tier(node)
+
+    settings = {}
+    if cpus:
+        # pin the processor count so thread pools are sized from the real host/container
+        settings["node.processors"] = cpus
+    if tier:
+        settings.update(TIER_PROFILES[tier])
+        if cpus:
+            settings["thread_pool.write.size"] = cpus
+            settings["thread_pool.write.queue_size"] = 10000 if tier == "hot" else 1000
+            settings["thread_pool.search.size"] = cpus * 3 // 2 + 1
+            settings["thread_pool.search.queue_size"] = 1000 if tier == "hot" else 2000
+    if node.has_role("coordinator", "request") or tier:
+        large = bool(mem_mb and mem_mb >= LARGE_NODE_MB)
+        settings["search.max_buckets"] = DEFAULT_MAX_BUCKETS * 2 if large else DEFAULT_MAX_BUCKETS
+    if rack_awareness:
+        settings["cluster.routing.allocation.awareness.attributes"] = "rack"
+    return settings
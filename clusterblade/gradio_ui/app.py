@@ -1,27 +1,95 @@
-import gradio as gr
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import argparse
-from clusterblade.gradio_ui.components.upload_tab import render_upload_tab
-from clusterblade.gradio_ui.components.deploy_tab import render_deploy_tab
-from clusterblade.gradio_ui.components.ssl_tab import render_ssl_tab
-from clusterblade.gradio_ui.components.monitor_tab import render_monitor_tab
-from clusterblade.gradio_ui.components.readme_tab import render_readme_tab 
-from clusterblade.gradio_ui.components.enable_https_tab import render_enable_https_tab
-from clusterblade.core.paths import get_runtime_dir
+import json
+import os
 from pathlib import Path
+import gradio as gr
+from clusterblade.core.inventory import get_inventory
+from clusterblade.core.paths import get_logs_dir, get_runtime_dir
+from clusterblade.core.state import DEFAULT_NAMESPACE, StateStore
+
+GRADIO_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+DEFAULT_CONCURRENCY = 8  # events Gradio runs at once (deploys no longer block refreshes)
+
+
+class StartupProfile:
+    """Collects cold-start timings: imports, Blocks build, per-tab first render."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {"import_gradio": GRADIO_IMPORT_SECONDS}
+
+    def record(self, key, seconds):
+        self.timings[key] = seconds
+        if self.enabled:
+            print(f"⏱️ {key}: {seconds * 1000:.0f} ms")
+
+    def dump(self):
+        if not self.enabled:
+            return
+        entry = {"ts": time.time(), **{k: round(v, 4) for k, v in self.timings.items()}}
+        with open(get_logs_dir() / "startup.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def timed_tab(label, build, profile):
+    """
+    A tab built once per process, like the rest of the Blocks (every session
+    shares its components and listeners; Gradio cannot add components to a
+    running Blocks except per session through gr.render). `build` imports
+    its tab module itself, the modules keep heavy libraries inside their
+    handlers, and the Monitor tab pages a small row pool, so startup stays cheap.
+    """
+    with gr.Tab(label) as tab:
+        started = time.perf_counter()
+        build()
+        profile.record(f"build_tab:{label}", time.perf_counter() - started)
+    return tab
+
+
+def main(port: int = 7860, profile_startup: bool = False, concurrency: int = DEFAULT_CONCURRENCY):
+    profile = StartupProfile(profile_startup or bool(os.environ.get("CLUSTERBLADE_PROFILE_STARTUP")))
+    build_started = time.perf_counter()
 
-def main(port: int = 7860):
     # Ensure runtime directories exist
     get_runtime_dir()
 
-    # Shared state across all tabs
-    shared_state = {
-        "file": None,          # uploaded YAML path
-        "instances": None,     # parsed node data
-        "cluster_name": None,  # cluster name from Deploy tab
-    }
+    # Cluster state shared by all tabs: immutable snapshots per namespace
+    # (one per cluster, loaded on demand from the persistent inventory),
+    # so concurrent sessions/events never see a half-updated cluster
+    inventory = get_inventory()
+    state_store = StateStore(loader=inventory.load_state)
     CSS_PATH = Path(__file__).parent / "static" / "custom.css"
     CUSTOM_CSS = CSS_PATH.read_text(encoding="utf-8")
 
+    namespace = None  # per-session gr.State, created inside the Blocks below
+
+    def build_upload():
+        from clusterblade.gradio_ui.components.upload_tab import render_upload_tab
+        render_upload_tab(state_store, namespace)
+
+    def build_deploy():
+        from clusterblade.gradio_ui.components.deploy_tab import render_deploy_tab
+        render_deploy_tab(state_store, namespace)
+
+    def build_ssl():
+        from clusterblade.gradio_ui.components.ssl_tab import render_ssl_tab
+        render_ssl_tab(state_store, namespace)
+
+    def build_https():
+        from clusterblade.gradio_ui.components.enable_https_tab import render_enable_https_tab
+        render_enable_https_tab(state_store, namespace)
+
+    def build_monitor():
+        from clusterblade.gradio_ui.components.monitor_tab import render_monitor_tab
+        render_monitor_tab(state_store, namespace)
+
+    def build_jobs():
+        from clusterblade.gradio_ui.components.jobs_tab import render_jobs_tab
+        render_jobs_tab(state_store, namespace)
+
     with gr.Blocks(css=CUSTOM_CSS,title="ClusterBlade") as app:
         gr.HTML("<link rel='stylesheet' href='/static/custom.css'>")
         gr.Markdown("# ⚙️ ClusterBlade Control Center")
@@ -29,25 +97,46 @@ def main(port: int = 7860):
             "Manage your Elasticsearch cluster: Upload configuration, "
             "deploy it, generate SSL certificates, and monitor health."
         )
-
-        # Tabs
-        
+        namespace = gr.State(DEFAULT_NAMESPACE)
+        with gr.Row():
+            cluster_picker = gr.Dropdown(
+                choices=[], label="🗂️ Active cluster", interactive=True, allow_custom_value=False, scale=4
+            )
+            reload_clusters_btn = gr.Button("🔄 Reload Clusters", scale=1)
+
+        # a new session (or a page reload) opens on the cluster picked last
+        def initial_cluster():
+            names = inventory.list_clusters()
+            active = inventory.last_used()
+            return gr.update(choices=names, value=active), active or DEFAULT_NAMESPACE
+
+        def sync_picker(ns):
+            names = inventory.list_clusters()
+            return gr.update(choices=names, value=ns if ns in names else None)
+
+        def switch_cluster(ns):
+            if ns != DEFAULT_NAMESPACE:
+                inventory.mark_used(ns)
+            return sync_picker(ns)
+
+        app.load(initial_cluster, outputs=[cluster_picker, namespace])
+        reload_clusters_btn.click(sync_picker, inputs=[namespace], outputs=[cluster_picker])
+        # picking a cluster switches every tab in this session
+        cluster_picker.input(lambda name: name or DEFAULT_NAMESPACE, inputs=[cluster_picker], outputs=[namespace])
+        # uploads switch the namespace too; keep the picker in step
+        namespace.change(switch_cluster, inputs=[namespace], outputs=[cluster_picker])
+
+        # Tabs — README is the landing tab and is cheap, so it is built eagerly
         with gr.Tab("📘 README"):
+            from clusterblade.gradio_ui.components.readme_tab import render_readme_tab
             render_readme_tab()
-        with gr.Tab("📤 Upload File"):
-            render_upload_tab(shared_state)
-
-        with gr.Tab("🚀 Deploy Cluster"):
-            render_deploy_tab(shared_state)
 
-        with gr.Tab("🔐 SSL Certificates"):
-            render_ssl_tab(shared_state)
-
-        with gr.Tab("Enable HTTPS"): 
-            render_enable_https_tab(shared_state)
-
-        with gr.Tab("📊 Monitor Cluster"):
-            render_monitor_tab(shared_state)
+        timed_tab("📤 Upload File", build_upload, profile)
+        timed_tab("🚀 Deploy Cluster", build_deploy, profile)
+        timed_tab("🔐 SSL Certificates", build_ssl, profile)
+        timed_tab("Enable HTTPS", build_https, profile)
+        timed_tab("📊 Monitor Cluster", build_monitor, profile)
+        timed_tab("🧾 Jobs", build_jobs, profile)
 
         gr.Markdown("---")
         gr.Markdown(
@@ -55,18 +144,31 @@ def main(port: int = 7860):
             "generate SSL certificates, then verify cluster health in the Monitor tab."
         )
 
-    app.launch(server_port=port, share=False, show_api=False)
+    profile.record("build_blocks", time.perf_counter() - build_started)
+    profile.dump()
+
+    app.queue(default_concurrency_limit=concurrency)
+    app.launch(server_port=port, share=False, show_api=False, prevent_thread_lock=True)
+
+    # Prometheus scrape endpoint on the same server (served from in-memory snapshots)
+    from clusterblade.elastic.metrics import mount_metrics
+    mount_metrics(app.app)
+    print(f"📈 Metrics at http://localhost:{port}/metrics")
+
+    # Fill the RSA key pool in the background so cert issuance never waits on key generation
+    from clusterblade.certificates.key_pool import get_key_pool
+    get_key_pool().refill()
+    app.block_thread()
 
 
 def cli_main():
-    import argparse, os
     parser = argparse.ArgumentParser(description="Launch ClusterBlade dashboard")
     parser.add_argument("--port", type=int, default=7860, help="Port number to run on")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import and UI build times")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Events processed concurrently")
     args = parser.parse_args()
 
-    main(port=args.port)
+    main(port=args.port, profile_startup=args.profile_startup, concurrency=args.concurrency)
 
 if __name__ == "__main__":
     cli_main()
-
-
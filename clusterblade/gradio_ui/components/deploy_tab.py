@@ -1,9 +1,10 @@
 import gradio as gr
 from time import sleep
-from clusterblade.elastic.deploy import deploy_cluster
+from clusterblade.core.inventory import get_inventory
+from clusterblade.core.models import ROLES
 
 
-def render_deploy_tab(shared_state):
+def render_deploy_tab(state_store, namespace):
     """
     Render the Deploy tab for Elasticsearch cluster configuration.
     """
@@ -16,61 +17,75 @@ def render_deploy_tab(shared_state):
         enable_security,
         enable_logging,
         memory_lock,
+        enable_tuning,
+        preflight,
         ssh_user,
         ssh_pass,
+        staged,
+        wave_size,
+        rejoin_timeout,
+        es_user,
+        es_pass,
+        ns,
         progress=gr.Progress(track_tqdm=True),
     ):
-        if not shared_state.get("file"):
-            return "⚠️ Please upload a valid 'instances.yaml' file first from the **Upload tab**, then click '🔄 Check Upload Status'."
+        from clusterblade.core.jobs import get_job_manager
+        from clusterblade.gradio_ui.components.jobs_tab import follow_job
 
-        instances = shared_state.get("instances", [])
+        state = state_store.get(ns)
+        if not state.file:
+            yield "⚠️ Please upload a valid 'instances.yaml' file first from the **Upload tab**, then click '🔄 Check Upload Status'."
+            return
+
+        instances = [dict(n) for n in state.instances]
         node_racks = [n.get("rack", "r1") for n in instances]
         if not instances:
-            return "❌ No nodes found. Please re-upload your YAML in the Upload tab."
+            yield "❌ No nodes found. Please re-upload your YAML in the Upload tab."
+            return
 
         # 🆕 apply rack selections
         for i, node in enumerate(instances):
             node["rack"] = node_racks[i] if i < len(node_racks) else "r1"
 
-        shared_state.update({
-            "cluster_name": cluster_name or "es-cluster",
-            "enable_ssl": enable_ssl,
-            "enable_http": enable_http,
-            "http_groups": http_groups,
-            "enable_security": enable_security,
-            "enable_logging": enable_logging,
-            "memory_lock": memory_lock,
-            "instances": instances,   # 🆕 save updated rack info
-        })
-
-        logs = []
-        total_nodes = len(instances)
-        logs.append("🚀 Starting Elasticsearch deployment...\n")
-        yield "\n".join(logs)
-
-        for i, node in enumerate(instances, start=1):
-            node_name = node.get("name")
-            node_ip = node.get("ip")
-            rack = node.get("rack", "r1")
-
-            progress((i - 1) / total_nodes, desc=f"⚙️ Deploying {node_name} ({node_ip}) [Rack {rack}]")
-            logs.append(f"\n⚙️ Deploying configuration to {node_name} ({node_ip}) [Rack {rack}]...")
-            yield "\n".join(logs)
-
-            try:
-                result = deploy_cluster(shared_state, ssh_user, ssh_pass)
-                logs.append(f"✅ Finished node {node_name} ({node_ip}) successfully.\n{result}")
-            except Exception as e:
-                logs.append(f"❌ Failed on {node_name} ({node_ip}): {e}")
-                yield "\n".join(logs)
-                continue
-
-            progress(i / total_nodes, desc=f"✅ Completed {node_name}")
-            yield "\n".join(logs)
-
-        progress(1.0, desc="🎉 All nodes deployed successfully")
-        logs.append("\n🎉 All nodes deployed successfully.\n")
-        yield "\n".join(logs)
+        state = state_store.update(
+            ns,
+            cluster_name=cluster_name or "es-cluster",
+            enable_ssl=enable_ssl,
+            enable_http=enable_http,
+            http_groups=http_groups,
+            enable_security=enable_security,
+            enable_logging=enable_logging,
+            memory_lock=memory_lock,
+            enable_tuning=enable_tuning,
+            preflight=preflight,
+            instances=instances,   # 🆕 save updated rack info
+        )
+        get_inventory().save_settings(
+            ns,
+            cluster_name=state.cluster_name,
+            enable_ssl=enable_ssl,
+            enable_http=enable_http,
+            http_groups=list(http_groups or []),
+            enable_security=enable_security,
+            enable_logging=enable_logging,
+            memory_lock=memory_lock,
+            enable_tuning=enable_tuning,
+            preflight=preflight,
+        )
+
+        # Runs as a background job: one checkpointed step per node (per wave when staged), resumable from the Jobs tab
+        if staged:
+            from clusterblade.elastic.rollout import submit_rollout
+
+            job_id = submit_rollout(
+                get_job_manager(), ns, state.to_dict(), ssh_user, ssh_pass, es_user, es_pass,
+                wave_size=int(wave_size), rejoin_timeout=int(rejoin_timeout),
+            )
+        else:
+            job_id = get_job_manager().submit(
+                "deploy", ns, {"cluster_state": state.to_dict(), "ssh_user": ssh_user}, {"ssh_pass": ssh_pass}
+            )
+        yield from follow_job(job_id, progress)
 
     with gr.Blocks():
         gr.Markdown("### Elasticsearch Cluster Deployment")
@@ -81,13 +96,20 @@ def render_deploy_tab(shared_state):
         enable_http = gr.Checkbox(label="Enable HTTPS (Client)", value=False, interactive=True)
 
         http_groups = gr.CheckboxGroup(
-            ["master", "data", "ingest", "coordinator", "request"],
+            list(ROLES),
             label="Enable HTTPS on these node groups",
             interactive=False
         )
 
         enable_logging = gr.Checkbox(label="Enable Debug Logging", value=False)
         memory_lock = gr.Checkbox(label="Enable Memory Lock", value=False)
+        enable_tuning = gr.Checkbox(
+            label="Apply Performance Profile (JVM heap, node.roles, thread pools, caches sized from CPU/RAM)", value=True
+        )
+        preflight = gr.Radio(
+            ["off", "check", "fix"], value="check",
+            label="Preflight before deploy (vm.max_map_count, limits, swap, THP, memlock; failing nodes are skipped)",
+        )
 
 
         
@@ -96,27 +118,64 @@ def render_deploy_tab(shared_state):
 
         ssh_user = gr.Textbox(label="SSH Username", value="root", interactive=True)
         ssh_pass = gr.Textbox(label="SSH Password", type="password", interactive=True)
+        staged = gr.Checkbox(
+            label="Staged rollout (canary node first, then parallel waves; a node that does not rejoin is rolled back "
+                  "and the remaining waves are halted)",
+            value=False,
+        )
+        with gr.Accordion("🐤 Staged Rollout Settings", open=False):
+            with gr.Row():
+                wave_size = gr.Number(label="Nodes per wave (after the canary)", value=8, precision=0)
+                rejoin_timeout = gr.Number(label="Rejoin deadline per node (seconds)", value=300, precision=0)
+            with gr.Row():
+                es_user = gr.Textbox(label="ES Username (rejoin check)", value="elastic")
+                es_pass = gr.Textbox(label="ES Password (rejoin check)", type="password")
         logs = gr.Textbox(label="Logs", lines=20, interactive=False)
     
         run_btn = gr.Button("⚙️ Waiting for YAML- (Click check button below)", variant="primary", interactive=False)
         refresh_btn = gr.Button( "🔍 Check Upload Status", variant="secondary")
+        with gr.Row():
+            preflight_btn = gr.Button("🩺 Run Preflight Checks", variant="secondary")
+            preflight_fix_btn = gr.Button("🔧 Check & Fix Prerequisites", variant="secondary")
+
+        def run_preflight_checks(ssh_user, ssh_pass, memory_lock, fix, ns):
+            from clusterblade.elastic.preflight import format_report, run_preflight
+
+            state = state_store.get(ns)
+            if not state.instances:
+                return "⚠️ Please upload instances.yaml first."
+            reports = run_preflight(state.topology.nodes, ssh_user, ssh_pass, memory_lock, fix=fix)
+            return format_report(reports)
+
+        preflight_btn.click(
+            fn=lambda u, p, m, ns: run_preflight_checks(u, p, m, False, ns),
+            inputs=[ssh_user, ssh_pass, memory_lock, namespace],
+            outputs=[logs],
+        )
+        preflight_fix_btn.click(
+            fn=lambda u, p, m, ns: run_preflight_checks(u, p, m, True, ns),
+            inputs=[ssh_user, ssh_pass, memory_lock, namespace],
+            outputs=[logs],
+        )
 
                 # --- File check logic ---
-        def check_file_uploaded():
-            instances = shared_state.get("instances", [])
-            if not shared_state.get("file") or not instances:
+        def check_file_uploaded(ns):
+            state = state_store.get(ns)
+            if not state.file or not state.instances:
                 return (gr.update(value="<p style='color:orange;'>⚠️ Please upload instances.yaml first.</p>"),
-                gr.update(interactive=False))
+                gr.update(interactive=False), gr.update())
 
             
-            # ✅ Just silently confirm file exists — no display, no summary
-            return (gr.update(value="<p style='color:green;'>✅ instances.yaml loaded successfully.</p>"),
-            gr.update(value="🟢 Deploy Cluster", interactive=True))
+            # ✅ Confirm the active cluster and restore its saved cluster name
+            return (gr.update(value=f"<p style='color:green;'>✅ Cluster <b>{ns}</b> loaded ({len(state.instances)} nodes).</p>"),
+            gr.update(value="🟢 Deploy Cluster", interactive=True),
+            gr.update(value=state.cluster_name) if state.cluster_name else gr.update())
 
 
         refresh_btn.click(
             fn=check_file_uploaded,
-            outputs=[rack_fields_box,run_btn]
+            inputs=[namespace],
+            outputs=[rack_fields_box,run_btn,cluster_name]
         )
 
         # --- Interactivity logic ---
@@ -156,8 +215,16 @@ def render_deploy_tab(shared_state):
                 enable_security,
                 enable_logging,
                 memory_lock,
+                enable_tuning,
+                preflight,
                 ssh_user,
                 ssh_pass,
+                staged,
+                wave_size,
+                rejoin_timeout,
+                es_user,
+                es_pass,
+                namespace,
             ],
             outputs=[logs],
             show_progress=True
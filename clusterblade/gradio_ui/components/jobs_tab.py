@@ -0,0 +1,94 @@
+import gradio as gr
+from datetime import datetime
+from clusterblade.core.jobs import ACTIVE, format_job, get_job_manager
+
+
+def follow_job(job_id, progress=None):
+    """
+    Stream a background job's log into a Textbox (generator for Gradio events).
+    Closing the page only stops the streaming; the job keeps running.
+    """
+    header = f"🔗 Job {job_id} runs in the background — reattach any time from the 🧾 Jobs tab.\n"
+    job = None
+    for job, text in get_job_manager().attach(job_id):
+        steps = job["steps"]
+        done = sum(s["status"] in ("done", "failed") for s in steps)
+        if progress is not None and steps:
+            progress(done / len(steps), desc=format_job(job))
+        yield f"{header}{format_job(job)}\n\n{text}"
+    if job is None:
+        yield f"⚠️ Unknown job {job_id}."
+
+
+def render_jobs_tab(state_store, namespace):
+    """
+    Jobs tab — list background deploy / SSL / HTTPS jobs, attach to their
+    live progress, resume failed or interrupted ones and cancel running ones.
+    """
+    manager = get_job_manager()
+
+    def list_jobs():
+        rows = []
+        for job in manager.list_jobs():
+            updated = datetime.fromtimestamp(job["updated"]).strftime("%Y-%m-%d %H:%M:%S")
+            rows.append([job["id"], job["kind"], job["cluster"] or "", job["status"],
+                         f"{job['done']}/{job['total']}", job["failed"], updated, job["error"] or ""])
+        return rows
+
+    def attach(job_id):
+        job_id = (job_id or "").strip()
+        if not job_id:
+            yield "⚠️ Enter a job ID (or pick a row above)."
+            return
+        yield from follow_job(job_id)
+
+    def resume(job_id, ssh_pass, cert_pass, es_pass):
+        job_id = (job_id or "").strip()
+        try:
+            manager.resume(job_id, {"ssh_pass": ssh_pass, "cert_password": cert_pass, "es_pass": es_pass})
+        except (KeyError, RuntimeError) as e:
+            yield f"❌ {e}"
+            return
+        yield from follow_job(job_id)
+
+    def cancel(job_id):
+        job_id = (job_id or "").strip()
+        job = manager.get(job_id)
+        if job is None:
+            return f"⚠️ Unknown job {job_id}."
+        if job["status"] not in ACTIVE:
+            return f"ℹ️ Job {job_id} is already {job['status']}."
+        manager.cancel(job_id)
+        return f"⏹️ Cancel requested for job {job_id}; it stops after the current node."
+
+    def pick(evt: gr.SelectData, rows):
+        return rows.iloc[evt.index[0], 0] if hasattr(rows, "iloc") else rows[evt.index[0]][0]
+
+    with gr.Column():
+        gr.Markdown("## 🧾 Background Jobs")
+        gr.Markdown(
+            "Deploys and certificate rollouts run as background jobs: closing the browser does not stop them, "
+            "and every node is checkpointed. A failed or interrupted job resumes from the nodes that are not done yet "
+            "(passwords are never stored, so enter them again to resume)."
+        )
+        jobs_table = gr.Dataframe(
+            headers=["ID", "Kind", "Cluster", "Status", "Steps", "Failed", "Updated", "Error"],
+            value=list_jobs, interactive=False, wrap=True,
+        )
+        refresh_btn = gr.Button("🔄 Refresh Jobs")
+        job_id = gr.Textbox(label="Job ID", placeholder="Select a row or paste a job ID")
+        with gr.Row():
+            ssh_pass = gr.Textbox(label="SSH Password (for resume)", type="password")
+            cert_pass = gr.Textbox(label="Certificate Password (SSL jobs, optional)", type="password")
+            es_pass = gr.Textbox(label="ES Password (rollout jobs)", type="password")
+        with gr.Row():
+            attach_btn = gr.Button("📡 Attach", variant="primary")
+            resume_btn = gr.Button("🔁 Resume")
+            cancel_btn = gr.Button("⏹️ Cancel")
+        job_logs = gr.Textbox(label="Job Log", lines=24, interactive=False)
+
+        refresh_btn.click(fn=list_jobs, outputs=[jobs_table])
+        jobs_table.select(fn=pick, inputs=[jobs_table], outputs=[job_id])
+        attach_btn.click(fn=attach, inputs=[job_id], outputs=[job_logs])
+        resume_btn.click(fn=resume, inputs=[job_id, ssh_pass, cert_pass, es_pass], outputs=[job_logs])
+        cancel_btn.click(fn=cancel, inputs=[job_id], outputs=[job_logs])
@@ -1,10 +1,43 @@
 import gradio as gr
-import requests
-import paramiko
-import socket
 from typing import Tuple
 import subprocess
-REQUEST_TIMEOUT = 3  # seconds
+from clusterblade.certificates.expiry import (
+    CERT_DIR,
+    LAYERS,
+    WARN_DAYS,
+    format_report,
+    queue_reissues,
+    record_scan,
+    scan_certificates,
+)
+from clusterblade.elastic.actions import (
+    BULK_ACTIONS,
+    CLUSTER_NAME_CMD,
+    DEFAULT_CONCURRENCY,
+    NODE_ROLES,
+    build_cmd_map,
+    format_result,
+    iter_bulk_action,
+    select_nodes,
+)
+from clusterblade.elastic.endpoints import node_endpoint, node_url
+from clusterblade.elastic.log_bundle import collect_logs
+from clusterblade.elastic.logs import (
+    DEFAULT_BYTE_BUDGET,
+    DEFAULT_FOLLOW_SECONDS,
+    DEFAULT_TAIL_LINES,
+    LOG_LEVELS,
+    format_log_line,
+    stream_logs,
+)
+from clusterblade.elastic.node_stats import DEFAULT_INTERVAL, METRIC_FIELDS, get_stats_collector
+from clusterblade.elastic.slow_nodes import get_slow_node_detector
+from clusterblade.core.inventory import get_inventory
+from clusterblade.core.tracing import format_waterfall, span, trace
+from clusterblade.elastic.status import REQUEST_TIMEOUT, poll_clusters, probe_instances
+from clusterblade.ssh.client import session
+AUTO_REFRESH_SECONDS = 15
+PAGE_SIZE = 50  # node rows in the Monitor tab; bigger clusters are paged
 open_health_js = """
 (_data) => {
     const result = _data?.[0];
@@ -16,59 +49,16 @@ open_health_js = """
 }
 """
 
-def render_monitor_tab(shared_state):
+def render_monitor_tab(state_store, namespace):
     """Cluster monitor tab."""
 
     # ---------- Helpers ----------
-    def ip_suffix_2(ip: str) -> str:
-        last = ip.split(".")[-1]
-        return last[-2:].zfill(2)
-
-    def check_ssh_port(ip: str) -> bool:
-        try:
-            socket.setdefaulttimeout(REQUEST_TIMEOUT)
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            ok = (s.connect_ex((ip, 22)) == 0)
-            s.close()
-            return ok
-        except Exception:
-            return False
-
-    def check_es_http(ip: str, user: str, pwd: str, use_https: bool) -> bool:
-        port = int(f"92{ip_suffix_2(ip)}")
-        scheme = "https" if use_https else "http"
-        url = f"{scheme}://{ip}:{port}"
-        try:
-            r = requests.get(url, auth=(user, pwd), timeout=REQUEST_TIMEOUT, verify=False)
-            return r.status_code == 200 or r.status_code == 401
-        except Exception:
-            return False
-        
-    def is_node_in_cluster(ip: str, es_user: str, es_pass: str, use_https: bool) -> bool:
-        """Return True if this node is listed in _cat/nodes output."""
-        port = int(f"92{ip_suffix_2(ip)}")
-        scheme = "https" if use_https else "http"
-        base_ip = ip  # this node's IP
-        url = f"{scheme}://{base_ip}:{port}/_cat/nodes?h=ip&format=json"
-        try:
-            r = requests.get(url, auth=(es_user, es_pass), timeout=REQUEST_TIMEOUT, verify=False)
-            if r.status_code == 200:
-                nodes = [n["ip"] for n in r.json()]
-                return base_ip in nodes
-            return False
-        except Exception:
-            return False
-    
-
     def ssh_exec(ip: str, user: str, pwd: str, cmd: str) -> Tuple[bool, str]:
         try:
-            cli = paramiko.SSHClient()
-            cli.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            cli.connect(ip, username=user, password=pwd, timeout=REQUEST_TIMEOUT + 2)
-            _, out, err = cli.exec_command(cmd)
-            out_s = out.read().decode().strip()
-            err_s = err.read().decode().strip()
-            cli.close()
+            with session(ip, user, pwd, timeout=REQUEST_TIMEOUT + 2) as cli:
+                _, out, err = cli.exec_command(cmd)
+                out_s = out.read().decode().strip()
+                err_s = err.read().decode().strip()
             if err_s:
                 return False, err_s
             return True, out_s or "OK"
@@ -82,18 +72,15 @@ def render_monitor_tab(shared_state):
 
     # ---------- Actions ----------
 
-    def execute_action(ssh_user, ssh_pass, node_ip, action, es_user, es_pass, use_https):
-        if not node_ip or not action:
-            return "⚠️ Missing IP or action!"
+    def execute_action(ssh_user, ssh_pass, node_name, action, es_user, es_pass, use_https, ns):
+        node = state_store.get(ns).topology.node(node_name)
+        if not node or not action:
+            return "⚠️ Missing node or action!"
+        node_ip = node.ip
 
         # Dynamically detect cluster name from each node
         def get_cluster_name(ip: str) -> str:
-            ok, output = ssh_exec(
-                ip,
-                ssh_user,
-                ssh_pass,
-                "grep '^cluster.name' /etc/elasticsearch/elasticsearch.yml | cut -d ':' -f2 | tr -d ' '"
-            )
+            ok, output = ssh_exec(ip, ssh_user, ssh_pass, CLUSTER_NAME_CMD)
             if ok and output:
                 return output.strip()
             return "elasticsearch"  # fallback if not found
@@ -101,19 +88,11 @@ def render_monitor_tab(shared_state):
         cluster_name = get_cluster_name(node_ip)
 
         # command-based actions
-        cmd_map = {
-            "Start Node": "sudo systemctl start elasticsearch",
-            "Stop Node": "sudo systemctl stop elasticsearch",
-            "Restart Node": "sudo systemctl restart elasticsearch",
-            "Reboot VM": "sudo reboot",
-            "Node logs": f"sudo tail -n 100 /var/log/elasticsearch/{cluster_name}.log",
-        }
+        cmd_map = build_cmd_map(cluster_name)
 
         # non-command actions handled internally
         if action == "Go To Cluster Health":
-            scheme = "https" if use_https else "http"
-            port = int(f"92{ip_suffix_2(node_ip)}")
-            url = f"{scheme}://{node_ip}:{port}/_cluster/health?pretty"
+            url = node_url(node, use_https, "/_cluster/health?pretty")
             curl_cmd = [
                 "curl", "-s",
                 "-u", f"{es_user}:{es_pass}",
@@ -151,23 +130,177 @@ def render_monitor_tab(shared_state):
         return f"{'✅' if ok else '❌'} {action_name} on {node_ip}: {msg}"
 
             
-    def open_cluster_health(es_user, es_pass, node_ip, use_https):
+    def open_cluster_health(es_user, es_pass, node, use_https):
         """Return a URL to open cluster health view for the given node."""
         scheme = "https" if use_https else "http"
-        port = int(f"92{ip_suffix_2(node_ip)}")
-        return f"{scheme}://{es_user}:{es_pass}@{node_ip}:{port}/_cluster/health?pretty"
+        return f"{scheme}://{es_user}:{es_pass}@{node_endpoint(node)}/_cluster/health?pretty"
+
+    def run_bulk(ssh_user, ssh_pass, action, names, roles, concurrency, ns):
+        """Fan an action out across the selected nodes / roles, streaming each outcome."""
+        instances = state_store.get(ns).instances
+        if not instances:
+            yield "⚠️ No nodes loaded. Upload instances.yaml and refresh first."
+            return
+        if not action:
+            yield "⚠️ Pick an action first!"
+            return
+        if not names and not roles:
+            yield "⚠️ Select at least one node or role."
+            return
+
+        nodes = select_nodes(state_store.get(ns).topology, names, roles)
+        if not nodes:
+            yield "⚠️ No nodes match the selection."
+            return
+
+        logs = [f"🚀 {action} on {len(nodes)} node(s), up to {int(concurrency)} at a time..."]
+        yield "\n".join(logs)
+
+        failed = 0
+        for result in iter_bulk_action(nodes, ssh_user, ssh_pass, action, concurrency):
+            if result["exit_code"] != 0:
+                failed += 1
+            logs.append(format_result(action, result))
+            yield "\n".join(logs)
+
+        logs.append(f"\n🎯 {action} finished: {len(nodes) - failed} ok, {failed} failed.")
+        yield "\n".join(logs)
+
+    def run_log_stream(ssh_user, ssh_pass, names, roles, lines, follow, pattern, level, budget_kb, duration, ns):
+        """Tail logs from the selected nodes, filtered on the nodes, merged by timestamp."""
+        topology = state_store.get(ns).topology
+        nodes = select_nodes(topology, names, roles) if (names or roles) else []
+        if not nodes:
+            yield "⚠️ Select nodes or roles in Bulk Actions first."
+            return
+
+        header = f"📜 {'Following' if follow else 'Last'} {int(lines)} lines from {len(nodes)} node(s)"
+        view = [header, "-" * 60]
+        yield "\n".join(view)
+
+        for batch in stream_logs(
+            nodes, ssh_user, ssh_pass,
+            lines=int(lines),
+            follow=follow,
+            pattern=pattern or None,
+            level=level or None,
+            max_bytes=int(budget_kb) * 1024,
+            duration=int(duration),
+        ):
+            view.extend(format_log_line(entry) for entry in batch)
+            # keep the textbox bounded while following
+            if len(view) > 5000:
+                view = view[:2] + view[-4000:]
+            yield "\n".join(view)
+
+        view.append("-" * 60)
+        view.append("🏁 Log stream ended.")
+        yield "\n".join(view)
+
+    def collect_log_bundle(ssh_user, ssh_pass, names, roles, resume, ns):
+        """Gather logs from the selected nodes (or all nodes) into one archive."""
+        state = state_store.get(ns)
+        nodes = select_nodes(state.topology, names, roles)
+        if not nodes:
+            return "⚠️ No nodes loaded. Upload instances.yaml and refresh first.", None
+
+        bundle, lines = collect_logs(
+            nodes, ssh_user, ssh_pass,
+            cluster_name=state.cluster_name,
+            resume=resume,
+        )
+        header = f"📦 Collecting logs from {len(nodes)} node(s)..."
+        return "\n".join([header, *lines]), (str(bundle) if bundle else None)
 
-    def restart_all_nodes(ssh_user, ssh_pass):
-        instances = shared_state.get("instances") or []
+    def scan_certs(use_https, warn_days, cert_pass, ns):
+        """TLS handshake with every node (no SSH) and compare with runtime/certificates."""
+        instances = state_store.get(ns).instances
+        if not instances:
+            return [], "⚠️ No nodes loaded. Upload instances.yaml first.", []
+        layers = LAYERS if use_https else ("transport",)
+        rows = scan_certificates(instances, layers, CERT_DIR, cert_pass, int(warn_days or WARN_DAYS))
+        record_scan(ns, rows)
+        table = [
+            [r["name"], r["layer"], f"{r['ip']}:{r['port']}", r["status"],
+             "" if r["days_left"] is None else r["days_left"], r["not_after"] or "", (r["fingerprint"] or "")[:16]]
+            for r in rows
+        ]
+        return table, format_report(rows), rows
+
+    def reissue_certs(ssh_user, ssh_pass, cert_pass, validity, warn_days, rows, ns):
+        """Queue background reissue jobs for the flagged nodes of the last scan only."""
+        from clusterblade.core.jobs import get_job_manager
+
+        if not rows:
+            return "⚠️ Scan certificates first."
+        job_ids = queue_reissues(
+            get_job_manager(), ns, state_store.get(ns).instances, rows, ssh_user, ssh_pass,
+            cert_pass, int(validity or 3650), int(warn_days or WARN_DAYS),
+        )
+        if not job_ids:
+            return "✅ No node needs a new certificate."
+        return f"🧾 Queued job(s) {', '.join(job_ids)}; follow them in the 🧾 Jobs tab."
+
+    # Collectors are per cluster and shared by every session watching it;
+    # a session only detaches itself, sampling stops with the last viewer
+    def start_collector(es_user, es_pass, use_https, interval, spill, ns, request: gr.Request):
+        if not state_store.get(ns).instances:
+            return "⚠️ No nodes loaded. Upload instances.yaml first.", gr.update(active=False)
+        collector = get_stats_collector(ns)
+        collector.get_instances = lambda: state_store.get(ns).instances
+        collector.configure(es_user, es_pass, use_https, interval, spill=spill)
+        collector.attach(request.session_hash)
+        return f"📈 Sampling _nodes/stats every {collector.interval}s.", gr.update(active=True)
+
+    def stop_collector(ns, request: gr.Request):
+        remaining = get_stats_collector(ns).detach(request.session_hash)
+        if remaining:
+            return f"⏹️ Stopped watching; still sampling for {remaining} other session(s).", gr.update(active=False)
+        return "⏹️ Metrics collector stopped.", gr.update(active=False)
+
+    def metrics_chart(field, ns, request: gr.Request):
+        import pandas as pd
+
+        collector = get_stats_collector(ns)
+        collector.touch(request.session_hash)
+        rows = []
+        for name, (ts, vals) in collector.series(field).items():
+            rows.extend({"time": pd.Timestamp(t, unit="s"), "node": name, "value": v} for t, v in zip(ts, vals))
+        frame = pd.DataFrame(rows, columns=["time", "node", "value"])
+        status = f"⚠️ {collector.last_error}" if collector.last_error else f"{len(rows)} samples"
+        return gr.update(value=frame, y_title=field), status
+
+    def watch_all_clusters(es_user, es_pass, use_https):
+        """One concurrent sweep over every cluster in the inventory."""
+        names = get_inventory().list_clusters()
+        if not names:
+            return "⚠️ The inventory is empty. Upload an instances.yaml first."
+        results = poll_clusters(
+            {name: state_store.get(name).instances for name in names},
+            es_user, es_pass, use_https,
+        )
+        lines = [f"🌐 {len(names)} cluster(s):"]
+        for name in names:
+            rows = results.get(name, [])
+            es_up = sum(r["es_up"] for r in rows)
+            joined = sum(r["in_cluster"] for r in rows)
+            vm_up = sum(r["vm_up"] for r in rows)
+            icon = "🟢" if rows and joined == len(rows) else ("🟡" if es_up else "🔴")
+            lines.append(f"{icon} {name}: {len(rows)} nodes | VM up {vm_up} | ES up {es_up} | joined {joined}")
+            for r in rows:
+                if not r["in_cluster"]:
+                    lines.append(f"    ❌ {r['name']} ({r['ip']}) {'ES down' if r['vm_up'] else 'VM offline'}")
+        return "\n".join(lines)
+
+    def restart_all_nodes(ssh_user, ssh_pass, ns):
+        instances = state_store.get(ns).instances
         if not instances:
-            return "⚠️ No nodes available to restart."
-        results = []
-        for node in instances:
-            name, ip = node.get("name", ""), node.get("ip", "")
-            results.append(f"♻️ Restarting {name} ({ip})...")
-            ok, msg = ssh_exec(ip, ssh_user, ssh_pass, "sudo systemctl restart elasticsearch")
-            results.append(f"{'✅' if ok else '❌'} Restarted {name}: {msg}")
-        return "\n".join(results)
+            yield "⚠️ No nodes available to restart."
+            return
+        yield from run_bulk(
+            ssh_user, ssh_pass, "Restart Node",
+            [n.get("name", "") for n in instances], [], DEFAULT_CONCURRENCY, ns,
+        )
 
     # ---------- Build UI ----------
     with gr.Blocks() as monitor_ui:
@@ -184,19 +317,97 @@ def render_monitor_tab(shared_state):
             use_https = gr.Checkbox(label="Use HTTPS for ES checks", value=False)
 
         refresh_btn = gr.Button("🔄 Refresh Status")
+        auto_refresh = gr.Checkbox(label=f"Auto refresh every {AUTO_REFRESH_SECONDS}s", value=False)
+        refresh_timer = gr.Timer(AUTO_REFRESH_SECONDS, active=False)
+        watch_all_btn = gr.Button("🌐 Poll All Clusters")
         clear_btn = gr.Button("🧹 Clear Logs")
         restart_all_btn = gr.Button("♻️ Restart All Nodes")
 
+        with gr.Accordion("⚡ Bulk Actions", open=False):
+            with gr.Row():
+                bulk_action = gr.Dropdown(BULK_ACTIONS, label="Action", interactive=True)
+                bulk_concurrency = gr.Slider(
+                    1, 64, value=DEFAULT_CONCURRENCY, step=1, label="Max parallel nodes"
+                )
+            bulk_roles = gr.CheckboxGroup(NODE_ROLES, label="Roles", interactive=True)
+            bulk_nodes = gr.CheckboxGroup([], label="Nodes (refresh status to list them)", interactive=True)
+            bulk_btn = gr.Button("⚡ Run on Selection")
+
+        with gr.Accordion("📜 Log Stream", open=False):
+            gr.Markdown("Uses the node / role selection from **Bulk Actions**. Filters run on the nodes.")
+            with gr.Row():
+                log_lines = gr.Number(label="Last N lines", value=DEFAULT_TAIL_LINES, precision=0)
+                log_level = gr.Dropdown([""] + LOG_LEVELS, label="Min level", value="")
+                log_pattern = gr.Textbox(label="Grep pattern (regex)", placeholder="e.g. shard|timeout")
+            with gr.Row():
+                log_follow = gr.Checkbox(label="Follow (tail -F)", value=False)
+                log_duration = gr.Number(label="Follow for (seconds)", value=DEFAULT_FOLLOW_SECONDS, precision=0)
+                log_budget = gr.Number(label="Byte budget per node (KB)", value=DEFAULT_BYTE_BUDGET // 1024, precision=0)
+            with gr.Row():
+                log_stream_btn = gr.Button("📜 Stream Logs")
+                log_stop_btn = gr.Button("⏹️ Stop")
+            log_view = gr.Textbox(label="Merged Logs", lines=20, interactive=False)
+
+        with gr.Accordion("📦 Log Bundle", open=False):
+            gr.Markdown(
+                "Collects the cluster log and GC logs from the nodes selected in **Bulk Actions** "
+                "(all nodes if nothing is selected), compressed on each node."
+            )
+            with gr.Row():
+                bundle_resume = gr.Checkbox(label="Resume unfinished bundle", value=True)
+                bundle_btn = gr.Button("📦 Collect Logs")
+            bundle_file = gr.File(label="Bundle", interactive=False)
+
+        with gr.Accordion("🔏 Certificate Expiry", open=False):
+            gr.Markdown(
+                "Reads the certificate each node serves on its transport port (and HTTP port with "
+                "**Use HTTPS**) with a TLS handshake — no SSH — and compares it with `runtime/certificates`."
+            )
+            with gr.Row():
+                cert_warn_days = gr.Number(label="Warn below (days)", value=WARN_DAYS, precision=0)
+                cert_validity = gr.Number(label="Validity of reissued certs (days)", value=3650, precision=0)
+                cert_pass = gr.Textbox(label="Certificate Password (if node keys are encrypted)", type="password")
+            with gr.Row():
+                cert_scan_btn = gr.Button("🔏 Scan Certificates")
+                cert_reissue_btn = gr.Button("🧾 Reissue Flagged Nodes")
+            cert_table = gr.Dataframe(
+                headers=["Node", "Layer", "Endpoint", "Status", "Days Left", "Expires", "Fingerprint"],
+                interactive=False, wrap=True,
+            )
+            cert_report = gr.Textbox(label="Certificate Report", lines=8, interactive=False)
+            cert_rows = gr.State([])
+
+        with gr.Accordion("📈 Node Metrics", open=False):
+            with gr.Row():
+                metrics_interval = gr.Number(label="Interval (seconds)", value=DEFAULT_INTERVAL, precision=0)
+                metrics_spill = gr.Checkbox(label="Keep samples on disk (runtime/metrics)", value=False)
+                metrics_field = gr.Dropdown(list(METRIC_FIELDS), value=METRIC_FIELDS[0], label="Metric")
+            with gr.Row():
+                metrics_start_btn = gr.Button("▶️ Start Collector")
+                metrics_stop_btn = gr.Button("⏹️ Stop Collector")
+            metrics_status = gr.Markdown("")
+            metrics_plot = gr.LinePlot(x="time", y="value", color="node", height=320)
+            metrics_timer = gr.Timer(DEFAULT_INTERVAL, active=False)
+
         logs = gr.Textbox(label="Logs", lines=12, interactive=False)
+        with gr.Accordion("⏱️ Last Refresh Timings", open=False):
+            refresh_timings = gr.Textbox(show_label=False, lines=10, interactive=False)
+
+        # Rows are built once per process, so only one page of them exists;
+        # larger clusters page through it instead of shipping 500 hidden rows
+        with gr.Row():
+            prev_page_btn = gr.Button("◀️ Previous", scale=1)
+            page_label = gr.Markdown("")
+            next_page_btn = gr.Button("Next ▶️", scale=1)
+        page = gr.State(0)
 
         node_rows = []
-        MAX_NODES = 500
 
         # --- Each node row ---
-        for _ in range(MAX_NODES):
+        for _ in range(PAGE_SIZE):
             with gr.Row(visible=False) as row:
                 node_html = gr.HTML("")
-                node_ip_box = gr.Textbox(value="", visible=False)
+                node_name_box = gr.Textbox(value="", visible=False)
                 action_choice = gr.Dropdown(
                     ["Start Node", "Stop Node", "Restart Node", "Node logs" ,"Reboot VM", "Go To Cluster Health"],
                     label="Action",
@@ -205,64 +416,134 @@ def render_monitor_tab(shared_state):
                 run_btn = gr.Button("🚀 Run")
                 run_btn.click(
                     fn=execute_action,
-                    inputs=[ssh_user, ssh_pass, node_ip_box, action_choice, es_user, es_pass, use_https],
+                    inputs=[ssh_user, ssh_pass, node_name_box, action_choice, es_user, es_pass, use_https, namespace],
                     outputs=[logs]
                 )
 
-            node_rows.append((row, node_html, node_ip_box))
+            node_rows.append((row, node_html, node_name_box))
 
         # ---------- Refresh Logic ----------
-        def refresh_nodes(ssh_user_v, ssh_pass_v, es_user_v, es_pass_v, use_https_v):
-            instances = shared_state.get("instances") or []
+        def refresh_nodes(ssh_user_v, ssh_pass_v, es_user_v, es_pass_v, use_https_v, ns, page_v):
+            instances = state_store.get(ns).instances
             total = len(instances)
-            vis_updates, html_updates, ip_updates = [], [], []
-
-            for idx, (row, node_html, ip_box) in enumerate(node_rows):
+            pages = max(1, -(-total // PAGE_SIZE))
+            page_v = min(max(int(page_v or 0), 0), pages - 1)
+            first = page_v * PAGE_SIZE
+            vis_updates, html_updates, name_updates = [], [], []
+
+            # timer-driven, so kept in memory only (not appended to traces.jsonl)
+            detector = get_slow_node_detector(ns)
+            with trace("refresh", persist=False, cluster=ns) as run:
+                states = probe_instances(instances, es_user_v, es_pass_v, use_https_v, cluster=ns)
+                if any(st["es_up"] for st in states):
+                    live = [n for n, st in zip(instances, states) if st["es_up"]]
+                    with span("slow_nodes.pull"):
+                        detector.pull(live, es_user_v, es_pass_v, use_https_v)
+            flagged = detector.evaluate(instances)
+
+            for idx, (row, node_html, name_box) in enumerate(node_rows, start=first):
                 if idx < total:
-                    node = instances[idx]
-                    name, ip = node.get("name", ""), node.get("ip", "")
-                    vm_up = check_ssh_port(ip)
-                    es_up = check_es_http(ip, es_user_v, es_pass_v, use_https_v) if vm_up else False
-                    in_cluster = is_node_in_cluster(ip, es_user_v, es_pass_v, use_https_v) if es_up else False
-                    
+                    node, state = instances[idx], states[idx]
+                    name, endpoint = node.get("name", ""), node_endpoint(node)
+                    vm_up, es_up, in_cluster = state["vm_up"], state["es_up"], state["in_cluster"]
+
                     border, dot = status_colors(vm_up, es_up)
                     status_text = f"{'VM Online' if vm_up else 'VM Offline'} | {'ES Running' if es_up else 'ES Down'}"
                     if es_up:
                         status_text += f" | {'🟢 Joined Cluster' if in_cluster else '🟡 Not Joined'}"
                     dot_class = "pulse-dot online" if es_up else "pulse-dot offline"
+                    slow_html = ""
+                    if name in flagged:
+                        border = "#ff9900" if vm_up else border
+                        slow_html = f"<div class='slow-badge'>🐢 {'; '.join(flagged[name])}</div>"
                     html = f"""
                         <div style='border:2px solid {border};background:#181818;color:#e0e0e0;
                                     padding:12px;border-radius:10px;width:240px;'>
                             <span class='{dot_class}'></span>
-                            <b>{name}</b><br>{ip}<br><small>{status_text}</small>
+                            <b>{name}</b><br>{endpoint}<br><small>{status_text}</small>{slow_html}
                         </div>
                     """
                     vis_updates.append(gr.update(visible=True))
                     html_updates.append(gr.update(value=html))
-                    ip_updates.append(gr.update(value=ip))
+                    name_updates.append(gr.update(value=name))
                 else:
                     vis_updates.append(gr.update(visible=False))
                     html_updates.append(gr.update(value=""))
-                    ip_updates.append(gr.update(value=""))
-
-            return vis_updates + html_updates + ip_updates + [f"✅ Refreshed {total} nodes."]
+                    name_updates.append(gr.update(value=""))
+
+            node_names = [n.get("name", "") for n in instances]
+            return (
+                vis_updates + html_updates + name_updates
+                + [gr.update(choices=node_names), f"✅ Refreshed {total} nodes ({len(flagged)} flagged slow).",
+                   format_waterfall(run), page_v,
+                   f"Nodes {min(first + 1, total)}-{min(first + PAGE_SIZE, total)} of {total} (page {page_v + 1}/{pages})"]
+            )
 
         def clear_logs():
             return ""
 
         # ---------- Bind Buttons ----------
-        refresh_btn.click(
-            fn=refresh_nodes,
-            inputs=[ssh_user, ssh_pass, es_user, es_pass, use_https],
-            outputs=[
-                *[r[0] for r in node_rows],  # visibility
-                *[r[1] for r in node_rows],  # HTML
-                *[r[2] for r in node_rows],  # IP textboxes
-                logs,
-            ],
+        refresh_outputs = [
+            *[r[0] for r in node_rows],  # visibility
+            *[r[1] for r in node_rows],  # HTML
+            *[r[2] for r in node_rows],  # node-name textboxes
+            bulk_nodes,
+            logs,
+            refresh_timings,
+            page,
+            page_label,
+        ]
+        refresh_inputs = [ssh_user, ssh_pass, es_user, es_pass, use_https, namespace, page]
+        refresh_btn.click(fn=refresh_nodes, inputs=refresh_inputs, outputs=refresh_outputs)
+        prev_page_btn.click(fn=lambda p: max(p - 1, 0), inputs=[page], outputs=[page]).then(
+            fn=refresh_nodes, inputs=refresh_inputs, outputs=refresh_outputs
         )
+        next_page_btn.click(fn=lambda p: p + 1, inputs=[page], outputs=[page]).then(
+            fn=refresh_nodes, inputs=refresh_inputs, outputs=refresh_outputs
+        )
+        refresh_timer.tick(fn=refresh_nodes, inputs=refresh_inputs, outputs=refresh_outputs)
+        auto_refresh.change(fn=lambda on: gr.update(active=on), inputs=[auto_refresh], outputs=[refresh_timer])
 
         clear_btn.click(fn=clear_logs, outputs=[logs])
-        restart_all_btn.click(fn=restart_all_nodes, inputs=[ssh_user, ssh_pass], outputs=[logs])
+        watch_all_btn.click(fn=watch_all_clusters, inputs=[es_user, es_pass, use_https], outputs=[logs])
+        restart_all_btn.click(fn=restart_all_nodes, inputs=[ssh_user, ssh_pass, namespace], outputs=[logs])
+        log_event = log_stream_btn.click(
+            fn=run_log_stream,
+            inputs=[
+                ssh_user, ssh_pass, bulk_nodes, bulk_roles,
+                log_lines, log_follow, log_pattern, log_level, log_budget, log_duration, namespace,
+            ],
+            outputs=[log_view],
+        )
+        log_stop_btn.click(fn=None, cancels=[log_event])
+        metrics_start_btn.click(
+            fn=start_collector,
+            inputs=[es_user, es_pass, use_https, metrics_interval, metrics_spill, namespace],
+            outputs=[metrics_status, metrics_timer],
+        )
+        metrics_stop_btn.click(fn=stop_collector, inputs=[namespace], outputs=[metrics_status, metrics_timer])
+        metrics_inputs = [metrics_field, namespace]
+        metrics_timer.tick(fn=metrics_chart, inputs=metrics_inputs, outputs=[metrics_plot, metrics_status])
+        metrics_field.change(fn=metrics_chart, inputs=metrics_inputs, outputs=[metrics_plot, metrics_status])
+        bundle_btn.click(
+            fn=collect_log_bundle,
+            inputs=[ssh_user, ssh_pass, bulk_nodes, bulk_roles, bundle_resume, namespace],
+            outputs=[logs, bundle_file],
+        )
+        cert_scan_btn.click(
+            fn=scan_certs,
+            inputs=[use_https, cert_warn_days, cert_pass, namespace],
+            outputs=[cert_table, cert_report, cert_rows],
+        )
+        cert_reissue_btn.click(
+            fn=reissue_certs,
+            inputs=[ssh_user, ssh_pass, cert_pass, cert_validity, cert_warn_days, cert_rows, namespace],
+            outputs=[cert_report],
+        )
+        bulk_btn.click(
+            fn=run_bulk,
+            inputs=[ssh_user, ssh_pass, bulk_action, bulk_nodes, bulk_roles, bulk_concurrency, namespace],
+            outputs=[logs],
+        )
 
     return monitor_ui
@@ -1,39 +1,34 @@
 import gradio as gr
 from pathlib import Path
-from clusterblade.certificates.deploy_ssl import deploy_ssl_to_nodes
-from clusterblade.certificates.generator import generate_all_from_yaml
 
-def render_ssl_tab(shared_state):
+def render_ssl_tab(state_store, namespace):
     """
     SSL tab — regenerates and deploys SSL certificates for all nodes.
     """
-    def generate_and_deploy(ssh_user, ssh_pass, cert_pass,cert_validity):
-        logs = []
+    def generate_and_deploy(ssh_user, ssh_pass, cert_pass,cert_validity, ns):
+        from clusterblade.core.jobs import get_job_manager
+        from clusterblade.gradio_ui.components.jobs_tab import follow_job
 
-        if "file" not in shared_state or not Path(shared_state["file"]).exists():
-            return "❌ Please upload and parse instances.yml first."
+        state = state_store.get(ns)
+
+        if not state.file or not Path(state.file).exists():
+            yield "❌ Please upload and parse instances.yml first."
+            return
 
-        yaml_path = Path(shared_state["file"])
-        cert_dir = Path("runtime/certificates")
-        password = cert_pass.encode() if cert_pass else None
         cert_validity=int(cert_validity) if cert_validity.isdigit() else 3650
-        try:
-            logs.append("🧹 Cleaning and regenerating SSL certificates...\n")
-            generate_all_from_yaml(yaml_path, cert_dir, password,cert_validity)
-            logs.append("✅ Certificates regenerated successfully.\n")
-        except Exception as e:
-            logs.append(f"❌ SSL generation failed: {e}\n")
-            return "\n".join(logs)
-
-        try:
-            logs.append("🚀 Starting SSL deployment to nodes...\n")
-            deploy_logs = deploy_ssl_to_nodes(shared_state, ssh_user, ssh_pass, cert_pass)
-            logs.append(deploy_logs)
-            logs.append("🎉 SSL deployment completed.\n")
-        except Exception as e:
-            logs.append(f"❌ SSL deployment failed: {e}\n")
-
-        return "\n".join(logs)
+        # Background job: certificates step, then one checkpointed step per node
+        job_id = get_job_manager().submit(
+            "ssl",
+            ns,
+            {
+                "yaml_path": str(Path(state.file)),
+                "instances": [dict(n) for n in state.instances],
+                "ssh_user": ssh_user,
+                "cert_validity": cert_validity,
+            },
+            {"ssh_pass": ssh_pass, "cert_password": cert_pass},
+        )
+        yield from follow_job(job_id)
 
     with gr.Column():
         gr.Markdown("## 🔐 SSL Certificate Generator & Deployment")
@@ -52,6 +47,6 @@ def render_ssl_tab(shared_state):
 
         run_btn.click(
             fn=generate_and_deploy,
-            inputs=[ssh_user, ssh_pass, cert_pass,cert_validity],
+            inputs=[ssh_user, ssh_pass, cert_pass,cert_validity, namespace],
             outputs=[logs_box]
         )
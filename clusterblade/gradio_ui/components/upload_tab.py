@@ -1,82 +1,83 @@
 import gradio as gr
-import yaml
+from html import escape
 from pathlib import Path
-from collections import defaultdict
+from clusterblade.core.inventory import get_inventory, safe_cluster_key
+from clusterblade.core.instances import InstancesError, parse_instances
 
 
-def render_upload_tab(shared_state):
+def render_upload_tab(state_store, namespace):
     """
     Upload & preview instances.yml file grouped by node role.
-    Updates shared_state with parsed data for other tabs.
+    Updates the cluster state store with parsed data for other tabs and
+    saves the cluster to the persistent inventory under `cluster_key`.
     """
 
-    def parse_yaml(file_obj):
+    def parse_yaml(file_obj, cluster_key, ns):
         if not file_obj:
-            return "<p style='color:red'>No file uploaded.</p>"
+            return "<p style='color:red'>No file uploaded.</p>", ns
 
         try:
             path = getattr(file_obj, "name", None)
             if not path or not Path(path).exists():
-                return "<p style='color:red'>❌ Invalid file.</p>"
+                return "<p style='color:red'>❌ Invalid file.</p>", ns
 
-            with open(path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            # Parse + validate once (cached by file hash); nodes get explicit
+            # `roles:` from the YAML, else roles inferred from the name
+            try:
+                parsed = parse_instances(path)
+            except InstancesError as e:
+                items = "".join(f"<li>{escape(p)}</li>" for p in e.problems)
+                return f"<p style='color:red'>❌ Invalid instances file:</p><ul>{items}</ul>", ns
+            instances = parsed.node_dicts()
 
-            instances = data.get("instances") or data.get("nodes")
-            if not instances:
-                return "<p style='color:orange'>⚠️ No instances found.</p>"
+            # Cluster key: the field, else `cluster_name:` in the YAML, else the file name
+            key = safe_cluster_key(cluster_key or parsed.cluster_name or Path(path).stem)
 
-            # ✅ Store instances so deploy / SSL tabs can use them
-            shared_state["instances"] = instances
-            shared_state["file"] = path
-            
-            # Group nodes by inferred role
-            grouped = defaultdict(list)
-            for inst in instances:
-                name = inst.get("name", "").lower()
-                if "master" in name:
-                    grouped["Master"].append(inst)
-                elif "request" in name:
-                    grouped["Request"].append(inst)
-                elif "ingest" in name:
-                    grouped["Ingest"].append(inst)
-                elif "datahot" in name or "hot" in name:
-                    grouped["DataHot"].append(inst)
-                elif "warm" in name:
-                    grouped["DataWarm"].append(inst)
-                elif "cold" in name:
-                    grouped["DataCold"].append(inst)
-                else:
-                    grouped["Other"].append(inst)
+            # ✅ Persist (the inventory allocates ports), then reload the snapshot
+            # from it so deploy / SSL tabs see the stored nodes in one atomic swap
+            get_inventory().save_cluster(key, instances, source_file=path)
+            state_store.invalidate(key)
+            topology = state_store.get(key).topology
 
-            shared_state["grouped_nodes"] = grouped
-
-            # Generate grouped HTML preview
-            html = ["<div style='font-family:monospace;'>"]
+            # Generate HTML preview grouped by each node's primary role
+            html = ["<div style='font-family:monospace;'>", f"<p>💾 Saved as cluster <b>{key}</b></p>"]
+            if parsed.warnings:
+                items = "".join(f"<li>{escape(w)}</li>" for w in parsed.warnings)
+                html.append(f"<p style='color:orange'>⚠️ Warnings:</p><ul>{items}</ul>")
+            grouped = {}
+            for node in topology:
+                grouped.setdefault(node.primary_role, []).append(node)
             for role, nodes in grouped.items():
-                html.append(f"<h3 style='color:#4CAF50;'>{role} Nodes ({len(nodes)})</h3>")
+                html.append(f"<h3 style='color:#4CAF50;'>{role.capitalize()} Nodes ({len(nodes)})</h3>")
                 html.append("<table style='width:100%;border-collapse:collapse;'>")
-                html.append("<tr><th>Name</th><th>IP</th><th>DNS</th></tr>")
-                for inst in nodes:
+                html.append("<tr><th>Name</th><th>IP</th><th>DNS</th><th>Roles</th><th>HTTP / Transport</th></tr>")
+                for node in nodes:
                     html.append(
-                        f"<tr><td>{inst.get('name')}</td>"
-                        f"<td>{inst.get('ip')}</td>"
-                        f"<td>{inst.get('dns')}</td></tr>"
+                        f"<tr><td>{node.name}</td>"
+                        f"<td>{node.ip}</td>"
+                        f"<td>{node.dns}</td>"
+                        f"<td>{', '.join(node.roles)}</td>"
+                        f"<td>{node.http_port} / {node.transport_port}</td></tr>"
                     )
                 html.append("</table><br>")
             html.append("</div>")
 
-            return "\n".join(html)
+            return "\n".join(html), key
 
         except Exception as e:
-            return f"<p style='color:red'>❌ Error parsing YAML: {e}</p>"
+            return f"<p style='color:red'>❌ Error parsing YAML: {e}</p>", ns
 
     with gr.Column():
         
         gr.Markdown("### 📤 Upload Your `instances.yml`")
+        cluster_key = gr.Textbox(
+            label="Cluster name (inventory key)",
+            placeholder="Defaults to cluster_name in the YAML, else the file name",
+            interactive=True,
+        )
         file_input = gr.File(label="Upload YAML", file_types=[".yml", ".yaml"])
         preview_html = gr.HTML(label="Preview")
 
         # Handle upload event
-        file_input.upload(parse_yaml, inputs=[file_input], outputs=[preview_html])
+        file_input.upload(parse_yaml, inputs=[file_input, cluster_key, namespace], outputs=[preview_html, namespace])
        
@@ -1,16 +1,284 @@
-import paramiko
+import atexit
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from clusterblade.core.health import HEALTH
+from clusterblade.core.tracing import current_node, span
 
-def execute_remote(ip, username, password, commands, port=22):
-    logs = []
+# SSH port for every node (override for non-standard sshd or the benchmark's fake server)
+SSH_PORT = int(os.environ.get("CLUSTERBLADE_SSH_PORT", "22"))
+
+# Host keys: learned on first contact into runtime/known_hosts and checked on every later
+# connect ("accept-new"); "strict" only trusts keys already in the file, "off" trusts anything.
+KNOWN_HOSTS_PATH = os.environ.get("CLUSTERBLADE_KNOWN_HOSTS")  # default: runtime/known_hosts
+HOST_KEY_POLICY = os.environ.get("CLUSTERBLADE_HOST_KEY_POLICY", "accept-new")
+
+# Key auth: the ClusterBlade key (see ssh.keys / `clusterblade ssh-keys`) is offered before the password;
+# the ssh-agent is used when no password is given or CLUSTERBLADE_SSH_AGENT=1.
+SSH_AGENT = os.environ.get("CLUSTERBLADE_SSH_AGENT") == "1"
+
+# Authenticated connections kept for reuse by session() (0 disables pooling)
+POOL_IDLE_SECONDS = float(os.environ.get("CLUSTERBLADE_SSH_POOL_IDLE", "60"))
+POOL_MAX_IDLE_PER_HOST = 4
+KEEPALIVE_SECONDS = 30
+
+# Connection counters, read by /metrics
+_STATS = {"connects": 0, "failures": 0, "connect_seconds": 0.0, "pool_hits": 0, "pool_misses": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def ssh_stats():
+    """Copy of the connection counters: connects, failures, connect_seconds, pool_hits/misses/idle."""
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    stats["pool_idle"] = POOL.idle_count()
+    return stats
+
+
+# ---------- Host keys ----------
+
+_host_keys = None
+_host_keys_lock = threading.Lock()
+_policy = None
+
+
+def get_known_hosts_path() -> Path:
+    if KNOWN_HOSTS_PATH:
+        return Path(KNOWN_HOSTS_PATH)
+    from clusterblade.core.paths import get_runtime_dir
+
+    return get_runtime_dir() / "known_hosts"
+
+
+def _known_hosts(paramiko):
+    """The known_hosts file, parsed once per process and shared by every connect."""
+    global _host_keys
+    with _host_keys_lock:
+        if _host_keys is None:
+            path = get_known_hosts_path()
+            _host_keys = paramiko.HostKeys(str(path) if path.exists() else None)
+        return _host_keys
+
+
+def reset_host_keys():
+    """Forget the parsed known_hosts (it is read again on the next connect)."""
+    global _host_keys
+    with _host_keys_lock:
+        _host_keys = None
+
+
+def _remember_host_key(hostname, key):
+    """Trust-on-first-use: add the key to the shared store and append it to known_hosts."""
+    with _host_keys_lock:
+        if _host_keys.check(hostname, key):
+            return  # learned meanwhile by a parallel connect
+        _host_keys.add(hostname, key.get_name(), key)
+        path = get_known_hosts_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{hostname} {key.get_name()} {key.get_base64()}\n")
+
+
+def _host_key_policy(paramiko):
+    global _policy
+    if _policy is None:
+        class AcceptNewPolicy(paramiko.MissingHostKeyPolicy):
+            def missing_host_key(self, client, hostname, key):
+                _remember_host_key(hostname, key)
+
+        _policy = AcceptNewPolicy()
+    return _policy
+
+
+def _prepare_host_keys(paramiko, ssh, ip, port):
+    if HOST_KEY_POLICY == "off":
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        return
+    known = _known_hosts(paramiko)
+    name = ip if port == 22 else f"[{ip}]:{port}"
+    entry = known.lookup(name)
+    if entry is not None:
+        ssh.get_host_keys()[name] = {key_type: entry[key_type] for key_type in entry}
+    ssh.set_missing_host_key_policy(paramiko.RejectPolicy() if HOST_KEY_POLICY == "strict" else _host_key_policy(paramiko))
+
+
+# ---------- Client key ----------
+
+_client_key = (None, None)  # ((path, mtime), PKey)
+
+
+def _load_client_key(paramiko):
+    """The ClusterBlade private key if one exists (parsed once, reloaded when the file changes)."""
+    global _client_key
+    from clusterblade.ssh.keys import get_key_path
+
+    path = get_key_path()
+    try:
+        stamp = (str(path), path.stat().st_mtime)
+    except OSError:
+        return None
+    if _client_key[0] != stamp:
+        for cls in (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey):
+            try:
+                _client_key = (stamp, cls.from_private_key_file(str(path)))
+                break
+            except (paramiko.SSHException, ValueError):
+                continue
+        else:
+            _client_key = (stamp, None)
+    return _client_key[1]
+
+
+def connect(ip, username, password, port=None, timeout=10):
+    """
+    Open an SSH connection to a node and return the connected client.
+    Auth tries the ClusterBlade key (if any), the agent, then the password;
+    the host key is checked against runtime/known_hosts (see HOST_KEY_POLICY).
+    Fails fast with CircuitOpenError while the host's circuit is open (core.health).
+    """
+    import paramiko  # deferred: only SSH-using callbacks pay for it
+
+    HEALTH.check(ip)
+    port = port or SSH_PORT
     ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh.connect(ip, username=username, password=password, port=port)
-
-    for cmd in commands:
-        logs.append(f"$ {cmd}")
-        stdin, stdout, stderr = ssh.exec_command(cmd)
-        out, err = stdout.read().decode(), stderr.read().decode()
-        if out: logs.append(out)
-        if err: logs.append(err)
-    ssh.close()
+    _prepare_host_keys(paramiko, ssh, ip, port)
+    started = time.perf_counter()
+    try:
+        with span("ssh.connect", node=current_node() or ip):
+            ssh.connect(
+                ip, username=username, password=password or None, port=port, timeout=timeout,
+                pkey=_load_client_key(paramiko), allow_agent=SSH_AGENT or not password, look_for_keys=False,
+            )
+    except Exception as e:
+        HEALTH.record(ip, e)
+        with _STATS_LOCK:
+            _STATS["failures"] += 1
+        raise
+    HEALTH.record_success(ip)
+    with _STATS_LOCK:
+        _STATS["connects"] += 1
+        _STATS["connect_seconds"] += time.perf_counter() - started
+    return ssh
+
+
+class SSHPool:
+    """
+    Idle authenticated connections, keyed by host, port, user and password
+    hash, so repeated operations on a node (facts → preflight → deploy, SSL
+    pushes, actions) skip the key exchange and authentication. A connection
+    is used by one caller at a time; idle ones expire after idle_seconds.
+    """
+
+    def __init__(self, idle_seconds=POOL_IDLE_SECONDS, max_idle_per_host=POOL_MAX_IDLE_PER_HOST):
+        self.idle_seconds = idle_seconds
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}      # key → [(client, released_at)]
+        self._borrowed = {}  # id(client) → key
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ip, username, password, port):
+        return ip, port or SSH_PORT, username, hashlib.sha256((password or "").encode()).hexdigest()
+
+    def acquire(self, ip, username, password, port=None, timeout=10):
+        key = self._key(ip, username, password, port)
+        now = time.monotonic()
+        stale = []
+        client = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, released = idle.pop()
+                transport = candidate.get_transport()
+                if now - released <= self.idle_seconds and transport is not None and transport.is_active():
+                    client = candidate
+                    break
+                stale.append(candidate)
+        for old in stale:
+            old.close()
+        with _STATS_LOCK:
+            _STATS["pool_hits" if client else "pool_misses"] += 1
+        if client is None:
+            client = connect(ip, username, password, port=port, timeout=timeout)
+            if self.idle_seconds > 0:
+                client.get_transport().set_keepalive(KEEPALIVE_SECONDS)
+        with self._lock:
+            self._borrowed[id(client)] = key
+        return client
+
+    def release(self, client):
+        """Return a healthy connection for reuse (closed when pooling is off or the host is full)."""
+        with self._lock:
+            key = self._borrowed.pop(id(client), None)
+            transport = client.get_transport()
+            idle = self._idle.setdefault(key, []) if key else None
+            if (self.idle_seconds > 0 and idle is not None and len(idle) < self.max_idle_per_host
+                    and transport is not None and transport.is_active()):
+                idle.append((client, time.monotonic()))
+                return
+        client.close()
+
+    def discard(self, client):
+        with self._lock:
+            self._borrowed.pop(id(client), None)
+        client.close()
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for clients in idle.values():
+            for client, _ in clients:
+                client.close()
+
+
+POOL = SSHPool()
+atexit.register(POOL.close_all)
+
+
+@contextmanager
+def session(ip, username, password, port=None, timeout=10):
+    """
+    A (pooled) SSH connection for the duration of the block: returned to
+    POOL afterwards, or closed if the block raises.
+    """
+    client = POOL.acquire(ip, username, password, port=port, timeout=timeout)
+    try:
+        yield client
+    except BaseException:
+        POOL.discard(client)
+        raise
+    POOL.release(client)
+
+
+def run_command(ip, username, password, command, port=None, timeout=10):
+    """
+    Run a single command on a node.
+    Returns (exit_code, stdout, stderr); exit_code is -1 when the
+    session is dropped before a status arrives (e.g. on reboot).
+    """
+    with session(ip, username, password, port=port, timeout=timeout) as ssh:
+        with span("ssh.exec", node=current_node() or ip, command=command.split(" ", 1)[0]):
+            _, stdout, stderr = ssh.exec_command(command)
+            out, err = stdout.read().decode(), stderr.read().decode()
+            exit_code = stdout.channel.recv_exit_status()
+    return exit_code, out.strip(), err.strip()
+
+
+def execute_remote(ip, username, password, commands, port=None):
+    logs = []
+    with session(ip, username, password, port=port) as ssh:
+        for cmd in commands:
+            logs.append(f"$ {cmd}")
+            with span("ssh.exec", node=current_node() or ip, command=cmd.split(" ", 1)[0]):
+                stdin, stdout, stderr = ssh.exec_command(cmd)
+                out, err = stdout.read().decode(), stderr.read().decode()
+            if out: logs.append(out)
+            if err: logs.append(err)
     return "\n".join(logs)
@@ -0,0 +1,84 @@
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from clusterblade.core.tracing import propagate, span
+from clusterblade.ssh.client import run_command
+
+DEFAULT_CONCURRENCY = 16
+
+
+def get_key_path() -> Path:
+    """ClusterBlade's SSH private key: CLUSTERBLADE_SSH_KEY, else runtime/ssh/id_ed25519."""
+    if os.environ.get("CLUSTERBLADE_SSH_KEY"):
+        return Path(os.environ["CLUSTERBLADE_SSH_KEY"]).expanduser()
+    from clusterblade.core.paths import get_runtime_dir
+
+    return get_runtime_dir() / "ssh" / "id_ed25519"
+
+
+def ensure_keypair(path=None):
+    """
+    Create an Ed25519 key pair (OpenSSH format, private key 0600) unless it
+    exists. Returns (private key path, public key line).
+    """
+    path = Path(path) if path else get_key_path()
+    pub_path = path.with_name(path.name + ".pub")
+    if not path.exists():
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+
+        key = ed25519.Ed25519PrivateKey.generate()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        private = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.OpenSSH, serialization.NoEncryption()
+        )
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(private)
+        public = key.public_key().public_bytes(serialization.Encoding.OpenSSH, serialization.PublicFormat.OpenSSH)
+        pub_path.write_text(f"{public.decode()} clusterblade@{socket.gethostname()}\n", encoding="utf-8")
+        print(f"🔑 Created SSH key {path}")
+    return path, pub_path.read_text(encoding="utf-8").strip()
+
+
+def _install_cmd(public_line):
+    # idempotent: the line is appended once; OpenSSH key lines never contain single quotes
+    return (
+        "umask 077; mkdir -p ~/.ssh && touch ~/.ssh/authorized_keys && "
+        f"(grep -qxF '{public_line}' ~/.ssh/authorized_keys || echo '{public_line}' >> ~/.ssh/authorized_keys) && "
+        "chmod 700 ~/.ssh && chmod 600 ~/.ssh/authorized_keys"
+    )
+
+
+def bootstrap_keys(nodes, ssh_user, ssh_pass, max_workers=DEFAULT_CONCURRENCY, progress_callback=None):
+    """
+    Install ClusterBlade's public key in ssh_user's authorized_keys on every
+    host (password auth, in parallel), then check that key auth works.
+    Returns {ip: (ok, message)}.
+    """
+    _, public_line = ensure_keypair()
+    hosts = list(dict.fromkeys(n.get("ip", "") for n in nodes if n.get("ip")))
+    if not hosts:
+        return {}
+
+    def install(ip):
+        with span("keys.install", node=ip):
+            try:
+                code, _, err = run_command(ip, ssh_user, ssh_pass, _install_cmd(public_line))
+                if code != 0:
+                    return ip, (False, f"❌ {ip}: could not update authorized_keys: {err or code}")
+                code, _, err = run_command(ip, ssh_user, None, "true")  # key (or agent) only
+                if code != 0:
+                    return ip, (False, f"⚠️ {ip}: key installed but key login failed: {err or code}")
+            except Exception as e:
+                return ip, (False, f"❌ {ip}: {e}")
+        return ip, (True, f"✅ {ip}: key login works")
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as pool:
+        for ip, result in pool.map(propagate(install), hosts):
+            results[ip] = result
+            if progress_callback:
+                progress_callback(result[1])
+    return results